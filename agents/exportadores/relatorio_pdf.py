@@ -2,45 +2,93 @@
 
 Gera relatório PDF estruturado com dados de entrada, entidades, relações,
 parecer técnico e parecer final. Foco em contratos de prestação de serviços.
+
+O `ModeloRelatorio`, criado uma vez por processo, decide uma única vez qual
+fonte usar: a DejaVu é registrada pelo `add_font(uni=True)` do fpdf, que lê
+as métricas do TTF na primeira vez e as guarda no `.pkl` ao lado da fonte;
+os documentos seguintes (e os próximos processos) só carregam o `.pkl`.
 """
 
+import logging
 import os
-from typing import Dict, List, Any
-from fpdf import FPDF
+import threading
 from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from fpdf import FPDF
+
+from monitoring.logs import obter_logger, registrar_evento
 
 _DEFAULT_FONT = "Helvetica"
+FONTE_DEJAVU = Path(__file__).resolve().parents[2] / "fonts" / "DejaVuSans.ttf"
+PASTA_RELATORIOS = Path(__file__).resolve().parents[2] / "reports"
+TITULO = "Relatório de Análise Contratual"
+LIMITE_TEXTO_RESUMIDO = 500
+
+_logger = obter_logger("relatorio_pdf")
+
+
+class _DocumentoRelatorio(FPDF):
+    def _putfonts(self):
+        # O fpdf acrescenta ao subconjunto um código por caractere escrito, com
+        # repetições; sem elas, a busca de larguras não varre milhares de itens
+        for fonte in self.fonts.values():
+            if fonte.get("type") == "TTF" and isinstance(fonte.get("subset"), list):
+                fonte["subset"] = list(dict.fromkeys(fonte["subset"]))
+        super()._putfonts()
+
 
+def caminho_relatorio(graph_id: str) -> Path:
+    return PASTA_RELATORIOS / f"relatorio_{graph_id}.pdf"
 
-def _criar_pasta_reports() -> None:
-    os.makedirs("reports", exist_ok=True)
 
-def _texto_resumido(texto: str, limite: int = 500) -> str:
+def _texto_resumido(texto: str, limite: int = LIMITE_TEXTO_RESUMIDO) -> str:
     if not texto:
         return ""
     texto_limpo = str(texto).strip()
     return texto_limpo[:limite] + "..." if len(texto_limpo) > limite else texto_limpo
 
-def _carregar_fonte(pdf: FPDF) -> str:
-    try:
-        font_path = Path(__file__).resolve().parents[2] / "fonts" / "DejaVuSans.ttf"
-        print(f"🔎 Verificando fonte em: {font_path}")
-        if font_path.exists():
-            pdf.add_font("DejaVu", "", font_path.as_posix(), uni=True)
-            print("✅ Fonte DejaVu carregada com sucesso.")
-            return "DejaVu"
-        else:
-            raise FileNotFoundError(f"❌ Fonte não encontrada em {font_path}")
-    except Exception as exc:
-        print(f"⚠️ Erro ao carregar fonte personalizada: {exc}")
-        print("🟡 Usando fonte padrão Helvetica.")
-        return _DEFAULT_FONT
 
+class ModeloRelatorio:
+    """Fonte escolhida uma vez e compartilhada por todos os relatórios."""
+
+    def __init__(self, caminho_fonte: Path = FONTE_DEJAVU) -> None:
+        self.caminho_fonte = caminho_fonte
+        self.fonte = _DEFAULT_FONT
+        try:
+            if not caminho_fonte.exists():
+                raise FileNotFoundError(caminho_fonte)
+            # Valida a fonte e deixa o .pkl de métricas pronto para os documentos
+            FPDF().add_font("DejaVu", "", caminho_fonte.as_posix(), uni=True)
+            self.fonte = "DejaVu"
+        except Exception as exc:
+            _logger.warning("Fonte %s indisponível (%s); usando %s", caminho_fonte, exc, _DEFAULT_FONT)
+
+    def novo_documento(self) -> FPDF:
+        """FPDF com a fonte registrada e o título na primeira página."""
+        pdf = _DocumentoRelatorio()
+        if self.fonte != _DEFAULT_FONT:
+            pdf.add_font(self.fonte, "", self.caminho_fonte.as_posix(), uni=True)
+        pdf.add_page()
+        _adicionar_titulo(pdf, self.fonte)
+        return pdf
+
+
+_MODELO: Optional[ModeloRelatorio] = None
+_MODELO_LOCK = threading.Lock()
+
+
+def obter_modelo_relatorio() -> ModeloRelatorio:
+    global _MODELO
+    with _MODELO_LOCK:
+        if _MODELO is None:
+            _MODELO = ModeloRelatorio()
+        return _MODELO
 
 
 def _adicionar_titulo(pdf: FPDF, fonte: str) -> None:
     pdf.set_font(fonte, "", 16)
-    pdf.cell(0, 10, "Relatório de Análise Contratual", ln=1, align="C")
+    pdf.cell(0, 10, TITULO, ln=1, align="C")
     pdf.ln(5)
 
 def _adicionar_secao_dados(pdf: FPDF, dados_ingestao: Dict[str, str], fonte: str) -> None:
@@ -95,7 +143,6 @@ def _adicionar_avaliacoes_llm(pdf: FPDF, avaliacoes: List[Dict[str, Any]], fonte
     pdf.set_font(fonte, "", 12)
     pdf.cell(0, 10, "Avaliações LLM", ln=1)
     for av in avaliacoes or []:
-        print(f"[PDF] avaliacao LLM: {av}")
         comentario = av.get("comentario") or ""
         tipo = av.get("tipo") or "?"
         risco = av.get("risco") or ""
@@ -109,14 +156,13 @@ def gerar_relatorio_pdf(
     parecer_tecnico: Dict[str, List[str]],
     parecer_final: Dict[str, str],
     avaliacoes_llm: List[Dict[str, Any]] | None = None,
+    modelo: Optional[ModeloRelatorio] = None,
 ) -> str:
-    print("[PDF] Iniciando geração do relatório")
-    _criar_pasta_reports()
+    modelo = modelo or obter_modelo_relatorio()
+    PASTA_RELATORIOS.mkdir(parents=True, exist_ok=True)
 
-    pdf = FPDF()
-    pdf.add_page()
-
-    fonte = _carregar_fonte(pdf)
+    pdf = modelo.novo_documento()
+    fonte = modelo.fonte
 
     dados_seguro = {
         "tipo_entrada": str(dados_ingestao.get("tipo_entrada", "")) if dados_ingestao else "",
@@ -142,28 +188,40 @@ def gerar_relatorio_pdf(
     }
 
     avaliacoes_seguras = avaliacoes_llm or []
-    print(f"[PDF] Total avaliacoes LLM: {len(avaliacoes_seguras)}")
-
-    try:
-        _adicionar_titulo(pdf, fonte)
-        _adicionar_secao_dados(pdf, dados_seguro, fonte)
-        _adicionar_entidades_relacoes(pdf, grafo_seguro, fonte)
-        _adicionar_parecer_tecnico(pdf, parecer_tecnico_seguro, fonte)
-        _adicionar_parecer_final(pdf, parecer_final_seguro, fonte)
-        _adicionar_avaliacoes_llm(pdf, avaliacoes_seguras, fonte)
-    except Exception as exc:
-        print(f"❌ Erro ao preencher PDF: {exc}")
-        raise
-
-    caminho = Path(__file__).resolve().parents[2] / "reports" / f"relatorio_{grafo_seguro['graph_id']}.pdf"
-    try:
-        pdf.output(name=str(caminho), dest="F")  # Força salvamento absoluto
-        caminho_abs = str(caminho.resolve())
-        print(f"[PDF] Relatório salvo em {caminho_abs}")
-        return caminho_abs
-    except Exception as exc:
-        print(f"❌ Erro ao salvar PDF: {exc}")
-        raise
-
-
-__all__ = ["gerar_relatorio_pdf"]
+
+    _adicionar_secao_dados(pdf, dados_seguro, fonte)
+    _adicionar_entidades_relacoes(pdf, grafo_seguro, fonte)
+    _adicionar_parecer_tecnico(pdf, parecer_tecnico_seguro, fonte)
+    _adicionar_parecer_final(pdf, parecer_final_seguro, fonte)
+    _adicionar_avaliacoes_llm(pdf, avaliacoes_seguras, fonte)
+
+    caminho = caminho_relatorio(grafo_seguro["graph_id"])
+    # Grava ao lado e renomeia: quem lê a pasta nunca vê um PDF pela metade
+    temporario = caminho.with_name(f".{caminho.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    pdf.output(name=str(temporario), dest="F")
+    os.replace(temporario, caminho)
+    caminho_abs = str(caminho.resolve())
+    registrar_evento(
+        _logger, "relatorio_salvo", logging.DEBUG, caminho=caminho_abs, avaliacoes_llm=len(avaliacoes_seguras)
+    )
+    return caminho_abs
+
+
+def gerar_relatorios_pdf_em_lote(relatorios: Iterable[Dict[str, Any]]) -> List[str]:
+    """Gera vários relatórios com o mesmo modelo.
+
+    Cada item traz os argumentos de `gerar_relatorio_pdf` por nome
+    (`dados_ingestao`, `grafo`, `parecer_tecnico`, `parecer_final` e,
+    opcionalmente, `avaliacoes_llm`).
+    """
+    modelo = obter_modelo_relatorio()
+    return [gerar_relatorio_pdf(**relatorio, modelo=modelo) for relatorio in relatorios]
+
+
+__all__ = [
+    "ModeloRelatorio",
+    "obter_modelo_relatorio",
+    "caminho_relatorio",
+    "gerar_relatorio_pdf",
+    "gerar_relatorios_pdf_em_lote",
+]
@@ -0,0 +1,253 @@
+# coding: utf-8
+"""Relatórios PDF renderizados sob demanda, fora do caminho da requisição.
+
+O pipeline só registra os dados de que o relatório precisa (SQLite, por
+`graph_id`); o PDF é gerado na primeira vez em que é pedido, por um pool
+pequeno de threads, e fica em `reports/` como cache. Enquanto a renderização
+está em andamento, `solicitar` informa RENDERIZANDO para que a API responda
+202. PDFs mais antigos que LUNGHIN_RELATORIOS_RETENCAO_HORAS, ou além de
+LUNGHIN_RELATORIOS_MAX_PDFS arquivos, são apagados (os menos acessados
+primeiro) e podem ser renderizados de novo a partir dos dados registrados.
+A limpeza roda após cada renderização e, no máximo a cada
+LUNGHIN_RELATORIOS_LIMPEZA_S segundos, a partir de `solicitar` (no pool, fora
+da requisição), então também acontece quando nada novo é renderizado. Um
+PDF cujo acesso foi renovado depois da listagem da limpeza não é apagado.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agents.exportadores.relatorio_pdf import (
+    LIMITE_TEXTO_RESUMIDO,
+    PASTA_RELATORIOS,
+    caminho_relatorio,
+    gerar_relatorio_pdf,
+)
+from monitoring.logs import obter_logger
+
+CAMINHO_PADRAO = Path(
+    os.getenv("LUNGHIN_RELATORIOS_DB")
+    or Path(__file__).resolve().parents[2] / "cache" / "relatorios.sqlite3"
+)
+MAX_DADOS_PADRAO = int(os.getenv("LUNGHIN_RELATORIOS_MAX_DADOS", "100000"))
+MAX_PDFS_PADRAO = int(os.getenv("LUNGHIN_RELATORIOS_MAX_PDFS", "500"))
+RETENCAO_PADRAO = float(os.getenv("LUNGHIN_RELATORIOS_RETENCAO_HORAS", "168")) * 3600
+TRABALHADORES_PADRAO = int(os.getenv("LUNGHIN_RELATORIOS_TRABALHADORES", "1"))
+INTERVALO_LIMPEZA_PADRAO = float(os.getenv("LUNGHIN_RELATORIOS_LIMPEZA_S", "300"))
+
+PRONTO = "pronto"
+RENDERIZANDO = "renderizando"
+ERRO = "erro"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS relatorios (
+    graph_id TEXT PRIMARY KEY,
+    dados TEXT NOT NULL,
+    criado_em REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_relatorios_criacao ON relatorios (criado_em);
+"""
+
+_logger = obter_logger("relatorios")
+
+
+@dataclass(frozen=True)
+class EstadoRelatorio:
+    status: str
+    caminho: Optional[str] = None
+    erro: Optional[str] = None
+
+
+class GerenciadorRelatorios:
+    """Dados registrados por `graph_id` e cache em disco dos PDFs gerados."""
+
+    def __init__(
+        self,
+        caminho: Path | str = CAMINHO_PADRAO,
+        pasta: Path = PASTA_RELATORIOS,
+        max_dados: int = MAX_DADOS_PADRAO,
+        max_pdfs: int = MAX_PDFS_PADRAO,
+        retencao_s: float = RETENCAO_PADRAO,
+        trabalhadores: int = TRABALHADORES_PADRAO,
+        intervalo_limpeza_s: float = INTERVALO_LIMPEZA_PADRAO,
+    ) -> None:
+        self.caminho = str(caminho)
+        self.pasta = Path(pasta)
+        self.max_dados = max_dados
+        self.max_pdfs = max_pdfs
+        self.retencao_s = retencao_s
+        self.intervalo_limpeza_s = intervalo_limpeza_s
+        # A primeira solicitação já limpa o que sobrou de execuções anteriores
+        self._limpeza_em = float("-inf")
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="lunghin-relatorio")
+        self._em_andamento: Dict[str, Future] = {}
+        self._falhas: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if self.caminho != ":memory:":
+            Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(_ESQUEMA)
+
+    def registrar(
+        self,
+        dados_ingestao: Dict[str, Any],
+        grafo: Dict[str, Any],
+        parecer_tecnico: Dict[str, Any],
+        parecer_final: Dict[str, Any],
+        avaliacoes_llm: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Guarda o necessário para renderizar o relatório de `grafo["graph_id"]` depois."""
+        texto = str(dados_ingestao.get("texto") or "").strip()
+        dados = {
+            # O relatório só mostra o início do texto; um caractere a mais preserva as reticências
+            "dados_ingestao": {
+                "tipo_entrada": dados_ingestao.get("tipo_entrada"),
+                "texto": texto[: LIMITE_TEXTO_RESUMIDO + 1],
+            },
+            "grafo": {
+                "entidades": grafo.get("entidades") or [],
+                "relacoes": grafo.get("relacoes") or [],
+                "graph_id": grafo["graph_id"],
+            },
+            "parecer_tecnico": parecer_tecnico,
+            "parecer_final": parecer_final,
+            "avaliacoes_llm": avaliacoes_llm or [],
+        }
+        serializado = json.dumps(dados, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO relatorios VALUES (?, ?, ?)", (grafo["graph_id"], serializado, time.time())
+            )
+            self._remover_excedente()
+            self._conexao.commit()
+
+    def _dados(self, graph_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            linha = self._conexao.execute("SELECT dados FROM relatorios WHERE graph_id = ?", (graph_id,)).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def renderizar(self, graph_id: str) -> str:
+        """Gera o PDF agora (na thread atual) a partir dos dados registrados."""
+        dados = self._dados(graph_id)
+        if dados is None:
+            raise KeyError(f"Relatório não registrado: {graph_id}")
+        caminho = gerar_relatorio_pdf(**dados)
+        self.limpar()
+        return caminho
+
+    def solicitar(self, graph_id: str) -> Optional[EstadoRelatorio]:
+        """Estado do relatório, agendando a renderização se ainda não houver PDF.
+
+        Devolve None quando não há dados registrados para o `graph_id`.
+        """
+        self._agendar_limpeza()
+        with self._lock:
+            if graph_id in self._em_andamento:
+                return EstadoRelatorio(RENDERIZANDO)
+            erro = self._falhas.pop(graph_id, None)
+            if erro is not None:
+                # A falha é informada uma vez; a próxima solicitação tenta de novo
+                return EstadoRelatorio(ERRO, erro=erro)
+        caminho = caminho_relatorio(graph_id)
+        if caminho.exists():
+            os.utime(caminho)
+            return EstadoRelatorio(PRONTO, caminho=str(caminho))
+        if self._dados(graph_id) is None:
+            return None
+        with self._lock:
+            if graph_id not in self._em_andamento:
+                futuro = self._executor.submit(self.renderizar, graph_id)
+                self._em_andamento[graph_id] = futuro
+                futuro.add_done_callback(lambda f: self._concluir(graph_id, f))
+        return EstadoRelatorio(RENDERIZANDO)
+
+    def _concluir(self, graph_id: str, futuro: Future) -> None:
+        with self._lock:
+            self._em_andamento.pop(graph_id, None)
+            if futuro.exception() is not None:
+                self._falhas[graph_id] = str(futuro.exception())
+                _logger.warning("Falha ao renderizar relatório %s: %s", graph_id, futuro.exception())
+
+    def _agendar_limpeza(self) -> None:
+        agora = time.monotonic()
+        with self._lock:
+            if agora - self._limpeza_em < self.intervalo_limpeza_s:
+                return
+            self._limpeza_em = agora
+        self._executor.submit(self._limpar_registrando_falha)
+
+    def _limpar_registrando_falha(self) -> None:
+        try:
+            self.limpar()
+        except OSError as e:
+            _logger.warning("Falha ao limpar relatórios em %s: %s", self.pasta, e)
+
+    def limpar(self) -> int:
+        """Apaga PDFs fora da retenção ou além do limite; devolve quantos saíram."""
+        agora = time.time()
+        arquivos = []
+        for caminho in self.pasta.glob("relatorio_*.pdf"):
+            try:
+                arquivos.append((caminho.stat().st_mtime, caminho))
+            except FileNotFoundError:
+                continue
+        arquivos.sort(reverse=True)
+        removidos = 0
+        for posicao, (modificado, caminho) in enumerate(arquivos):
+            if posicao >= self.max_pdfs or agora - modificado > self.retencao_s:
+                # `solicitar` renova o mtime do PDF que vai servir; se isso
+                # aconteceu depois da listagem, o arquivo fica
+                try:
+                    if caminho.stat().st_mtime != modificado:
+                        continue
+                except FileNotFoundError:
+                    continue
+                caminho.unlink(missing_ok=True)
+                removidos += 1
+        return removidos
+
+    def _remover_excedente(self) -> None:
+        total = self._conexao.execute("SELECT COUNT(*) FROM relatorios").fetchone()[0]
+        if total > self.max_dados:
+            # Remove um lote de 10% para não pagar a limpeza a cada registro
+            excedente = total - self.max_dados + max(1, self.max_dados // 10)
+            self._conexao.execute(
+                "DELETE FROM relatorios WHERE graph_id IN "
+                "(SELECT graph_id FROM relatorios ORDER BY criado_em LIMIT ?)",
+                (excedente,),
+            )
+
+    def encerrar(self, aguardar: bool = True) -> None:
+        self._executor.shutdown(wait=aguardar, cancel_futures=not aguardar)
+
+
+_GERENCIADOR: Optional[GerenciadorRelatorios] = None
+_GERENCIADOR_LOCK = threading.Lock()
+
+
+def obter_gerenciador_relatorios() -> GerenciadorRelatorios:
+    global _GERENCIADOR
+    with _GERENCIADOR_LOCK:
+        if _GERENCIADOR is None:
+            _GERENCIADOR = GerenciadorRelatorios()
+        return _GERENCIADOR
+
+
+__all__ = [
+    "PRONTO",
+    "RENDERIZANDO",
+    "ERRO",
+    "EstadoRelatorio",
+    "GerenciadorRelatorios",
+    "obter_gerenciador_relatorios",
+]
@@ -0,0 +1,150 @@
+# coding: utf-8
+"""
+Classificação de cláusulas por palavras-chave a partir de uma tabela única.
+
+A tabela (`palavras_chave.json`, ou o arquivo em LUNGHIN_PALAVRAS_CHAVE) tem
+um perfil por consumidor ("grafo", "clausulas"); dentro de cada perfil a ordem
+dos tipos é a prioridade: vence o primeiro tipo com alguma palavra presente.
+
+Cada perfil é compilado uma vez em:
+- uma lista de verificações `in` com saída antecipada, que decide o tipo
+  quando só ele interessa. A busca de substring do CPython roda em C e é mais
+  rápida do que qualquer autômato percorrido caractere a caractere em Python;
+- uma alternação regex de todas as palavras (mais longas primeiro), que
+  localiza em uma passagem quais palavras ocorrem e onde, de todos os tipos;
+  o tipo e suas evidências saem dessa mesma passagem.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CAMINHO_PALAVRAS_CHAVE = Path(
+    os.getenv("LUNGHIN_PALAVRAS_CHAVE", Path(__file__).with_name("palavras_chave.json"))
+)
+
+
+@dataclass(frozen=True)
+class OcorrenciaPalavra:
+    palavra: str
+    tipo: str
+    inicio: int
+    fim: int
+
+
+class ClassificadorPalavras:
+    """Classificador compilado de um perfil da tabela de palavras-chave.
+
+    Os textos recebidos já devem estar em minúsculas (ex.: `Clausula.minusculo`).
+    """
+
+    def __init__(self, tabela: Dict[str, Sequence[str]]) -> None:
+        self.prioridade: Tuple[str, ...] = tuple(tabela)
+        self._ordem = {tipo: i for i, tipo in enumerate(self.prioridade)}
+        self._verificacoes = tuple(
+            (tipo, tuple(p.lower() for p in palavras)) for tipo, palavras in tabela.items()
+        )
+        self._tipos: Dict[str, List[str]] = {}
+        for tipo, palavras in self._verificacoes:
+            for palavra in palavras:
+                self._tipos.setdefault(palavra, []).append(tipo)
+
+        palavras = sorted(self._tipos, key=len, reverse=True)
+        self._regex = re.compile("|".join(map(re.escape, palavras))) if palavras else None
+        # A alternação devolve só a palavra mais longa em cada posição; as que
+        # são prefixo dela e começam no mesmo ponto são acrescentadas à parte
+        self._prefixos = {p: [q for q in palavras if q != p and p.startswith(q)] for p in palavras}
+
+    def classificar(self, texto: str) -> Optional[str]:
+        """Tipo de maior prioridade com alguma palavra no texto (None se nenhum)."""
+        for tipo, palavras in self._verificacoes:
+            for palavra in palavras:
+                if palavra in texto:
+                    return tipo
+        return None
+
+    def localizar(self, texto: str) -> List[OcorrenciaPalavra]:
+        """Todas as ocorrências de palavras-chave, de todos os tipos, inclusive sobrepostas."""
+        ocorrencias: List[OcorrenciaPalavra] = []
+        if self._regex is None:
+            return ocorrencias
+        posicao = 0
+        while True:
+            m = self._regex.search(texto, posicao)
+            if m is None:
+                return ocorrencias
+            inicio = m.start()
+            for palavra in (m.group(), *self._prefixos[m.group()]):
+                for tipo in self._tipos[palavra]:
+                    ocorrencias.append(OcorrenciaPalavra(palavra, tipo, inicio, inicio + len(palavra)))
+            posicao = inicio + 1
+
+    def classificar_com_evidencias(self, texto: str) -> Tuple[Optional[str], List[OcorrenciaPalavra]]:
+        """Tipo e as ocorrências das palavras que o justificam, em uma passagem pelo texto."""
+        ocorrencias = self.localizar(texto)
+        if not ocorrencias:
+            return None, []
+        tipo = min((o.tipo for o in ocorrencias), key=self._ordem.__getitem__)
+        return tipo, [o for o in ocorrencias if o.tipo == tipo]
+
+
+_lock = threading.Lock()
+_tabela: Optional[Dict[str, Dict[str, List[str]]]] = None
+_classificadores: Dict[str, ClassificadorPalavras] = {}
+
+
+def carregar_tabela(caminho: Path = CAMINHO_PALAVRAS_CHAVE) -> Dict[str, Dict[str, List[str]]]:
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _tabela_carregada() -> Dict[str, Dict[str, List[str]]]:
+    # Chamada com `_lock` adquirido
+    global _tabela
+    if _tabela is None:
+        _tabela = carregar_tabela()
+    return _tabela
+
+
+def tabela_palavras_chave() -> Dict[str, Dict[str, List[str]]]:
+    with _lock:
+        return _tabela_carregada()
+
+
+def obter_classificador(perfil: str) -> ClassificadorPalavras:
+    """Classificador compilado do perfil (construído na primeira chamada)."""
+    # Consulta, leitura da tabela e construção sob o mesmo lock: um
+    # `recarregar_palavras_chave` concorrente não deixa em cache um
+    # classificador montado com a tabela antiga
+    with _lock:
+        classificador = _classificadores.get(perfil)
+        if classificador is None:
+            tabela = _tabela_carregada()
+            if perfil not in tabela:
+                raise KeyError(f"Perfil de palavras-chave desconhecido: {perfil}")
+            classificador = _classificadores[perfil] = ClassificadorPalavras(tabela[perfil])
+        return classificador
+
+
+def recarregar_palavras_chave() -> None:
+    """Descarta a tabela e os classificadores compilados (relê o arquivo no próximo uso)."""
+    global _tabela
+    with _lock:
+        _tabela = None
+        _classificadores.clear()
+
+
+__all__ = [
+    "OcorrenciaPalavra",
+    "ClassificadorPalavras",
+    "carregar_tabela",
+    "tabela_palavras_chave",
+    "obter_classificador",
+    "recarregar_palavras_chave",
+]
@@ -6,82 +6,86 @@ Foco em contratos de prestação de serviços empresariais.
 
 import re
 import uuid
-from typing import Any, Dict, List
-import spacy
+from typing import Any, Dict, List, Optional
+from spacy.tokens import Doc
 
-_GRAPHS: Dict[str, Dict[str, Any]] = {}
+from agents.extratores.classificador_palavras import obter_classificador, tabela_palavras_chave
+from agents.extratores.modelos_nlp import obter_modelo
+from agents.extratores.repositorio_grafos import obter_repositorio_grafos
+from agents.extratores.segmentador_clausulas import Clausula, IndiceClausulas, indexar_clausulas
+from agents.extratores.varredor_padroes import entidades_regex
 
-MAPEAMENTO_TIPOS = {
-    "OBJETO": ["objeto", "escopo", "atividade"],
-    "PRAZO": ["prazo", "vigência", "período"],
-    "MULTA": ["multa", "penalidade", "sanção"],
-    "FORO": ["foro", "jurisdição", "competência"],
-    "RESCISAO": ["rescisão", "rompimento"],
-    "LGPD": ["lgpd", "proteção de dados", "lei 13.709"],
-}
+def mapeamento_tipos() -> Dict[str, List[str]]:
+    """Tipos e palavras-chave do grafo, em ordem de prioridade (perfil "grafo").
 
+    Lido a cada chamada, para refletir `recarregar_palavras_chave`.
+    """
+    return tabela_palavras_chave()["grafo"]
 
-def segmentar_clausulas(texto: str) -> List[Dict[str, str]]:
-    padrao = re.compile(r'(CL[ÁA]USULA.*?)(?=CL[ÁA]USULA|DO\s|DA\s|\Z)', re.IGNORECASE | re.DOTALL)
-    matches = padrao.findall(texto)
 
-    secoes = []
-    for trecho in matches:
-        trecho_limpo = trecho.strip()
-        titulo = trecho_limpo.split("\n")[0][:100]
-        label_detectado = "OUTRA"
-        for label, palavras in MAPEAMENTO_TIPOS.items():
-            if any(p in trecho_limpo.lower() for p in palavras):
-                label_detectado = label
-                break
-        secoes.append({
-            "titulo": titulo,
-            "texto": trecho_limpo,
-            "label": label_detectado
-        })
+def _rotular(clausula: Clausula) -> str:
+    return obter_classificador("grafo").classificar(clausula.minusculo) or "OUTRA"
 
-    return secoes
 
+def segmentar_clausulas(texto: str, indice: Optional[IndiceClausulas] = None) -> List[Dict[str, Any]]:
+    if indice is None:
+        indice = indexar_clausulas(texto)
+    return [
+        {
+            "titulo": c.titulo[:100],
+            "texto": c.texto,
+            "label": _rotular(c),
+            "inicio": c.inicio,
+            "fim": c.fim,
+        }
+        for c in indice
+    ]
 
 
-def extrair_entidades(texto: str) -> List[Dict[str, str]]:
-    nlp = spacy.load("pt_core_news_sm")
-    doc = nlp(texto)
-    entidades: List[Dict[str, str]] = []
+def _limpar(txt: str) -> str:
+    return re.sub(r'\s+', ' ', txt.strip()).upper()
 
-    def limpar(txt):
-        return re.sub(r'\s+', ' ', txt.strip()).upper()
 
-    # NER básico
+def entidades_ner(doc: Doc) -> List[Dict[str, Any]]:
+    """EMPRESA/PESSOA reconhecidas pelo spaCy."""
+    entidades: List[Dict[str, Any]] = []
     for ent in doc.ents:
-        texto_ent = limpar(ent.text)
+        texto_ent = _limpar(ent.text)
         if len(texto_ent) <= 2:
             continue
         if ent.label_ == "ORG":
             entidades.append({"texto": texto_ent, "label": "EMPRESA"})
         elif ent.label_ == "PERSON":
             entidades.append({"texto": texto_ent, "label": "PESSOA"})
+    return entidades
+
+
+def entidades_padrao(texto: str) -> List[Dict[str, Any]]:
+    """CNPJ, DATA, VALOR e PRAZO, em uma única varredura."""
+    return [{"texto": _limpar(o.texto), "label": o.tipo} for o in entidades_regex(texto)]
+
+
+def entidade_da_clausula(clausula: Clausula) -> Optional[Dict[str, Any]]:
+    """Entidade da cláusula rotulada; início/fim permitem recuperar o texto integral no índice."""
+    label = _rotular(clausula)
+    if label == "OUTRA":
+        return None
+    return {"texto": clausula.texto[:300], "label": label, "inicio": clausula.inicio, "fim": clausula.fim}
 
-    # Regex padrão
-    padroes_regex = {
-        "CNPJ": re.compile(r"\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b"),
-        "DATA": re.compile(r"\b\d{1,2}/\d{1,2}/\d{4}\b"),
-        "VALOR": re.compile(r"R\$\s?\d+(?:\.\d{3})*(?:,\d{2})?"),
-        "PRAZO": re.compile(r"\b\d+\s*(DIAS|MESES|ANOS)\b", re.I),
-    }
-    for label, padrao in padroes_regex.items():
-        for m in padrao.findall(texto):
-            entidades.append({"texto": limpar(m), "label": label})
-
-    # Cláusulas segmentadas
-    secoes = segmentar_clausulas(texto)
-    for s in secoes:
-        if s["label"] != "OUTRA":
-            entidades.append({"texto": s["texto"][:300], "label": s["label"]})
 
+def _entidades_do_doc(doc: Doc, texto: str, indice: Optional[IndiceClausulas] = None) -> List[Dict[str, Any]]:
+    if indice is None:
+        indice = indexar_clausulas(texto)
+    entidades = entidades_ner(doc) + entidades_padrao(texto)
+    entidades.extend(e for e in map(entidade_da_clausula, indice) if e is not None)
     return entidades
 
 
+def extrair_entidades(texto: str, indice: Optional[IndiceClausulas] = None) -> List[Dict[str, Any]]:
+    doc = obter_modelo()(texto)
+    return _entidades_do_doc(doc, texto, indice)
+
+
 def gerar_relacoes(entidades: List[Dict[str, str]], texto: str) -> List[Dict[str, str]]:
     relacoes = []
     contratante = next((e["texto"] for e in entidades if e["label"] == "CONTRATANTE"), None)
@@ -100,15 +104,31 @@ def gerar_relacoes(entidades: List[Dict[str, str]], texto: str) -> List[Dict[str
 
 def criar_grafo(entidades: List[Dict[str, str]], relacoes: List[Dict[str, str]]) -> str:
     graph_id = str(uuid.uuid4())
-    _GRAPHS[graph_id] = {"entidades": entidades, "relacoes": relacoes}
+    obter_repositorio_grafos().salvar(graph_id, {"entidades": entidades, "relacoes": relacoes})
     return graph_id
 
 
-def construir_grafo(texto: str) -> Dict[str, Any]:
-    entidades = extrair_entidades(texto)
+def obter_grafo(graph_id: str) -> Optional[Dict[str, Any]]:
+    """Grafo salvo por `criar_grafo` (em memória ou no SQLite), ou None."""
+    return obter_repositorio_grafos().obter(graph_id)
+
+
+def construir_grafo(texto: str, indice: Optional[IndiceClausulas] = None) -> Dict[str, Any]:
+    entidades = extrair_entidades(texto, indice)
     relacoes = gerar_relacoes(entidades, texto)
     graph_id = criar_grafo(entidades, relacoes)
     return {"entidades": entidades, "relacoes": relacoes, "graph_id": graph_id}
 
 
-__all__ = ["segmentar_clausulas", "extrair_entidades", "gerar_relacoes", "criar_grafo", "construir_grafo"]
+__all__ = [
+    "mapeamento_tipos",
+    "segmentar_clausulas",
+    "entidades_ner",
+    "entidades_padrao",
+    "entidade_da_clausula",
+    "extrair_entidades",
+    "gerar_relacoes",
+    "criar_grafo",
+    "obter_grafo",
+    "construir_grafo",
+]
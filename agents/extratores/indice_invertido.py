@@ -0,0 +1,237 @@
+# coding: utf-8
+"""Índice invertido entre contratos: entidades e tipos de cláusula.
+
+Responde perguntas como "quais contratos citam o CNPJ X" ou "quais contratos
+não têm cláusula de FORO" sem reler as saídas de cada contrato. As listas de
+postagens ficam em tabelas SQLite WITHOUT ROWID ordenadas pela chave de busca
+(rótulo + valor normalizado, tipo + situação) e referenciam o contrato por um
+inteiro, o que mantém o arquivo compacto e a consulta em uma busca na árvore B.
+
+A ausência de cláusulas é gravada explicitamente para todos os tipos
+conhecidos (tabela de palavras-chave), então "sem FORO" também é uma busca
+direta e não uma varredura de todos os contratos. Cada contrato guarda a lista
+de tipos vigente quando foi indexado: um contrato indexado antes de um tipo
+existir não tem postagem (nem "presente" nem "ausente") para ele e fica
+fora das buscas por esse tipo até ser reprocessado (`indexar` de novo, por
+exemplo com `processar_lote --reprocessar`); `desatualizados` conta esses
+contratos.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from agents.extratores.classificador_palavras import tabela_palavras_chave
+
+CAMINHO_PADRAO = Path(
+    os.getenv("LUNGHIN_INDICE_CONTRATOS_DB")
+    or Path(__file__).resolve().parents[2] / "cache" / "indice_contratos.sqlite3"
+)
+LIMITE_PADRAO = 100
+# 2: coluna `tipos` em contratos (migrada, não descartada: o índice não é um cache)
+VERSAO_ESQUEMA = 2
+PRESENTE = "presente"
+AUSENTE = "ausente"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS contratos (
+    id INTEGER PRIMARY KEY,
+    chave TEXT NOT NULL UNIQUE,
+    nome TEXT,
+    graph_id TEXT,
+    tipos TEXT,
+    indexado_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entidades (
+    label TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    contrato INTEGER NOT NULL,
+    PRIMARY KEY (label, valor, contrato)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entidades_contrato ON entidades (contrato);
+CREATE TABLE IF NOT EXISTS clausulas (
+    tipo TEXT NOT NULL,
+    situacao TEXT NOT NULL,
+    contrato INTEGER NOT NULL,
+    PRIMARY KEY (tipo, situacao, contrato)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_clausulas_contrato ON clausulas (contrato);
+"""
+
+
+def normalizar_valor(label: str, texto: str) -> str:
+    """Forma canônica usada na indexação e na consulta."""
+    if label == "CNPJ":
+        return re.sub(r"\D", "", texto)
+    sem_acentos = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acentos.upper().split())
+
+
+def chave_contrato(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def tipos_conhecidos() -> Tuple[str, ...]:
+    return tuple(sorted({tipo for perfil in tabela_palavras_chave().values() for tipo in perfil}))
+
+
+def _assinatura_tipos(tipos: Iterable[str]) -> str:
+    return ",".join(sorted(tipos))
+
+
+class IndiceInvertido:
+    def __init__(self, caminho: Path | str = CAMINHO_PADRAO) -> None:
+        self.caminho = str(caminho)
+        self._lock = threading.Lock()
+        if self.caminho != ":memory:":
+            Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(_ESQUEMA)
+        if self._conexao.execute("PRAGMA user_version").fetchone()[0] < VERSAO_ESQUEMA:
+            colunas = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(contratos)")}
+            with self._conexao:
+                if "tipos" not in colunas:
+                    # Contratos antigos ficam com tipos NULL, isto é, desatualizados
+                    self._conexao.execute("ALTER TABLE contratos ADD COLUMN tipos TEXT")
+                self._conexao.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+
+    def indexar(
+        self,
+        chave: str,
+        entidades: Iterable[Dict[str, Any]],
+        tipos_presentes: Iterable[str],
+        nome: Optional[str] = None,
+        graph_id: Optional[str] = None,
+    ) -> int:
+        """Indexa (ou reindexa) um contrato, substituindo suas postagens anteriores."""
+        postagens = {
+            (e["label"], normalizar_valor(e["label"], e["texto"]))
+            for e in entidades
+            # Entidades de cláusula carregam o trecho da cláusula, não um valor buscável
+            if "inicio" not in e and e.get("texto")
+        }
+        presentes = set(tipos_presentes)
+        conhecidos = tipos_conhecidos()
+        ausentes = set(conhecidos) - presentes
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT INTO contratos (chave, nome, graph_id, tipos, indexado_em) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (chave) DO UPDATE SET nome = excluded.nome, graph_id = excluded.graph_id, "
+                "tipos = excluded.tipos, indexado_em = excluded.indexado_em",
+                (chave, nome, graph_id, _assinatura_tipos(conhecidos), time.time()),
+            )
+            contrato = self._conexao.execute("SELECT id FROM contratos WHERE chave = ?", (chave,)).fetchone()[0]
+            self._conexao.execute("DELETE FROM entidades WHERE contrato = ?", (contrato,))
+            self._conexao.execute("DELETE FROM clausulas WHERE contrato = ?", (contrato,))
+            self._conexao.executemany(
+                "INSERT INTO entidades VALUES (?, ?, ?)", ((l, v, contrato) for l, v in postagens if v)
+            )
+            self._conexao.executemany(
+                "INSERT INTO clausulas VALUES (?, ?, ?)",
+                [(t, PRESENTE, contrato) for t in presentes] + [(t, AUSENTE, contrato) for t in ausentes],
+            )
+        return contrato
+
+    def buscar(
+        self,
+        entidades: Sequence[Tuple[str, str]] = (),
+        com_clausulas: Sequence[str] = (),
+        sem_clausulas: Sequence[str] = (),
+        limite: int = LIMITE_PADRAO,
+    ) -> List[Dict[str, Any]]:
+        """Contratos que atendem a todos os critérios (interseção das postagens).
+
+        A primeira lista de postagens (entidades antes de cláusulas, por serem
+        mais seletivas) conduz a varredura em ordem de contrato; os demais
+        critérios são testados por busca na chave primária, e o LIMIT
+        interrompe a varredura assim que há resultados suficientes.
+        """
+        criterios: List[Tuple[str, Tuple[str, str]]] = [
+            ("entidades", (label, normalizar_valor(label, valor))) for label, valor in entidades
+        ]
+        criterios += [("clausulas", (tipo, PRESENTE)) for tipo in com_clausulas]
+        criterios += [("clausulas", (tipo, AUSENTE)) for tipo in sem_clausulas]
+        if not criterios:
+            raise ValueError("Informe ao menos um critério de busca")
+        colunas = {"entidades": ("label", "valor"), "clausulas": ("tipo", "situacao")}
+
+        (tabela, chave), demais = criterios[0], criterios[1:]
+        a, b = colunas[tabela]
+        sql = (
+            f"SELECT c.chave, c.nome, c.graph_id, c.indexado_em FROM {tabela} p "
+            f"JOIN contratos c ON c.id = p.contrato WHERE p.{a} = ? AND p.{b} = ?"
+        )
+        parametros: List[Any] = list(chave)
+        for tabela, chave in demais:
+            a, b = colunas[tabela]
+            sql += f" AND EXISTS (SELECT 1 FROM {tabela} WHERE {a} = ? AND {b} = ? AND contrato = p.contrato)"
+            parametros += chave
+        sql += " ORDER BY p.contrato LIMIT ?"
+        with self._lock:
+            linhas = self._conexao.execute(sql, (*parametros, limite)).fetchall()
+        return [
+            {"contrato": chave, "nome": nome, "graph_id": graph_id, "indexado_em": indexado_em}
+            for chave, nome, graph_id, indexado_em in linhas
+        ]
+
+    def desatualizados(self) -> int:
+        """Contratos indexados com outra tabela de tipos (ver docstring do módulo)."""
+        with self._lock:
+            return self._conexao.execute(
+                "SELECT COUNT(*) FROM contratos WHERE tipos IS NOT ?", (_assinatura_tipos(tipos_conhecidos()),)
+            ).fetchone()[0]
+
+    def estatisticas(self) -> Dict[str, int]:
+        desatualizados = self.desatualizados()
+        with self._lock:
+            contar = lambda tabela: self._conexao.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+            return {
+                "contratos": contar("contratos"),
+                "desatualizados": desatualizados,
+                "postagens_entidades": contar("entidades"),
+                "postagens_clausulas": contar("clausulas"),
+            }
+
+
+_INDICE: Optional[IndiceInvertido] = None
+_INDICE_LOCK = threading.Lock()
+
+
+def obter_indice_invertido() -> IndiceInvertido:
+    global _INDICE
+    with _INDICE_LOCK:
+        if _INDICE is None:
+            _INDICE = IndiceInvertido()
+        return _INDICE
+
+
+def indexar_resultado(resultado: Dict[str, Any], nome: Optional[str] = None) -> int:
+    """Indexa o resultado de `run_pipeline` (entidades do grafo + cláusulas do revisor)."""
+    parecer = resultado.get("parecer_tecnico") or {}
+    tipos = set(parecer.get("clausulas_detectadas") or [])
+    tipos.update(e["label"] for e in resultado.get("entidades", []) if "inicio" in e)
+    return obter_indice_invertido().indexar(
+        chave_contrato(resultado.get("texto") or resultado["graph_id"]),
+        resultado.get("entidades", []),
+        tipos,
+        nome=nome,
+        graph_id=resultado.get("graph_id"),
+    )
+
+
+__all__ = [
+    "IndiceInvertido",
+    "normalizar_valor",
+    "chave_contrato",
+    "obter_indice_invertido",
+    "indexar_resultado",
+]
@@ -0,0 +1,94 @@
+# coding: utf-8
+"""Registro de modelos spaCy compartilhado pelo processo.
+
+Cada modelo é carregado uma única vez por processo e reaproveitado por todas
+as chamadas de extração. Os componentes que a extração de entidades não usa
+(parser, lematizador, morfologia...) são desativados no carregamento.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List
+
+import spacy
+from spacy.language import Language
+from spacy.tokens import Doc
+
+MODELO_PADRAO = os.getenv("LUNGHIN_SPACY_MODELO", "pt_core_news_sm")
+
+# Componentes dispensáveis para NER nos modelos pt_core_news_*
+COMPONENTES_DESATIVADOS = (
+    "parser",
+    "lemmatizer",
+    "morphologizer",
+    "attribute_ruler",
+    "tagger",
+    "senter",
+)
+
+_MODELOS: Dict[str, Language] = {}
+_LOCK = threading.Lock()
+
+
+def _desativar_tok2vec_sem_ouvintes(nlp: Language) -> None:
+    """Desativa o tok2vec compartilhado quando nenhum componente ativo o escuta."""
+    if "tok2vec" not in nlp.pipe_names:
+        return
+    ouvintes = getattr(nlp.get_pipe("tok2vec"), "listening_components", [])
+    if not any(nome in nlp.pipe_names for nome in ouvintes):
+        nlp.disable_pipe("tok2vec")
+
+
+def obter_modelo(nome: str = MODELO_PADRAO) -> Language:
+    """Retorna o modelo spaCy `nome`, carregando-o na primeira chamada."""
+    nlp = _MODELOS.get(nome)
+    if nlp is not None:
+        return nlp
+
+    with _LOCK:
+        nlp = _MODELOS.get(nome)
+        if nlp is None:
+            nlp = spacy.load(nome, disable=list(COMPONENTES_DESATIVADOS))
+            _desativar_tok2vec_sem_ouvintes(nlp)
+            _MODELOS[nome] = nlp
+    return nlp
+
+
+def aquecer_modelos(nomes: Iterable[str] = (MODELO_PADRAO,)) -> None:
+    """Carrega os modelos e executa uma inferência curta para aquecer o pipeline."""
+    for nome in nomes:
+        nlp = obter_modelo(nome)
+        nlp("Contrato de prestação de serviços firmado em São Paulo.")
+
+
+def processar_textos(
+    textos: Iterable[str],
+    nome: str = MODELO_PADRAO,
+    batch_size: int = 8,
+    n_process: int = 1,
+) -> Iterator[Doc]:
+    """Processa vários textos com um único modelo carregado via `nlp.pipe`.
+
+    Usado pela reanálise, que envia de uma vez os trechos novos de um
+    contrato. O processamento de arquivos em lote (`scripts/processar_lote.py`)
+    não agrupa contratos em um mesmo `nlp.pipe`. Cada trabalhador mantém o
+    modelo aquecido e roda um contrato por vez, para que a falha ou o timeout
+    de um documento não derrube os outros.
+    """
+    nlp = obter_modelo(nome)
+    return nlp.pipe(textos, batch_size=batch_size, n_process=n_process)
+
+
+def modelos_carregados() -> List[str]:
+    return list(_MODELOS)
+
+
+__all__ = [
+    "MODELO_PADRAO",
+    "obter_modelo",
+    "aquecer_modelos",
+    "processar_textos",
+    "modelos_carregados",
+]
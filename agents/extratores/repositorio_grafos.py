@@ -0,0 +1,173 @@
+# coding: utf-8
+"""Armazenamento dos grafos jurídicos em dois níveis: memória (LRU) e SQLite.
+
+Todo grafo criado é gravado no SQLite, visível para os demais processos e
+preservado entre reinícios, e fica também em um LRU em memória limitado a
+LUNGHIN_GRAFOS_MEMORIA entradas. No disco valem LUNGHIN_GRAFOS_MAX_DISCO
+entradas; acima disso os grafos acessados há mais tempo são removidos.
+Acertos na memória também contam como acesso no disco: são acumulados e
+gravados em lote a cada LUNGHIN_GRAFOS_INTERVALO_ACESSO_S segundos e antes de
+cada remoção de excedente. Quem lê ou grava um grafo recebe (ou entrega) uma
+cópia, nunca o dicionário mantido na memória.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CAMINHO_PADRAO = Path(
+    os.getenv("LUNGHIN_GRAFOS_DB")
+    or Path(__file__).resolve().parents[2] / "cache" / "grafos.sqlite3"
+)
+MAX_MEMORIA_PADRAO = int(os.getenv("LUNGHIN_GRAFOS_MEMORIA", "256"))
+MAX_DISCO_PADRAO = int(os.getenv("LUNGHIN_GRAFOS_MAX_DISCO", "100000"))
+INTERVALO_ACESSO_PADRAO = float(os.getenv("LUNGHIN_GRAFOS_INTERVALO_ACESSO_S", "30"))
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS grafos (
+    graph_id TEXT PRIMARY KEY,
+    dados TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    ultimo_acesso REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_grafos_acesso ON grafos (ultimo_acesso);
+"""
+
+
+class RepositorioGrafos:
+    """Grafos por `graph_id` com LRU em memória e persistência em SQLite."""
+
+    def __init__(
+        self,
+        caminho: Path | str = CAMINHO_PADRAO,
+        max_memoria: int = MAX_MEMORIA_PADRAO,
+        max_disco: int = MAX_DISCO_PADRAO,
+        intervalo_acesso_s: float = INTERVALO_ACESSO_PADRAO,
+    ) -> None:
+        self.caminho = str(caminho)
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self.intervalo_acesso_s = intervalo_acesso_s
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self._memoria: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Acertos na memória ainda não gravados em `ultimo_acesso`
+        self._acessos_pendentes: Dict[str, float] = {}
+        self._acessos_gravados_em = time.monotonic()
+        self._lock = threading.Lock()
+        if self.caminho != ":memory:":
+            Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(_ESQUEMA)
+
+    def _lembrar(self, graph_id: str, grafo: Dict[str, Any]) -> None:
+        self._memoria[graph_id] = grafo
+        self._memoria.move_to_end(graph_id)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def salvar(self, graph_id: str, grafo: Dict[str, Any]) -> None:
+        agora = time.time()
+        dados = json.dumps(grafo, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._lembrar(graph_id, copy.deepcopy(grafo))
+            self._acessos_pendentes.pop(graph_id, None)
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO grafos VALUES (?, ?, ?, ?)", (graph_id, dados, agora, agora)
+            )
+            self._remover_excedente()
+            self._conexao.commit()
+
+    def obter(self, graph_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            grafo = self._memoria.get(graph_id)
+            if grafo is not None:
+                self._memoria.move_to_end(graph_id)
+                self.acertos_memoria += 1
+                self._acessos_pendentes[graph_id] = time.time()
+                if time.monotonic() - self._acessos_gravados_em >= self.intervalo_acesso_s:
+                    self._gravar_acessos()
+                    self._conexao.commit()
+                return copy.deepcopy(grafo)
+            linha = self._conexao.execute(
+                "SELECT dados FROM grafos WHERE graph_id = ?", (graph_id,)
+            ).fetchone()
+            if linha is None:
+                self.falhas += 1
+                return None
+            self._conexao.execute(
+                "UPDATE grafos SET ultimo_acesso = ? WHERE graph_id = ?", (time.time(), graph_id)
+            )
+            self._conexao.commit()
+            grafo = json.loads(linha[0])
+            self._lembrar(graph_id, grafo)
+            self.acertos_disco += 1
+            return copy.deepcopy(grafo)
+
+    def remover(self, graph_id: str) -> None:
+        with self._lock:
+            self._memoria.pop(graph_id, None)
+            self._acessos_pendentes.pop(graph_id, None)
+            self._conexao.execute("DELETE FROM grafos WHERE graph_id = ?", (graph_id,))
+            self._conexao.commit()
+
+    def _gravar_acessos(self) -> None:
+        self._conexao.executemany(
+            "UPDATE grafos SET ultimo_acesso = ? WHERE graph_id = ?",
+            ((acesso, graph_id) for graph_id, acesso in self._acessos_pendentes.items()),
+        )
+        self._acessos_pendentes.clear()
+        self._acessos_gravados_em = time.monotonic()
+
+    def _remover_excedente(self) -> None:
+        total = self._conexao.execute("SELECT COUNT(*) FROM grafos").fetchone()[0]
+        if total > self.max_disco:
+            # Remove um lote de 10% para não pagar a limpeza a cada inserção
+            excedente = total - self.max_disco + max(1, self.max_disco // 10)
+            self._gravar_acessos()
+            removidos = [
+                linha[0]
+                for linha in self._conexao.execute(
+                    "SELECT graph_id FROM grafos ORDER BY ultimo_acesso LIMIT ?", (excedente,)
+                )
+            ]
+            self._conexao.executemany("DELETE FROM grafos WHERE graph_id = ?", ((g,) for g in removidos))
+            for graph_id in removidos:
+                self._memoria.pop(graph_id, None)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.acertos_memoria + self.acertos_disco + self.falhas
+            return {
+                "acertos_memoria": self.acertos_memoria,
+                "acertos_disco": self.acertos_disco,
+                "falhas": self.falhas,
+                "taxa_acerto": (self.acertos_memoria + self.acertos_disco) / consultas if consultas else 0.0,
+                "em_memoria": len(self._memoria),
+                "em_disco": self._conexao.execute("SELECT COUNT(*) FROM grafos").fetchone()[0],
+            }
+
+
+_REPOSITORIO: Optional[RepositorioGrafos] = None
+_REPOSITORIO_LOCK = threading.Lock()
+
+
+def obter_repositorio_grafos() -> RepositorioGrafos:
+    global _REPOSITORIO
+    with _REPOSITORIO_LOCK:
+        if _REPOSITORIO is None:
+            _REPOSITORIO = RepositorioGrafos()
+        return _REPOSITORIO
+
+
+__all__ = ["RepositorioGrafos", "obter_repositorio_grafos"]
@@ -0,0 +1,94 @@
+# coding: utf-8
+"""
+Segmentação de cláusulas compartilhada por todos os agentes.
+
+O texto é varrido uma única vez atrás de cabeçalhos "CLÁUSULA ..." e o
+resultado é um índice com as posições de cada cláusula no texto original, o
+título, o corpo e uma visão normalizada (espaços colapsados, minúsculas) para
+busca de palavras-chave. Grafo, revisor, detector de campos em branco e
+avaliador LLM consomem o mesmo índice em vez de segmentar de novo.
+
+Um cabeçalho é "cláusula" (qualquer caixa) no início de uma linha ou
+"CLÁUSULA" em maiúsculas em qualquer posição (texto de PDF sem quebras de
+linha). Referências no corpo como "conforme a cláusula 5ª" não abrem uma
+nova cláusula.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+_CABECALHO = re.compile(r"^[ \t]*(?i:cl[áa]usula)\b|CL[ÁA]USULA\b", re.MULTILINE)
+MAX_TITULO = 150
+
+
+@dataclass(frozen=True)
+class Clausula:
+    posicao: int
+    titulo: str
+    corpo: str
+    inicio: int         # posição do cabeçalho no texto original
+    inicio_corpo: int
+    fim: int
+    minusculo: str      # título + corpo com espaços colapsados, em minúsculas
+
+    @property
+    def texto(self) -> str:
+        return f"{self.titulo}\n{self.corpo}" if self.corpo else self.titulo
+
+
+@dataclass(frozen=True)
+class IndiceClausulas:
+    texto: str
+    clausulas: Tuple[Clausula, ...]
+    _inicios: Tuple[int, ...] = field(default=(), repr=False, compare=False)
+
+    def __iter__(self) -> Iterator[Clausula]:
+        return iter(self.clausulas)
+
+    def __len__(self) -> int:
+        return len(self.clausulas)
+
+    def clausula_em(self, posicao: int) -> Optional[Clausula]:
+        """Cláusula que contém a posição `posicao` do texto (None no preâmbulo)."""
+        indice = bisect.bisect_right(self._inicios, posicao) - 1
+        if indice < 0 or posicao >= self.clausulas[indice].fim:
+            return None
+        return self.clausulas[indice]
+
+    def trecho(self, clausula: Clausula, limite: Optional[int] = None) -> str:
+        """Texto original (não normalizado) da cláusula, opcionalmente truncado."""
+        fim = clausula.fim if limite is None else min(clausula.fim, clausula.inicio + limite)
+        return self.texto[clausula.inicio:fim].strip()
+
+
+def _normalizar(trecho: str) -> str:
+    return " ".join(trecho.split()).lower()
+
+
+def indexar_clausulas(texto: str) -> IndiceClausulas:
+    """Segmenta `texto` em cláusulas em tempo linear."""
+    inicios = [m.start() + len(m.group()) - len(m.group().lstrip()) for m in _CABECALHO.finditer(texto)]
+    clausulas: List[Clausula] = []
+    for posicao, inicio in enumerate(inicios):
+        fim = inicios[posicao + 1] if posicao + 1 < len(inicios) else len(texto)
+        quebra = texto.find("\n", inicio, fim)
+        fim_titulo = min(quebra if quebra != -1 else fim, inicio + MAX_TITULO)
+        titulo = texto[inicio:fim_titulo].strip()
+        corpo = texto[fim_titulo:fim].strip()
+        clausulas.append(Clausula(
+            posicao=posicao,
+            titulo=titulo,
+            corpo=corpo,
+            inicio=inicio,
+            inicio_corpo=fim_titulo,
+            fim=fim,
+            minusculo=_normalizar(f"{titulo} {corpo}"),
+        ))
+    return IndiceClausulas(texto, tuple(clausulas), tuple(inicios))
+
+
+__all__ = ["Clausula", "IndiceClausulas", "indexar_clausulas"]
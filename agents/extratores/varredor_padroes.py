@@ -0,0 +1,114 @@
+# coding: utf-8
+"""
+Varredura única de padrões textuais do contrato.
+
+Campos em branco (tracinhos, placeholders, checkboxes, comentários internos,
+rótulos sem valor) e entidades por regex (CNPJ, data, valor, prazo) são
+encontrados em uma só passagem pelo texto com uma expressão pré-compilada.
+
+Toda alternativa começa por um caractere "gatilho" raro (``_ X ( [ R F :``
+ou dígito). A expressão começa com essa classe de caracteres, o que permite
+ao motor `re` saltar direto entre gatilhos em C em vez de testar todas as
+alternativas em cada posição; o custo é linear no tamanho do texto.
+
+O trecho entre "FORO" e os tracinhos é curto e não guloso: uma alternativa
+que avançasse até o fim da linha engoliria as entidades que vêm depois dela,
+já que as ocorrências não se sobrepõem.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+TIPOS_CAMPO_EM_BRANCO = frozenset({
+    "TRACEJADO",        # ____
+    "PLACEHOLDER",      # XXX
+    "CHECKBOX",         # ( X )
+    "COMENTARIO",       # [MNg2]
+    "CAMPO_ROTULADO",   # NOME: ____
+    "FORO_EM_BRANCO",   # FORO da comarca de ____
+    "VALOR_EM_BRANCO",  # R$ ____
+})
+
+TIPOS_ENTIDADE = ("CNPJ", "DATA", "VALOR", "PRAZO")
+
+# O gatilho é consumido pela classe inicial; cada alternativa confirma qual
+# gatilho foi visto com um lookbehind e casa o restante em um grupo nomeado.
+_PADRAO = re.compile(
+    r"""
+    [\[(_XRF:：\d]
+    (?:
+        (?<=\[)     (?P<COMENTARIO>MNg\d+\])
+      | (?<=\()     (?P<CHECKBOX>\ ?[Xx]\ ?\))
+      | (?<=_)      (?P<TRACEJADO>__+)
+      | (?<=X)      (?P<PLACEHOLDER>XX+)
+      | (?<=R)      (?: (?P<VALOR_EM_BRANCO>\$\ ?_+)
+                      | (?P<VALOR>\$\s?\d+(?:\.\d{3})*(?:,\d{2})?) )
+      | (?<=F)(?<!\wF) (?P<FORO_EM_BRANCO>ORO\b[^_\n]{0,80}?_+)
+      | (?<=[:：])  (?P<CAMPO_ROTULADO>\ ?_+)
+      | (?<=\d)(?<!\w\d)
+                    (?: (?P<CNPJ>\d\.\d{3}\.\d{3}/\d{4}-\d{2}\b)
+                      | (?P<DATA>\d?/\d{1,2}/\d{4}\b)
+                      | (?P<PRAZO>\d*\s*(?i:DIAS|MESES|ANOS)\b) )
+    )
+    """,
+    re.VERBOSE,
+)
+
+# Rótulo de CAMPO_ROTULADO: 3+ caracteres [A-Z ] imediatamente antes do ':'
+_CARACTERES_ROTULO = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ ")
+_MIN_ROTULO = 3
+
+
+@dataclass(frozen=True)
+class Ocorrencia:
+    tipo: str
+    texto: str
+    inicio: int
+    fim: int
+
+
+def varrer_padroes(texto: str, tipos: Optional[Iterable[str]] = None) -> List[Ocorrencia]:
+    """Todas as ocorrências (não sobrepostas) em ordem de posição no texto.
+
+    `tipos` restringe o resultado a alguns tipos; a varredura continua única.
+    """
+    filtro = frozenset(tipos) if tipos is not None else None
+    ocorrencias: List[Ocorrencia] = []
+    for m in _PADRAO.finditer(texto):
+        tipo, inicio = m.lastgroup, m.start()
+        if tipo == "CAMPO_ROTULADO":
+            # Lookbehind de largura variável não existe em `re`: estende à mão
+            rotulo = inicio
+            while rotulo > 0 and texto[rotulo - 1] in _CARACTERES_ROTULO:
+                rotulo -= 1
+            if inicio - rotulo >= _MIN_ROTULO:
+                inicio = rotulo
+            elif texto.count("_", inicio, m.end()) >= 3:
+                # Sem rótulo válido, mas os tracinhos ainda são um campo em branco
+                tipo, inicio = "TRACEJADO", texto.index("_", inicio)
+            else:
+                continue
+        if filtro is None or tipo in filtro:
+            ocorrencias.append(Ocorrencia(tipo, texto[inicio:m.end()], inicio, m.end()))
+    return ocorrencias
+
+
+def campos_em_branco(texto: str) -> List[Ocorrencia]:
+    return varrer_padroes(texto, TIPOS_CAMPO_EM_BRANCO)
+
+
+def entidades_regex(texto: str) -> List[Ocorrencia]:
+    return varrer_padroes(texto, TIPOS_ENTIDADE)
+
+
+__all__ = [
+    "Ocorrencia",
+    "TIPOS_CAMPO_EM_BRANCO",
+    "TIPOS_ENTIDADE",
+    "varrer_padroes",
+    "campos_em_branco",
+    "entidades_regex",
+]
@@ -0,0 +1,145 @@
+"""Cache em disco, enderecado por conteudo, dos resultados de ingestao.
+
+A chave combina o SHA-256 dos bytes do arquivo com as versoes do extrator e
+do OCR, de modo que atualizar qualquer um deles invalida as entradas antigas.
+Cada entrada e um JSON com a saida de `processar_documento`; a remocao segue
+LRU pelo horario de acesso gravado no proprio arquivo, ate o limite de bytes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DIRETORIO_PADRAO = Path(
+    os.getenv("LUNGHIN_CACHE_INGESTAO_DIR")
+    or Path(__file__).resolve().parents[2] / "cache" / "ingestao"
+)
+TAMANHO_MAXIMO_PADRAO = int(os.getenv("LUNGHIN_CACHE_INGESTAO_MAX_MB", "512")) * 1024 * 1024
+_BLOCO_LEITURA = 1024 * 1024
+
+
+def calcular_hash_arquivo(caminho: str) -> str:
+    """SHA-256 dos bytes do arquivo, lido em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(_BLOCO_LEITURA), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def versao_ocr() -> str:
+    # Consulta os metadados do pacote sem importar o PaddleOCR
+    try:
+        return metadata.version("paddleocr")
+    except metadata.PackageNotFoundError:
+        return "ausente"
+
+
+class CacheIngestao:
+    """Cache LRU em disco limitado por tamanho total."""
+
+    def __init__(self, diretorio: Path = DIRETORIO_PADRAO, tamanho_maximo: int = TAMANHO_MAXIMO_PADRAO) -> None:
+        self.diretorio = Path(diretorio)
+        self.tamanho_maximo = tamanho_maximo
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self._tamanho_total: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _caminho(self, chave: str) -> Path:
+        return self.diretorio / chave[:2] / f"{chave}.json"
+
+    def _entradas(self):
+        return self.diretorio.glob("*/*.json") if self.diretorio.exists() else []
+
+    def _calcular_tamanho_total(self) -> int:
+        if self._tamanho_total is None:
+            self._tamanho_total = sum(p.stat().st_size for p in self._entradas())
+        return self._tamanho_total
+
+    def obter(self, chave: str) -> Optional[Dict[str, Any]]:
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+            os.utime(caminho)  # marca o acesso para a politica LRU
+        except (OSError, ValueError):
+            with self._lock:
+                self.falhas += 1
+            return None
+        with self._lock:
+            self.acertos += 1
+        return dados
+
+    def gravar(self, chave: str, dados: Dict[str, Any]) -> None:
+        caminho = self._caminho(chave)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        conteudo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        temporario = caminho.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temporario.write_bytes(conteudo)
+        with self._lock:
+            anterior = caminho.stat().st_size if caminho.exists() else 0
+            os.replace(temporario, caminho)
+            self._tamanho_total = self._calcular_tamanho_total() - anterior + len(conteudo)
+            if self._tamanho_total > self.tamanho_maximo:
+                self._remover_excedente(preservar=caminho)
+
+    def _remover_excedente(self, preservar: Path) -> None:
+        """Remove as entradas acessadas ha mais tempo ate caber no limite."""
+        entradas = []
+        for p in self._entradas():
+            try:
+                entradas.append((p.stat().st_mtime, p.stat().st_size, p))
+            except OSError:
+                continue
+        entradas.sort()
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, p in entradas:
+            if total <= self.tamanho_maximo:
+                break
+            if p == preservar:
+                continue
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= tamanho
+            self.remocoes += 1
+        self._tamanho_total = total
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "remocoes": self.remocoes,
+                "bytes": self._calcular_tamanho_total(),
+                "bytes_maximo": self.tamanho_maximo,
+            }
+
+
+_CACHE: Optional[CacheIngestao] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def obter_cache_ingestao() -> CacheIngestao:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = CacheIngestao()
+        return _CACHE
+
+
+__all__ = [
+    "CacheIngestao",
+    "calcular_hash_arquivo",
+    "versao_ocr",
+    "obter_cache_ingestao",
+]
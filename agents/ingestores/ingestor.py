@@ -1,63 +1,137 @@
 """Modulo de ingestao de documentos juridicos.
 
-Este modulo identifica o tipo de arquivo (PDF escaneado, PDF editavel ou DOCX)
+Este modulo identifica o tipo de arquivo (PDF escaneado, editavel, misto ou DOCX)
  e extrai o texto correspondente. Utiliza PyMuPDF para PDFs, PaddleOCR para
  PDFs escaneados e docx2txt para arquivos DOCX.
+
+O OCR e delegado ao pool persistente de `agents.ingestores.ocr_pool`, de modo
+que este modulo nunca carrega os modelos do PaddleOCR no processo chamador.
+Resultados ficam no cache enderecado por conteudo de
+`agents.ingestores.cache_ingestao`; reenvios do mesmo arquivo nao refazem OCR.
 """
 
-from typing import Dict, Tuple
+import hashlib
+import os
+import threading
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import fitz  # PyMuPDF
-from paddleocr import PaddleOCR
 import docx2txt
-from PIL import Image
 import numpy as np
 
-
-def is_pdf_scanned(caminho_pdf: str) -> bool:
-    """Verifica se um PDF possui texto extraivel.
-
-    Retorna True se todas as paginas nao contiverem texto (PDF escaneado).
+from agents.ingestores.cache_ingestao import (
+    calcular_hash_arquivo,
+    obter_cache_ingestao,
+    versao_ocr,
+)
+from agents.ingestores.ocr_pool import TIMEOUT_TAREFA_S, PoolOCR, obter_pool_ocr
+from monitoring.dashboard import anotar_etapa, registrar_paginas
+
+# Incrementar sempre que a logica de extracao mudar a saida de processar_documento
+VERSAO_EXTRATOR = "3"
+
+# Fator de ampliacao usado ao rasterizar paginas para OCR
+ZOOM_OCR = 2
+# Limite de paginas renderizadas aguardando OCR (0 = duas por motor do pool)
+MAX_PAGINAS_EM_VOO = int(os.getenv("LUNGHIN_OCR_PAGINAS_EM_VOO", "0"))
+# Espera maxima por pagina: pelo resultado, ou por uma vaga para renderizar a proxima
+TIMEOUT_PAGINA_S = TIMEOUT_TAREFA_S
+
+# Origem do texto de cada pagina de um PDF
+ORIGEM_TEXTO = "texto"
+ORIGEM_OCR = "ocr"
+
+
+def _renderizar_pagina(page: fitz.Page, zoom: float = ZOOM_OCR) -> np.ndarray:
+    """Rasteriza uma pagina em RGB sem copias intermediarias via PIL."""
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+
+def _ocr_paginas(
+    doc: fitz.Document,
+    indices: Iterable[int],
+    pool: Optional[PoolOCR] = None,
+    max_em_voo: int = MAX_PAGINAS_EM_VOO,
+    timeout_pagina: float = TIMEOUT_PAGINA_S,
+) -> Dict[int, str]:
+    """Distribui paginas entre os motores de OCR com memoria limitada.
+
+    As paginas sao renderizadas sob demanda e no maximo `max_em_voo` imagens
+    ficam vivas aguardando OCR; a renderizacao da pagina seguinte espera a
+    conclusao de alguma pagina ja enviada. Retorna o texto por indice de pagina.
+
+    Se um motor travar, nenhuma espera passa de `timeout_pagina`: as paginas
+    ainda na fila do pool sao canceladas, os motores que estao com paginas
+    deste documento sao encerrados e recriados pelo pool (`PoolOCR.interromper`)
+    e levanta TimeoutError.
+    """
+    pool = pool or obter_pool_ocr()
+    limite = threading.BoundedSemaphore(max_em_voo or 2 * pool.tamanho)
+    futuros = {}
+    try:
+        for indice in indices:
+            if not limite.acquire(timeout=timeout_pagina):
+                raise TimeoutError(f"OCR sem vaga para a pagina {indice + 1} em {timeout_pagina:g}s")
+            try:
+                futuro = pool.submeter(_renderizar_pagina(doc[indice]))
+            except Exception:
+                limite.release()
+                raise
+            futuro.add_done_callback(lambda _: limite.release())
+            futuros[indice] = futuro
+
+        textos = {}
+        for indice, futuro in futuros.items():
+            try:
+                textos[indice] = futuro.result(timeout=timeout_pagina)
+            except FuturesTimeoutError:
+                raise TimeoutError(f"OCR da pagina {indice + 1} excedeu {timeout_pagina:g}s") from None
+        return textos
+    except TimeoutError:
+        for futuro in futuros.values():
+            if not futuro.cancel() and not futuro.done():
+                pool.interromper(futuro)
+        raise
+    except BaseException:
+        for futuro in futuros.values():
+            futuro.cancel()
+        raise
+
+
+def _tipo_pdf(origens: List[str]) -> str:
+    if origens and all(origem == ORIGEM_OCR for origem in origens):
+        return "pdf_escaneado"
+    if ORIGEM_OCR in origens:
+        return "pdf_misto"
+    return "pdf_editavel"
+
+
+def extrair_texto_pdf_por_pagina(caminho_pdf: str) -> Tuple[str, str, List[str]]:
+    """Extrai o texto de um PDF em uma unica passagem, classificando cada pagina.
+
+    Paginas com texto nativo mantem o texto do PyMuPDF; apenas as paginas sem
+    texto (imagem pura) sao enviadas ao OCR. Retorna o texto, o tipo do PDF
+    ("pdf_editavel", "pdf_escaneado" ou "pdf_misto") e a origem de cada pagina.
     """
     with fitz.open(caminho_pdf) as doc:
-        for page in doc:
-            if page.get_text().strip():
-                return False
-    return True
+        textos = [page.get_text("text") for page in doc]
+        sem_texto = [i for i, texto in enumerate(textos) if not texto.strip()]
+        if sem_texto:
+            for indice, texto in _ocr_paginas(doc, sem_texto).items():
+                textos[indice] = texto
 
-
-def _ocr_scanned_pdf(caminho_pdf: str) -> str:
-    """Realiza OCR em um PDF escaneado usando PaddleOCR."""
-    ocr = PaddleOCR(show_log=False)
-    texto_paginas = []
-    with fitz.open(caminho_pdf) as doc:
-        for page in doc:
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            resultado = ocr.ocr(np.array(img), cls=False)
-            if resultado:
-                linhas = [linha[1][0] for linha in resultado[0]]
-                texto_paginas.append("\n".join(linhas))
-    return "\n".join(texto_paginas)
-
-
-def _extrair_texto_pdf_editavel(caminho_pdf: str) -> str:
-    """Extrai texto de PDF editavel usando PyMuPDF."""
-    texto_paginas = []
-    with fitz.open(caminho_pdf) as doc:
-        for page in doc:
-            texto_paginas.append(page.get_text("text"))
-    return "\n".join(texto_paginas)
+    origens = [ORIGEM_TEXTO] * len(textos)
+    for indice in sem_texto:
+        origens[indice] = ORIGEM_OCR
+    texto = "\n".join(t for i, t in enumerate(textos) if t or origens[i] == ORIGEM_TEXTO)
+    return texto, _tipo_pdf(origens), origens
 
 
 def extrair_texto_pdf(caminho_pdf: str) -> Tuple[str, str]:
     """Extrai texto de um arquivo PDF e indica o tipo de PDF."""
-    if is_pdf_scanned(caminho_pdf):
-        texto = _ocr_scanned_pdf(caminho_pdf)
-        tipo = "pdf_escaneado"
-    else:
-        texto = _extrair_texto_pdf_editavel(caminho_pdf)
-        tipo = "pdf_editavel"
+    texto, tipo, _ = extrair_texto_pdf_por_pagina(caminho_pdf)
     return texto, tipo
 
 
@@ -66,18 +140,16 @@ def extrair_texto_docx(caminho_docx: str) -> str:
     return docx2txt.process(caminho_docx)
 
 
-def processar_documento(caminho: str) -> Dict[str, str]:
-    """Processa um documento juridico em PDF ou DOCX.
+def _chave_cache(hash_conteudo: str) -> str:
+    versoes = f"{hash_conteudo}:{VERSAO_EXTRATOR}:{fitz.VersionBind}:{versao_ocr()}"
+    return hashlib.sha256(versoes.encode("utf-8")).hexdigest()
 
-    Args:
-        caminho: caminho do arquivo a ser processado.
 
-    Returns:
-        dict com chaves "texto" e "tipo_entrada".
-    """
+def _extrair_documento(caminho: str) -> Dict[str, Any]:
     caminho_lower = caminho.lower()
     if caminho_lower.endswith(".pdf"):
-        texto, tipo = extrair_texto_pdf(caminho)
+        texto, tipo, origens = extrair_texto_pdf_por_pagina(caminho)
+        return {"texto": texto.strip(), "tipo_entrada": tipo, "origem_paginas": origens}
     elif caminho_lower.endswith(".docx"):
         texto = extrair_texto_docx(caminho)
         tipo = "docx"
@@ -86,3 +158,40 @@ def processar_documento(caminho: str) -> Dict[str, str]:
 
     return {"texto": texto.strip(), "tipo_entrada": tipo}
 
+
+def processar_documento(
+    caminho: str,
+    hash_conteudo: Optional[str] = None,
+    usar_cache: bool = True,
+) -> Dict[str, Any]:
+    """Processa um documento juridico em PDF ou DOCX.
+
+    Args:
+        caminho: caminho do arquivo a ser processado.
+        hash_conteudo: SHA-256 dos bytes do arquivo, se ja conhecido (por
+            exemplo, calculado durante o upload); evita reler o arquivo.
+        usar_cache: consulta e alimenta o cache de ingestao.
+
+    Returns:
+        dict com chaves "texto", "tipo_entrada" e, para PDFs, "origem_paginas"
+        com a origem ("texto" ou "ocr") de cada pagina.
+    """
+    if not caminho.lower().endswith((".pdf", ".docx")):
+        raise ValueError("Formato de arquivo nao suportado: %s" % caminho)
+    if not usar_cache:
+        return _extrair_documento_medindo(caminho)
+
+    cache = obter_cache_ingestao()
+    chave = _chave_cache(hash_conteudo or calcular_hash_arquivo(caminho))
+    dados = cache.obter(chave)
+    anotar_etapa(cache_ingestao="acerto" if dados is not None else "falha")
+    if dados is None:
+        dados = _extrair_documento_medindo(caminho)
+        cache.gravar(chave, dados)
+    return dados
+
+
+def _extrair_documento_medindo(caminho: str) -> Dict[str, Any]:
+    dados = _extrair_documento(caminho)
+    registrar_paginas(dados.get("origem_paginas", []))
+    return dados
@@ -0,0 +1,407 @@
+"""Pool persistente de motores PaddleOCR.
+
+Cada motor roda em um processo proprio, carrega os modelos de deteccao e
+reconhecimento uma unica vez e atende as paginas que o pool lhe entrega.
+Assim varios uploads reaproveitam motores ja aquecidos e o processo da API
+nunca carrega modelos de OCR.
+
+O pool entrega uma pagina por vez a cada motor livre (fila de tarefas propria)
+e recebe a resposta por um pipe exclusivo do motor, entao sabe exatamente qual
+pagina estava com um motor que morreu: so essa falha, as demais seguem na fila.
+Motores que morrem sao recriados com espera exponencial, ate MAX_REINICIOS
+vezes seguidas; um motor que nao consegue carregar os modelos (PaddleOCR
+ausente, modelo corrompido) informa o erro e nao e recriado. Um motor que passa
+de TIMEOUT_TAREFA_S na mesma pagina (ou cuja pagina o chamador desistiu de
+esperar, ver `interromper`) e tratado como travado: o processo e encerrado e
+recriado como um motor morto, em vez de ficar ocupado para sempre. Sem nenhum motor
+utilizavel o pool fica indisponivel e as paginas falham com OCRIndisponivel
+em vez de esperar para sempre.
+"""
+
+import collections
+import itertools
+import logging
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from monitoring.logs import obter_logger, registrar_evento
+
+TAMANHO_PADRAO = int(os.getenv("LUNGHIN_OCR_WORKERS", "2"))
+# Espera maxima pelos modelos na subida da API (ver iniciar_pool_ocr)
+TIMEOUT_INICIO_S = float(os.getenv("LUNGHIN_OCR_TIMEOUT_INICIO_S", "120"))
+MAX_REINICIOS = int(os.getenv("LUNGHIN_OCR_MAX_REINICIOS", "5"))
+# Tempo maximo de um motor em uma pagina antes de ser considerado travado
+TIMEOUT_TAREFA_S = float(os.getenv("LUNGHIN_OCR_TIMEOUT_PAGINA_S", "120"))
+REINICIO_BASE_S = 1.0
+REINICIO_MAX_S = 60.0
+INTERVALO_VERIFICACAO_S = 1.0
+
+_PRONTO = "pronto"
+_RESULTADO = "resultado"
+_ERRO = "erro"
+_FALHA_CARGA = "falha_carga"
+
+# Estados de um motor do ponto de vista do pool
+_CARREGANDO = "carregando"
+_LIVRE = "livre"
+_AGUARDANDO_REINICIO = "aguardando_reinicio"
+_DESCARTADO = "descartado"
+
+_logger = obter_logger("ocr")
+
+
+class OCRIndisponivel(RuntimeError):
+    """Nenhum motor de OCR consegue atender (modelos nao carregam ou motores nao param de morrer)."""
+
+
+def _linhas_ocr(resultado) -> str:
+    if not resultado or not resultado[0]:
+        return ""
+    return "\n".join(linha[1][0] for linha in resultado[0])
+
+
+def _carregar_paddle():
+    from paddleocr import PaddleOCR
+
+    return PaddleOCR(show_log=False)
+
+
+def _executar_motor(indice: int, tarefas, emissor, fabrica: Callable[[], Any]) -> None:
+    """Laco do processo trabalhador: carrega o motor e atende a fila propria."""
+    try:
+        ocr = fabrica()
+    except Exception as exc:
+        emissor.send((_FALHA_CARGA, repr(exc)))
+        return
+    emissor.send((_PRONTO, None))
+    while True:
+        tarefa = tarefas.get()
+        if tarefa is None:
+            break
+        id_tarefa, imagem = tarefa
+        try:
+            texto = _linhas_ocr(ocr.ocr(imagem, cls=False))
+            emissor.send((_RESULTADO, (id_tarefa, texto)))
+        except Exception as exc:
+            emissor.send((_ERRO, (id_tarefa, repr(exc))))
+
+
+@dataclass
+class _Motor:
+    processo: Optional[mp.Process] = None
+    tarefas: Any = None
+    receptor: Optional[multiprocessing.connection.Connection] = None
+    estado: str = _CARREGANDO
+    tarefa: Optional[int] = None
+    inicio_tarefa: float = 0.0
+    falhas_seguidas: int = 0
+    reiniciar_em: float = 0.0
+
+
+class PoolOCR:
+    """Conjunto de processos PaddleOCR de vida longa (ver docstring do modulo)."""
+
+    def __init__(
+        self,
+        tamanho: int = TAMANHO_PADRAO,
+        fabrica: Callable[[], Any] = _carregar_paddle,
+        max_reinicios: int = MAX_REINICIOS,
+        timeout_tarefa: float = TIMEOUT_TAREFA_S,
+    ) -> None:
+        if tamanho < 1:
+            raise ValueError("O pool de OCR precisa de ao menos um motor")
+        self.tamanho = tamanho
+        self.max_reinicios = max_reinicios
+        self.timeout_tarefa = timeout_tarefa
+        # Funcao de nivel de modulo (precisa ser serializavel para o spawn)
+        self._fabrica = fabrica
+        # PaddlePaddle nao e seguro apos fork; cada motor nasce com spawn
+        self._ctx = mp.get_context("spawn")
+        self._motores: List[_Motor] = []
+        self._espera: Deque[Tuple[int, np.ndarray]] = collections.deque()
+        self._pendentes: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        # Reentrante: callbacks dos futures podem voltar ao pool
+        self._lock = threading.RLock()
+        self._mudou = threading.Condition(self._lock)
+        self._ativo = False
+        self._erro_carga: Optional[str] = None
+        self._despachante: Optional[threading.Thread] = None
+
+    def _criar_motor(self, indice: int, motor: _Motor) -> None:
+        receptor, emissor = self._ctx.Pipe(duplex=False)
+        motor.tarefas = self._ctx.Queue()
+        motor.processo = self._ctx.Process(
+            target=_executar_motor,
+            args=(indice, motor.tarefas, emissor, self._fabrica),
+            name=f"lunghin-ocr-{indice}",
+            daemon=True,
+        )
+        motor.processo.start()
+        # Sem a copia do pai, o receptor ve EOF quando o motor morre
+        emissor.close()
+        motor.receptor = receptor
+        motor.estado = _CARREGANDO
+        motor.tarefa = None
+
+    @property
+    def indisponivel(self) -> bool:
+        return self._ativo and all(m.estado == _DESCARTADO for m in self._motores)
+
+    def iniciar(self, aguardar: bool = True, timeout: Optional[float] = None) -> "PoolOCR":
+        """Sobe os motores; com `aguardar`, bloqueia ate todos carregarem os modelos.
+
+        Levanta TimeoutError se o prazo acabar antes (os motores seguem
+        carregando) e OCRIndisponivel se nenhum motor conseguir carregar.
+        """
+        with self._lock:
+            if not self._ativo:
+                self._ativo = True
+                self._erro_carga = None
+                self._motores = [_Motor() for _ in range(self.tamanho)]
+                for i, motor in enumerate(self._motores):
+                    self._criar_motor(i, motor)
+                self._despachante = threading.Thread(
+                    target=self._despachar, name="lunghin-ocr-despachante", daemon=True
+                )
+                self._despachante.start()
+        if not aguardar:
+            return self
+        prazo = None if timeout is None else time.monotonic() + timeout
+        with self._mudou:
+            while self._ativo and any(m.estado in (_CARREGANDO, _AGUARDANDO_REINICIO) for m in self._motores):
+                restante = None if prazo is None else prazo - time.monotonic()
+                if restante is not None and restante <= 0:
+                    raise TimeoutError("Motores de OCR nao ficaram prontos a tempo")
+                self._mudou.wait(restante)
+            if self.indisponivel:
+                raise OCRIndisponivel(f"Nenhum motor de OCR carregou: {self._erro_carga}")
+        return self
+
+    def _despachar(self) -> None:
+        verificado_em = time.monotonic()
+        while self._ativo:
+            with self._lock:
+                receptores = {m.receptor: i for i, m in enumerate(self._motores) if m.receptor is not None}
+            for receptor in multiprocessing.connection.wait(list(receptores), timeout=INTERVALO_VERIFICACAO_S):
+                try:
+                    tipo, carga = receptor.recv()
+                except (EOFError, OSError):
+                    # Motor morreu; aguarda o processo terminar e deixa a verificacao tratar
+                    self._motores[receptores[receptor]].processo.join(1.0)
+                    verificado_em = 0.0
+                    continue
+                self._tratar_resposta(receptores[receptor], tipo, carga)
+            if time.monotonic() - verificado_em >= INTERVALO_VERIFICACAO_S:
+                self._verificar_processos()
+                verificado_em = time.monotonic()
+
+    def _tratar_resposta(self, indice: int, tipo: str, carga: Any) -> None:
+        futuro, resultado = None, None
+        with self._lock:
+            motor = self._motores[indice]
+            if tipo == _PRONTO:
+                motor.estado = _LIVRE
+            elif tipo == _FALHA_CARGA:
+                # Erro de carga e deterministico: recriar o motor nao resolve
+                self._erro_carga = carga
+                self._descartar(indice, motor, f"falha ao carregar os modelos: {carga}")
+            else:
+                id_tarefa, resultado = carga
+                motor.tarefa = None
+                motor.falhas_seguidas = 0
+                futuro = self._pendentes.pop(id_tarefa, None)
+            self._distribuir()
+            self._mudou.notify_all()
+        if futuro is None:
+            return
+        if tipo == _RESULTADO:
+            futuro.set_result(resultado)
+        else:
+            futuro.set_exception(RuntimeError(f"Falha no OCR: {resultado}"))
+
+    def _descartar(self, indice: int, motor: _Motor, motivo: str) -> None:
+        motor.estado = _DESCARTADO
+        if motor.receptor is not None:
+            motor.receptor.close()
+            motor.receptor = None
+        registrar_evento(_logger, "motor_ocr_descartado", logging.ERROR, motor=indice, motivo=motivo)
+
+    def _distribuir(self) -> None:
+        """Entrega paginas em espera aos motores livres (com o lock)."""
+        for motor in self._motores:
+            if motor.estado != _LIVRE or motor.tarefa is not None:
+                continue
+            while self._espera:
+                id_tarefa, imagem = self._espera.popleft()
+                futuro = self._pendentes.get(id_tarefa)
+                # Depois de entregue a pagina nao pode mais ser cancelada
+                if futuro is None or not futuro.set_running_or_notify_cancel():
+                    self._pendentes.pop(id_tarefa, None)
+                    continue
+                motor.tarefa, motor.inicio_tarefa = id_tarefa, time.monotonic()
+                motor.tarefas.put((id_tarefa, imagem))
+                break
+        if self.indisponivel:
+            self._falhar_espera(OCRIndisponivel(f"Nenhum motor de OCR disponivel: {self._erro_carga}"))
+
+    def _falhar_espera(self, erro: Exception) -> None:
+        perdidos = [self._pendentes.pop(id_tarefa, None) for id_tarefa, _ in self._espera]
+        self._espera.clear()
+        for futuro in perdidos:
+            if futuro is not None and not futuro.cancelled():
+                futuro.set_exception(erro)
+
+    def _encerrar_travado(self, indice: int, motor: _Motor, motivo: str) -> None:
+        """Mata o processo do motor (com o lock); a verificacao o trata como morto."""
+        if motor.processo is None or not motor.processo.is_alive():
+            return
+        motor.processo.terminate()
+        registrar_evento(_logger, "motor_ocr_travado", logging.WARNING, motor=indice, motivo=motivo)
+
+    def interromper(self, futuro: Future) -> bool:
+        """Encerra o motor que esta com a pagina de `futuro` (o chamador desistiu dela).
+
+        O motor e recriado como se tivesse morrido; a pagina falha. Devolve
+        False se a pagina nao estiver com nenhum motor.
+        """
+        with self._lock:
+            for i, motor in enumerate(self._motores):
+                if motor.tarefa is not None and self._pendentes.get(motor.tarefa) is futuro:
+                    self._encerrar_travado(i, motor, "pagina abandonada pelo chamador")
+                    return True
+        return False
+
+    def _verificar_processos(self) -> None:
+        """Falha a pagina de cada motor morto e recria o motor com espera exponencial."""
+        agora = time.monotonic()
+        perdidos: List[Future] = []
+        with self._lock:
+            if not self._ativo:
+                return
+            for i, motor in enumerate(self._motores):
+                if motor.estado == _AGUARDANDO_REINICIO and agora >= motor.reiniciar_em:
+                    self._criar_motor(i, motor)
+                    continue
+                if motor.tarefa is not None and agora - motor.inicio_tarefa > self.timeout_tarefa:
+                    self._encerrar_travado(i, motor, f"pagina ha mais de {self.timeout_tarefa:g}s")
+                    # terminate() e assincrono; espera o fim para tratar como morte agora
+                    motor.processo.join(1.0)
+                if motor.estado not in (_CARREGANDO, _LIVRE) or motor.processo.is_alive():
+                    continue
+                if motor.tarefa is not None:
+                    futuro = self._pendentes.pop(motor.tarefa, None)
+                    if futuro is not None:
+                        perdidos.append(futuro)
+                motor.receptor.close()
+                motor.processo, motor.tarefas, motor.receptor, motor.tarefa = None, None, None, None
+                motor.falhas_seguidas += 1
+                if motor.falhas_seguidas > self.max_reinicios:
+                    self._erro_carga = self._erro_carga or "motores encerrados repetidamente"
+                    self._descartar(i, motor, f"{motor.falhas_seguidas} mortes seguidas")
+                    continue
+                espera = min(REINICIO_BASE_S * 2 ** (motor.falhas_seguidas - 1), REINICIO_MAX_S)
+                motor.estado, motor.reiniciar_em = _AGUARDANDO_REINICIO, agora + espera
+                registrar_evento(_logger, "motor_ocr_reiniciando", logging.WARNING, motor=i, em_s=espera)
+            self._distribuir()
+            self._mudou.notify_all()
+        for futuro in perdidos:
+            futuro.set_exception(RuntimeError("Motor de OCR encerrado inesperadamente"))
+
+    def submeter(self, imagem: np.ndarray) -> Future:
+        """Enfileira uma imagem de pagina e retorna um Future com o texto reconhecido."""
+        if not self._ativo:
+            self.iniciar(aguardar=False)
+        futuro: Future = Future()
+        with self._lock:
+            if self.indisponivel:
+                futuro.set_exception(OCRIndisponivel(f"Nenhum motor de OCR disponivel: {self._erro_carga}"))
+                return futuro
+            id_tarefa = next(self._ids)
+            self._pendentes[id_tarefa] = futuro
+            self._espera.append((id_tarefa, imagem))
+            self._distribuir()
+        return futuro
+
+    def reconhecer(self, imagens: Iterable[np.ndarray]) -> List[str]:
+        """Reconhece varias imagens, devolvendo os textos na ordem de entrada."""
+        futuros = [self.submeter(imagem) for imagem in imagens]
+        return [futuro.result() for futuro in futuros]
+
+    def encerrar(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            if not self._ativo:
+                return
+            self._ativo = False
+            motores = [m for m in self._motores if m.processo is not None]
+            self._mudou.notify_all()
+        for motor in motores:
+            motor.tarefas.put(None)
+        for motor in motores:
+            motor.processo.join(timeout)
+            if motor.processo.is_alive():
+                motor.processo.terminate()
+        if self._despachante is not None:
+            self._despachante.join(timeout)
+        with self._lock:
+            perdidos, self._pendentes = self._pendentes, {}
+            self._espera.clear()
+            for motor in motores:
+                if motor.receptor is not None:
+                    motor.receptor.close()
+        for futuro in perdidos.values():
+            if not futuro.cancelled():
+                futuro.set_exception(RuntimeError("Pool de OCR encerrado"))
+
+
+_POOL: Optional[PoolOCR] = None
+_POOL_LOCK = threading.Lock()
+
+
+def obter_pool_ocr() -> PoolOCR:
+    """Retorna o pool de OCR do processo, criando-o sob demanda."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = PoolOCR()
+        return _POOL
+
+
+def iniciar_pool_ocr(
+    tamanho: Optional[int] = None, aguardar: bool = True, timeout: Optional[float] = TIMEOUT_INICIO_S
+) -> PoolOCR:
+    """Cria (se preciso) e aquece o pool de OCR do processo.
+
+    Com `aguardar`, espera no maximo `timeout` segundos (None = sem limite);
+    ver PoolOCR.iniciar para as excecoes.
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = PoolOCR(tamanho or TAMANHO_PADRAO)
+    return _POOL.iniciar(aguardar=aguardar, timeout=timeout)
+
+
+def encerrar_pool_ocr() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.encerrar()
+
+
+__all__ = [
+    "OCRIndisponivel",
+    "PoolOCR",
+    "obter_pool_ocr",
+    "iniciar_pool_ocr",
+    "encerrar_pool_ocr",
+]
@@ -1,8 +1,43 @@
 # coding: utf-8
 """Executa diagnósticos LLM sobre cláusulas extraídas do grafo."""
 
-from typing import List, Dict
-from agents.interpretadores.diagnostico_llm import diagnosticar_clausula
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from agents.interpretadores.diagnostico_llm import (
+    MODELO,
+    VERSAO_PROMPT,
+    VERSAO_PROMPT_LOTE,
+    criar_cliente_async,
+    diagnosticar_clausula,
+    diagnosticar_clausula_async,
+    diagnosticar_clausulas_em_lote,
+)
+from agents.extratores.segmentador_clausulas import IndiceClausulas
+from agents.interpretadores.limitador_taxa import LimitadorTaxa
+from agents.interpretadores import quase_duplicatas
+from agents.interpretadores.quase_duplicatas import obter_indice_quase_duplicatas, termos_mascarados
+from monitoring.dashboard import registrar_quase_duplicatas
+
+TIPOS_CRITICOS = {"MULTA", "RESCISAO", "CONFIDENCIALIDADE", "PRAZO", "OBJETO"}
+
+CONCORRENCIA_PADRAO = int(os.getenv("LUNGHIN_LLM_CONCORRENCIA", "5"))
+REQUISICOES_POR_MINUTO = float(os.getenv("LUNGHIN_LLM_REQ_POR_MINUTO", "60"))
+# "sequencial", "concorrente" ou "lote"
+MODO_PADRAO = os.getenv("LUNGHIN_LLM_MODO", "concorrente")
+
+# Com o índice de cláusulas, o LLM recebe a cláusula inteira (até este limite)
+# em vez da prévia de 300 caracteres guardada no grafo
+MAX_CARACTERES_CLAUSULA = int(os.getenv("LUNGHIN_LLM_MAX_CARACTERES_CLAUSULA", "2000"))
+
+# Um único balde por processo: pipelines simultâneos dividem a mesma cota
+_LIMITADOR = LimitadorTaxa(REQUISICOES_POR_MINUTO / 60, capacidade=CONCORRENCIA_PADRAO)
+
+
+def _clausulas_criticas(entidades: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    return [e for e in entidades if e.get("label") in TIPOS_CRITICOS]
 
 
 def avaliar_clausulas_com_llm(entidades: List[Dict[str, str]]) -> List[Dict[str, any]]:
@@ -10,19 +45,161 @@ def avaliar_clausulas_com_llm(entidades: List[Dict[str, str]]) -> List[Dict[str,
     Recebe uma lista de entidades com cláusulas extraídas e retorna diagnósticos LLM
     sobre cada cláusula relevante (OBJETO, MULTA, RESCISAO, CONFIDENCIALIDADE, etc).
     """
-    tipos_criticos = {"MULTA", "RESCISAO", "CONFIDENCIALIDADE", "PRAZO", "OBJETO"}
     resultados = []
 
-    for entidade in entidades:
+    for entidade in _clausulas_criticas(entidades):
         tipo = entidade.get("label")
         texto = entidade.get("texto")
 
-        if tipo in tipos_criticos:
-            resultado = diagnosticar_clausula(clausula=texto, tipo=tipo)
+        resultado = diagnosticar_clausula(clausula=texto, tipo=tipo)
+        resultado.update({"tipo": tipo, "clausula": texto})
+        resultados.append(resultado)
+
+    return resultados
+
+
+def avaliar_clausulas_com_llm_em_lote(
+    entidades: List[Dict[str, str]],
+    orcamento_tokens: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Mesmo resultado de `avaliar_clausulas_com_llm`, mas empacotando várias
+    cláusulas por requisição até o orçamento de tokens.
+    """
+    criticas = _clausulas_criticas(entidades)
+    pares = [(e.get("label"), e.get("texto")) for e in criticas]
+    kwargs = {"orcamento_tokens": orcamento_tokens} if orcamento_tokens else {}
+    kwargs["limitador"] = _LIMITADOR
+
+    resultados = []
+    for (tipo, texto), resultado in zip(pares, diagnosticar_clausulas_em_lote(pares, **kwargs)):
+        resultado.update({"tipo": tipo, "clausula": texto})
+        resultados.append(resultado)
+    return resultados
+
+
+async def avaliar_clausulas_com_llm_async(
+    entidades: List[Dict[str, str]],
+    concorrencia: int = CONCORRENCIA_PADRAO,
+    limitador: Optional[LimitadorTaxa] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Avalia as cláusulas críticas concorrentemente, com no máximo `concorrencia`
+    chamadas em andamento e vazão controlada pelo limitador. Os resultados
+    saem na mesma ordem de `avaliar_clausulas_com_llm`.
+    """
+    criticas = _clausulas_criticas(entidades)
+    if not criticas:
+        return []
+
+    limitador = limitador or _LIMITADOR
+    semaforo = asyncio.Semaphore(concorrencia)
+    try:
+        cliente_async = criar_cliente_async()
+    except RuntimeError as exc:
+        return [{"erro": str(exc), "tipo": e.get("label"), "clausula": e.get("texto")} for e in criticas]
+
+    async with cliente_async:
+        async def avaliar(entidade: Dict[str, str]) -> Dict[str, Any]:
+            tipo = entidade.get("label")
+            texto = entidade.get("texto")
+            async with semaforo:
+                resultado = await diagnosticar_clausula_async(
+                    texto, tipo, cliente_async, limitador=limitador
+                )
             resultado.update({"tipo": tipo, "clausula": texto})
-            resultados.append(resultado)
+            return resultado
+
+        return list(await asyncio.gather(*(avaliar(e) for e in criticas)))
+
 
+def avaliar_clausulas_com_llm_concorrente(entidades: List[Dict[str, str]], **kwargs) -> List[Dict[str, Any]]:
+    """Ponte síncrona para `avaliar_clausulas_com_llm_async`.
+
+    Quando chamada de dentro de um event loop em execução, roda a corrotina em
+    uma thread própria para não bloquear nem reentrar no loop do chamador.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(avaliar_clausulas_com_llm_async(entidades, **kwargs))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, avaliar_clausulas_com_llm_async(entidades, **kwargs)).result()
+
+
+def _com_texto_integral(entidades: List[Dict[str, Any]], indice: IndiceClausulas) -> List[Dict[str, Any]]:
+    """Troca a prévia das cláusulas pelo texto original recuperado do índice."""
+    completas = []
+    for entidade in entidades:
+        clausula = indice.clausula_em(entidade["inicio"]) if "inicio" in entidade else None
+        if clausula is not None:
+            entidade = {**entidade, "texto": indice.trecho(clausula, MAX_CARACTERES_CLAUSULA)}
+        completas.append(entidade)
+    return completas
+
+
+def _avaliar_no_modo(entidades: List[Dict[str, Any]], modo: str) -> List[Dict[str, Any]]:
+    if modo == "lote":
+        return avaliar_clausulas_com_llm_em_lote(entidades)
+    if modo == "sequencial":
+        return avaliar_clausulas_com_llm(entidades)
+    return avaliar_clausulas_com_llm_concorrente(entidades)
+
+
+def avaliar_clausulas(
+    entidades: List[Dict[str, Any]],
+    modo: str = MODO_PADRAO,
+    indice: Optional[IndiceClausulas] = None,
+) -> List[Dict[str, Any]]:
+    """Avalia as cláusulas críticas no modo configurado (LUNGHIN_LLM_MODO).
+
+    Cláusulas quase idênticas a uma já diagnosticada (ver `quase_duplicatas`)
+    reaproveitam o diagnóstico guardado, marcado com `reaproveitado`; só as
+    demais vão ao LLM, e os diagnósticos novos sem erro alimentam o índice.
+    """
+    if indice is not None:
+        entidades = _com_texto_integral(entidades, indice)
+    if not quase_duplicatas.ATIVO:
+        return _avaliar_no_modo(entidades, modo)
+
+    criticas = _clausulas_criticas(entidades)
+    versao = f"{MODELO}:{VERSAO_PROMPT_LOTE if modo == 'lote' else VERSAO_PROMPT}"
+    termos = termos_mascarados(entidades)
+    indice_similares = obter_indice_quase_duplicatas()
+    similares = indice_similares.buscar(versao, [(e["label"], e.get("texto") or "") for e in criticas], termos)
+    novos = _avaliar_no_modo([e for e, s in zip(criticas, similares) if s is None], modo)
+    registrar_quase_duplicatas(sum(s is not None for s in similares), len(criticas))
+
+    resultados = []
+    pendentes = iter(novos)
+    for entidade, similar in zip(criticas, similares):
+        if similar is None:
+            resultados.append(next(pendentes))
+        else:
+            resultados.append(
+                {
+                    **similar.resultado,
+                    "tipo": entidade["label"],
+                    "clausula": entidade.get("texto"),
+                    "reaproveitado": similar.marcador(),
+                }
+            )
+    indice_similares.registrar(
+        versao,
+        [
+            (r["tipo"], r["clausula"] or "", {c: v for c, v in r.items() if c not in ("tipo", "clausula")})
+            for r in novos
+            if "erro" not in r
+        ],
+        termos,
+    )
     return resultados
 
 
-__all__ = ["avaliar_clausulas_com_llm"]
+__all__ = [
+    "avaliar_clausulas",
+    "avaliar_clausulas_com_llm",
+    "avaliar_clausulas_com_llm_em_lote",
+    "avaliar_clausulas_com_llm_async",
+    "avaliar_clausulas_com_llm_concorrente",
+]
@@ -0,0 +1,169 @@
+# coding: utf-8
+"""Cache persistente (SQLite) das respostas do LLM por cláusula.
+
+Cláusulas-modelo como FORO ou CONFIDENCIALIDADE se repetem literalmente entre
+contratos; o cache evita pagar de novo pela mesma análise. A chave combina
+modelo, versão do prompt, tipo da cláusula e o SHA-256 do texto normalizado.
+As entradas expiram por TTL e, acima do limite, as menos acessadas saem
+primeiro (LRU). Respostas com erro nunca são gravadas.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CAMINHO_PADRAO = Path(
+    os.getenv("LUNGHIN_CACHE_LLM_DB")
+    or Path(__file__).resolve().parents[2] / "cache" / "diagnosticos_llm.sqlite3"
+)
+TTL_PADRAO = float(os.getenv("LUNGHIN_CACHE_LLM_TTL_DIAS", "30")) * 86400
+MAX_ENTRADAS_PADRAO = int(os.getenv("LUNGHIN_CACHE_LLM_MAX_ENTRADAS", "50000"))
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS diagnosticos (
+    modelo TEXT NOT NULL,
+    versao_prompt TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    hash_clausula TEXT NOT NULL,
+    resposta TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    ultimo_acesso REAL NOT NULL,
+    latencia_s REAL NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (modelo, versao_prompt, tipo, hash_clausula)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_diagnosticos_acesso ON diagnosticos (ultimo_acesso);
+"""
+
+
+def normalizar_clausula(texto: str) -> str:
+    return re.sub(r"\s+", " ", texto or "").strip().casefold()
+
+
+def hash_clausula(texto: str) -> str:
+    return hashlib.sha256(normalizar_clausula(texto).encode("utf-8")).hexdigest()
+
+
+class CacheDiagnosticos:
+    """Cache de diagnósticos LLM com TTL, LRU e estatísticas de economia."""
+
+    def __init__(
+        self,
+        caminho: Path | str = CAMINHO_PADRAO,
+        ttl: float = TTL_PADRAO,
+        max_entradas: int = MAX_ENTRADAS_PADRAO,
+    ) -> None:
+        self.caminho = str(caminho)
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self.latencia_economizada_s = 0.0
+        self.tokens_economizados = 0
+        self._lock = threading.Lock()
+        if self.caminho != ":memory:":
+            Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(_ESQUEMA)
+
+    def obter(self, modelo: str, versao_prompt: str, tipo: str, clausula: str) -> Optional[Dict[str, Any]]:
+        chave = (modelo, versao_prompt, tipo, hash_clausula(clausula))
+        agora = time.time()
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT resposta, criado_em, latencia_s, tokens FROM diagnosticos "
+                "WHERE modelo = ? AND versao_prompt = ? AND tipo = ? AND hash_clausula = ?",
+                chave,
+            ).fetchone()
+            if linha is None or agora - linha[1] > self.ttl:
+                self.falhas += 1
+                return None
+            self._conexao.execute(
+                "UPDATE diagnosticos SET ultimo_acesso = ? "
+                "WHERE modelo = ? AND versao_prompt = ? AND tipo = ? AND hash_clausula = ?",
+                (agora, *chave),
+            )
+            self._conexao.commit()
+            self.acertos += 1
+            self.latencia_economizada_s += linha[2]
+            self.tokens_economizados += linha[3]
+        return json.loads(linha[0])
+
+    def gravar(
+        self,
+        modelo: str,
+        versao_prompt: str,
+        tipo: str,
+        clausula: str,
+        resposta: Dict[str, Any],
+        latencia_s: float = 0.0,
+        tokens: int = 0,
+    ) -> None:
+        if "erro" in resposta:
+            return
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO diagnosticos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    modelo, versao_prompt, tipo, hash_clausula(clausula),
+                    json.dumps(resposta, ensure_ascii=False), agora, agora, latencia_s, tokens,
+                ),
+            )
+            self._remover_excedente(agora)
+            self._conexao.commit()
+
+    def _remover_excedente(self, agora: float) -> None:
+        self._conexao.execute("DELETE FROM diagnosticos WHERE criado_em < ?", (agora - self.ttl,))
+        total = self._conexao.execute("SELECT COUNT(*) FROM diagnosticos").fetchone()[0]
+        if total > self.max_entradas:
+            # Remove um lote de 10% para não pagar a limpeza a cada inserção
+            excedente = total - self.max_entradas + max(1, self.max_entradas // 10)
+            self._conexao.execute(
+                "DELETE FROM diagnosticos WHERE (modelo, versao_prompt, tipo, hash_clausula) IN ("
+                "SELECT modelo, versao_prompt, tipo, hash_clausula FROM diagnosticos "
+                "ORDER BY ultimo_acesso LIMIT ?)",
+                (excedente,),
+            )
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            entradas = self._conexao.execute("SELECT COUNT(*) FROM diagnosticos").fetchone()[0]
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "latencia_economizada_s": round(self.latencia_economizada_s, 3),
+                "tokens_economizados": self.tokens_economizados,
+                "entradas": entradas,
+            }
+
+
+_CACHE: Optional[CacheDiagnosticos] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def obter_cache_diagnosticos() -> CacheDiagnosticos:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = CacheDiagnosticos()
+        return _CACHE
+
+
+__all__ = [
+    "CacheDiagnosticos",
+    "normalizar_clausula",
+    "hash_clausula",
+    "obter_cache_diagnosticos",
+]
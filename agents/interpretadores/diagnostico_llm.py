@@ -3,12 +3,34 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agents.interpretadores.cache_llm import obter_cache_diagnosticos
+from agents.interpretadores.limitador_taxa import LimitadorTaxa, atraso_com_jitter
+from monitoring.dashboard import registrar_uso_llm
+
+MODELO = "gpt-4"
+# Incrementar ao alterar gerar_prompt ou a mensagem de sistema (invalida o cache)
+VERSAO_PROMPT = "1"
+# Respostas do modo em lote (outro prompt, outro formato de resposta) ficam em
+# entradas próprias do cache; incrementar ao alterar gerar_prompt_lote
+VERSAO_PROMPT_LOTE = "lote-1"
+MENSAGEM_SISTEMA = "Você é um advogado contratualista experiente."
+
+TIMEOUT_CHAMADA = float(os.getenv("LUNGHIN_LLM_TIMEOUT", "60"))
+MAX_TENTATIVAS = int(os.getenv("LUNGHIN_LLM_TENTATIVAS", "4"))
+
+# Modo em lote: tokens de entrada por requisição e tokens de resposta por cláusula
+ORCAMENTO_TOKENS_LOTE = int(os.getenv("LUNGHIN_LLM_TOKENS_LOTE", "3000"))
+TOKENS_RESPOSTA_POR_CLAUSULA = 200
+MAX_TOKENS_RESPOSTA_LOTE = 4000
 
 try:
-    from openai import OpenAI  # Novo client da versão >=1.0.0
+    from openai import AsyncOpenAI, OpenAI  # Novo client da versão >=1.0.0
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY") or "sk-FAKE-KEY-FOR-DEBUG")
 except Exception as exc:
     client = None
@@ -41,26 +63,290 @@ def parsear_resposta(resposta: str) -> Dict[str, Any]:
         return {"erro": "Resposta inválida do modelo", "raw": resposta}
 
 
-def diagnosticar_clausula(clausula: str, tipo: str, contexto: Dict[str, Any] = None) -> Dict[str, Any]:
+def _mensagens(prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": MENSAGEM_SISTEMA},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def diagnosticar_clausula(
+    clausula: str,
+    tipo: str,
+    contexto: Dict[str, Any] = None,
+    usar_cache: bool = True,
+) -> Dict[str, Any]:
+    if usar_cache:
+        em_cache = obter_cache_diagnosticos().obter(MODELO, VERSAO_PROMPT, tipo, clausula)
+        if em_cache is not None:
+            return em_cache
+
+    resultado, latencia, tokens = _chamar_modelo(clausula, tipo)
+    if usar_cache:
+        obter_cache_diagnosticos().gravar(
+            MODELO, VERSAO_PROMPT, tipo, clausula, resultado, latencia_s=latencia, tokens=tokens
+        )
+    return resultado
+
+
+def _chamar_modelo(clausula: str, tipo: str) -> tuple[Dict[str, Any], float, int]:
+    """Consulta o modelo e retorna (resposta parseada, latência em s, tokens usados)."""
     if client is None:
-        return {"erro": f"OpenAI client não disponível: {_OPENAI_IMPORT_ERROR}"}
+        return {"erro": f"OpenAI client não disponível: {_OPENAI_IMPORT_ERROR}"}, 0.0, 0
 
     prompt = gerar_prompt(tipo, clausula)
 
     try:
+        inicio = time.perf_counter()
         completion = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Você é um advogado contratualista experiente."},
-                {"role": "user", "content": prompt}
-            ],
+            model=MODELO,
+            messages=_mensagens(prompt),
             temperature=0.2,
             max_tokens=500,
         )
+        latencia = time.perf_counter() - inicio
+        registrar_uso_llm(MODELO, completion.usage, latencia)
         resposta = completion.choices[0].message.content
-        return parsear_resposta(resposta)
+        tokens = getattr(completion.usage, "total_tokens", 0) or 0
+        return parsear_resposta(resposta), latencia, tokens
     except Exception as e:
-        return {"erro": str(e)}
+        return {"erro": str(e)}, 0.0, 0
+
+
+# ---------------------------------------------------------------------------
+# Modo em lote: várias cláusulas por requisição
+# ---------------------------------------------------------------------------
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa grosseira (~4 caracteres por token), suficiente para orçamentos."""
+    return len(texto) // 4 + 1
+
+
+def gerar_prompt_lote(clausulas: Sequence[Tuple[str, str, str]]) -> str:
+    """Monta o prompt para vários pares (id, tipo, cláusula) de uma só vez."""
+    blocos = "\n\n".join(
+        f"[id: {id_clausula}]\nTipo de cláusula: {tipo}\nCláusula: {clausula}"
+        for id_clausula, tipo, clausula in clausulas
+    )
+    return f"""
+Você é um advogado especialista em contratos empresariais. Analise cada uma das cláusulas abaixo, extraídas de um contrato de prestação de serviços:
+
+{blocos}
+
+Responda com um array JSON contendo um objeto por cláusula, cada um com:
+- "id": o id informado para a cláusula
+- "presente": se a cláusula está presente e reconhecível
+- "completude": um número de 0 a 100 indicando o quanto a cláusula cobre os elementos esperados
+- "juridicamente_aceitavel": true ou false, baseado na qualidade da redação e segurança jurídica
+- "comentario": uma breve análise crítica da cláusula
+- "risco": classificado como "baixo", "médio" ou "alto"
+
+Responda apenas com o array JSON.
+"""
+
+
+_CUSTO_FIXO_LOTE = estimar_tokens(MENSAGEM_SISTEMA + gerar_prompt_lote([]))
+
+
+def agrupar_em_lotes(
+    clausulas: Sequence[Tuple[str, str, str]],
+    orcamento_tokens: int = ORCAMENTO_TOKENS_LOTE,
+) -> List[List[Tuple[str, str, str]]]:
+    """Agrupa cláusulas em lotes cujo prompt estimado cabe no orçamento.
+
+    Uma cláusula que sozinha excede o orçamento vai em um lote próprio.
+    """
+    lotes: List[List[Tuple[str, str, str]]] = []
+    atual: List[Tuple[str, str, str]] = []
+    custo = _CUSTO_FIXO_LOTE
+    for item in clausulas:
+        custo_item = estimar_tokens(f"[id: {item[0]}]\nTipo de cláusula: {item[1]}\nCláusula: {item[2]}\n\n")
+        resposta = TOKENS_RESPOSTA_POR_CLAUSULA * (len(atual) + 1)
+        if atual and (custo + custo_item > orcamento_tokens or resposta > MAX_TOKENS_RESPOSTA_LOTE):
+            lotes.append(atual)
+            atual, custo = [], _CUSTO_FIXO_LOTE
+        atual.append(item)
+        custo += custo_item
+    if atual:
+        lotes.append(atual)
+    return lotes
+
+
+def parsear_resposta_lote(resposta: str, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """Converte o array JSON do modelo em {id: diagnóstico}.
+
+    Itens malformados ou com ids desconhecidos são ignorados; quem chama trata
+    os ids ausentes como não respondidos.
+    """
+    texto = (resposta or "").strip()
+    if texto.startswith("```"):
+        texto = texto.strip("`").removeprefix("json").strip()
+    try:
+        dados = json.loads(texto)
+    except json.JSONDecodeError:
+        return {}
+    if isinstance(dados, dict):
+        dados = next((v for v in dados.values() if isinstance(v, list)), [])
+    if not isinstance(dados, list):
+        return {}
+
+    esperados = set(ids)
+    respostas: Dict[str, Dict[str, Any]] = {}
+    for item in dados:
+        if not isinstance(item, dict):
+            continue
+        id_clausula = str(item.get("id", ""))
+        if id_clausula in esperados and id_clausula not in respostas:
+            respostas[id_clausula] = {k: v for k, v in item.items() if k != "id"}
+    return respostas
+
+
+def _chamar_modelo_lote(lote: Sequence[Tuple[str, str, str]]) -> tuple[Dict[str, Dict[str, Any]], float, int]:
+    if client is None:
+        return {}, 0.0, 0
+    try:
+        inicio = time.perf_counter()
+        completion = client.chat.completions.create(
+            model=MODELO,
+            messages=_mensagens(gerar_prompt_lote(lote)),
+            temperature=0.2,
+            max_tokens=min(MAX_TOKENS_RESPOSTA_LOTE, TOKENS_RESPOSTA_POR_CLAUSULA * len(lote)),
+        )
+        latencia = time.perf_counter() - inicio
+        registrar_uso_llm(MODELO, completion.usage, latencia, modo="lote")
+        tokens = getattr(completion.usage, "total_tokens", 0) or 0
+        respostas = parsear_resposta_lote(completion.choices[0].message.content, [i for i, _, _ in lote])
+        return respostas, latencia, tokens
+    except Exception:
+        return {}, 0.0, 0
+
+
+def _aguardar_vez(limitador: LimitadorTaxa | None) -> None:
+    if limitador is not None and client is not None:
+        limitador.aguardar()
+
+
+def _obter_em_cache_lote(cache, tipo: str, clausula: str) -> Optional[Dict[str, Any]]:
+    # Um diagnóstico individual serve ao lote; o inverso não (ver VERSAO_PROMPT_LOTE)
+    em_cache = cache.obter(MODELO, VERSAO_PROMPT, tipo, clausula)
+    if em_cache is None:
+        em_cache = cache.obter(MODELO, VERSAO_PROMPT_LOTE, tipo, clausula)
+    return em_cache
+
+
+def diagnosticar_clausulas_em_lote(
+    clausulas: Sequence[Tuple[str, str]],
+    orcamento_tokens: int = ORCAMENTO_TOKENS_LOTE,
+    usar_cache: bool = True,
+    limitador: LimitadorTaxa | None = None,
+) -> List[Dict[str, Any]]:
+    """Diagnostica vários pares (tipo, cláusula) empacotando-os em poucas requisições.
+
+    Retorna um diagnóstico por par, na ordem de entrada, no mesmo formato de
+    `diagnosticar_clausula`. Cláusulas que o modelo não respondeu (resposta
+    malformada, id ausente ou erro na chamada) são refeitas individualmente.
+    Cada requisição, em lote ou individual, consome uma ficha do `limitador`.
+    """
+    resultados: List[Optional[Dict[str, Any]]] = [None] * len(clausulas)
+    cache = obter_cache_diagnosticos() if usar_cache else None
+
+    pendentes = []
+    for posicao, (tipo, clausula) in enumerate(clausulas):
+        em_cache = _obter_em_cache_lote(cache, tipo, clausula) if cache else None
+        if em_cache is not None:
+            resultados[posicao] = em_cache
+        else:
+            pendentes.append((str(posicao), tipo, clausula))
+
+    for lote in agrupar_em_lotes(pendentes, orcamento_tokens):
+        _aguardar_vez(limitador)
+        respostas, latencia, tokens = _chamar_modelo_lote(lote)
+        for id_clausula, tipo, clausula in lote:
+            resposta = respostas.get(id_clausula)
+            if resposta is None:
+                continue
+            resultados[int(id_clausula)] = resposta
+            if cache:
+                cache.gravar(
+                    MODELO, VERSAO_PROMPT_LOTE, tipo, clausula, resposta,
+                    latencia_s=latencia / len(lote), tokens=tokens // len(lote),
+                )
+
+    for posicao, (tipo, clausula) in enumerate(clausulas):
+        if resultados[posicao] is None:
+            _aguardar_vez(limitador)
+            resultados[posicao] = diagnosticar_clausula(clausula, tipo, usar_cache=usar_cache)
+    return resultados
+
+
+def criar_cliente_async() -> "AsyncOpenAI":
+    """Cria um cliente assíncrono; as repetições ficam a cargo deste módulo."""
+    if client is None:
+        raise RuntimeError(f"OpenAI client não disponível: {_OPENAI_IMPORT_ERROR}")
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY") or "sk-FAKE-KEY-FOR-DEBUG", max_retries=0)
+
+
+def _deve_repetir(exc: Exception) -> bool:
+    """Repete timeouts, falhas de conexão, 429 e 5xx; outros erros são definitivos."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        return type(exc).__name__ in {"APIConnectionError", "APITimeoutError"}
+    return status == 429 or status >= 500
+
+
+async def diagnosticar_clausula_async(
+    clausula: str,
+    tipo: str,
+    cliente_async: "AsyncOpenAI",
+    limitador: LimitadorTaxa | None = None,
+    timeout: float = TIMEOUT_CHAMADA,
+    max_tentativas: int = MAX_TENTATIVAS,
+    usar_cache: bool = True,
+) -> Dict[str, Any]:
+    """Versão assíncrona de `diagnosticar_clausula` com limite de taxa e repetições."""
+    if usar_cache:
+        em_cache = obter_cache_diagnosticos().obter(MODELO, VERSAO_PROMPT, tipo, clausula)
+        if em_cache is not None:
+            return em_cache
+
+    prompt = gerar_prompt(tipo, clausula)
+    for tentativa in range(max_tentativas):
+        if limitador is not None:
+            await limitador.adquirir()
+        try:
+            inicio = time.perf_counter()
+            completion = await asyncio.wait_for(
+                cliente_async.chat.completions.create(
+                    model=MODELO,
+                    messages=_mensagens(prompt),
+                    temperature=0.2,
+                    max_tokens=500,
+                ),
+                timeout,
+            )
+        except Exception as e:
+            if tentativa + 1 < max_tentativas and _deve_repetir(e):
+                await asyncio.sleep(atraso_com_jitter(tentativa))
+                continue
+            return {"erro": str(e) or type(e).__name__}
+
+        latencia = time.perf_counter() - inicio
+        registrar_uso_llm(MODELO, completion.usage, latencia, modo="async")
+        resultado = parsear_resposta(completion.choices[0].message.content)
+        if usar_cache:
+            tokens = getattr(completion.usage, "total_tokens", 0) or 0
+            obter_cache_diagnosticos().gravar(
+                MODELO, VERSAO_PROMPT, tipo, clausula, resultado, latencia_s=latencia, tokens=tokens
+            )
+        return resultado
+    return {"erro": "Número máximo de tentativas excedido"}
 
 
-__all__ = ["diagnosticar_clausula"]
+__all__ = [
+    "diagnosticar_clausula",
+    "diagnosticar_clausulas_em_lote",
+    "diagnosticar_clausula_async",
+    "criar_cliente_async",
+]
@@ -1,41 +1,49 @@
 # agents/interpretadores/extrator_clausulas.py
 
-import re
 from typing import List, Dict
 
+from agents.extratores.classificador_palavras import obter_classificador
+from agents.extratores.segmentador_clausulas import IndiceClausulas, indexar_clausulas
+
+
+def _normalizar(texto: str) -> str:
+    return " ".join(texto.split()).lower()
+
+
+def blocos_do_indice(indice: IndiceClausulas) -> List[Dict]:
+    """Converte o índice compartilhado de cláusulas nos blocos usados pelo revisor."""
+    return [
+        {"titulo_original": c.titulo, "conteudo": c.corpo, "texto_normalizado": c.minusculo}
+        for c in indice
+    ]
+
 
 def segmentar_por_regex(texto: str) -> List[Dict]:
     """
     Segmenta o texto do contrato em blocos com base em títulos padrão de cláusulas.
-    Usa regex para encontrar seções que começam com 'CLÁUSULA' seguida de qualquer texto.
+    Mantido por compatibilidade; a segmentação fica em `indexar_clausulas`.
     """
-    padrao = r"(CLÁUSULA\s+[A-Zªº\d\w\s\-\.]+)(.*?)(?=CLÁUSULA\s+[A-Zªº\d\w\s\-\.]+|\Z)"
-    matches = re.finditer(padrao, texto, re.IGNORECASE | re.DOTALL)
-
-    blocos = []
-    for m in matches:
-        titulo = m.group(1).strip().replace("\n", " ")
-        conteudo = m.group(2).strip()
-        blocos.append({
-            "titulo_original": titulo,
-            "conteudo": conteudo
-        })
-    return blocos
+    return blocos_do_indice(indexar_clausulas(texto))
 
 
 def classificar_clausulas(blocos: List[Dict]) -> List[Dict]:
     """
     Classifica cada bloco segmentado em um tipo jurídico básico, com heurística + fallback.
+    `palavras_chave` traz as palavras que definiram o tipo e suas posições no
+    texto normalizado (título + conteúdo, minúsculas, espaços colapsados).
     """
+    classificador = obter_classificador("clausulas")
     resultado = []
     for bloco in blocos:
-        texto = bloco["titulo_original"] + " " + bloco["conteudo"]
-        tipo = classificar_tipo_clausula(texto)
+        texto = bloco.get("texto_normalizado") or _normalizar(bloco["titulo_original"] + " " + bloco["conteudo"])
+        tipo, ocorrencias = classificador.classificar_com_evidencias(texto)
+        tipo = tipo or "OUTROS"
         resultado.append({
             "tipo_clausula": tipo,
             "titulo_original": bloco["titulo_original"],
             "conteudo": bloco["conteudo"],
-            "confianca": 0.90 if tipo != "OUTROS" else 0.65
+            "confianca": 0.90 if tipo != "OUTROS" else 0.65,
+            "palavras_chave": [{"palavra": o.palavra, "inicio": o.inicio} for o in ocorrencias],
         })
     return resultado
 
@@ -43,28 +51,6 @@ def classificar_clausulas(blocos: List[Dict]) -> List[Dict]:
 def classificar_tipo_clausula(texto: str) -> str:
     """
     Classifica o tipo da cláusula com base em palavras-chave. Pode ser substituído por LLM.
+    A prioridade entre tipos é a ordem do perfil "clausulas" em `palavras_chave.json`.
     """
-    texto_lower = texto.lower()
-
-    if "objeto" in texto_lower or "escopo" in texto_lower:
-        return "OBJETO"
-    if "prazo" in texto_lower or "vigência" in texto_lower:
-        return "PRAZO"
-    if "pagamento" in texto_lower or "remuneração" in texto_lower or "preço" in texto_lower:
-        return "PAGAMENTO"
-    if "multa" in texto_lower or "penalidade" in texto_lower:
-        return "MULTA"
-    if "rescisão" in texto_lower or "rescindir" in texto_lower:
-        return "RESCISAO"
-    if "foro" in texto_lower:
-        return "FORO"
-    if "sigilo" in texto_lower or "confidencialidade" in texto_lower:
-        return "CONFIDENCIALIDADE"
-    if "obrigações do contratado" in texto_lower:
-        return "OBRIGACOES_CONTRATADO"
-    if "obrigações do contratante" in texto_lower:
-        return "OBRIGACOES_CONTRATANTE"
-    if "disposições gerais" in texto_lower:
-        return "DISPOSICOES_GERAIS"
-
-    return "OUTROS"
+    return obter_classificador("clausulas").classificar(_normalizar(texto)) or "OUTROS"
@@ -0,0 +1,62 @@
+# coding: utf-8
+"""Controle de vazão para chamadas ao LLM: token bucket e backoff com jitter."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+
+
+class LimitadorTaxa:
+    """Token bucket compartilhável entre threads e event loops.
+
+    Repõe `taxa_por_segundo` fichas por segundo até `capacidade`; cada
+    requisição consome uma ficha e aguarda (`adquirir` no event loop, `aguardar`
+    na thread) quando o balde está vazio. A seção crítica não faz `await`, por isso um `threading.Lock`
+    basta e o mesmo limitador vale para pipelines em threads diferentes.
+    """
+
+    def __init__(self, taxa_por_segundo: float, capacidade: float | None = None) -> None:
+        if taxa_por_segundo <= 0:
+            raise ValueError("A taxa do limitador deve ser positiva")
+        self.taxa = taxa_por_segundo
+        self.capacidade = capacidade or max(1.0, taxa_por_segundo)
+        self._fichas = self.capacidade
+        self._atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reservar(self, fichas: float) -> float:
+        """Consome fichas se houver; caso contrário, retorna quanto esperar."""
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.capacidade, self._fichas + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            if self._fichas >= fichas:
+                self._fichas -= fichas
+                return 0.0
+            return (fichas - self._fichas) / self.taxa
+
+    async def adquirir(self, fichas: float = 1.0) -> None:
+        while True:
+            espera = self._reservar(fichas)
+            if espera <= 0:
+                return
+            await asyncio.sleep(espera)
+
+    def aguardar(self, fichas: float = 1.0) -> None:
+        """Versão bloqueante de `adquirir`, para chamadas síncronas ao modelo."""
+        while True:
+            espera = self._reservar(fichas)
+            if espera <= 0:
+                return
+            time.sleep(espera)
+
+
+def atraso_com_jitter(tentativa: int, base: float = 1.0, teto: float = 30.0) -> float:
+    """Backoff exponencial com "full jitter": uniforme em [0, min(teto, base * 2^tentativa)]."""
+    return random.uniform(0, min(teto, base * (2 ** tentativa)))
+
+
+__all__ = ["LimitadorTaxa", "atraso_com_jitter"]
@@ -0,0 +1,335 @@
+# coding: utf-8
+"""Índice MinHash/LSH de cláusulas quase duplicadas entre contratos.
+
+Boa parte do volume são variações de poucos modelos: a mesma cláusula de FORO
+ou de CONFIDENCIALIDADE com outra cidade ou outra empresa. O cache do LLM só
+acerta textos idênticos; este índice encontra a cláusula parecida já
+diagnosticada e devolve o diagnóstico guardado (comentário e risco), sem nova
+chamada ao modelo.
+
+O texto é normalizado com as entidades do contrato mascaradas (empresas e
+pessoas do NER, CNPJs do varredor de padrões viram um marcador) e sem
+acentos, e vira um conjunto de shingles de caracteres. A assinatura MinHash
+estima a similaridade de Jaccard entre conjuntos; as bandas do LSH (tabela
+SQLite WITHOUT ROWID) limitam a comparação aos candidatos prováveis.
+
+Poucos caracteres mudam o sentido de uma cláusula sem mudar muito os
+shingles, então a similaridade sozinha não basta. Duas guardas precisam
+coincidir exatamente além dela:
+- os números: uma multa de 2% nunca reaproveita a análise de uma multa de 20%;
+- as palavras de polaridade e escopo, em ordem (não, sem, vedado, salvo,
+  exceto, determinado/indeterminado, papéis das partes): "não se obrigam"
+  não reaproveita "obrigam-se", nem "CONTRATADA pagará à CONTRATANTE" o
+  inverso.
+
+Cada registro pertence a um espaço (versão do modelo/prompt, tipo da
+cláusula), de modo que mudar o prompt invalida os reaproveitamentos antigos.
+LUNGHIN_QUASE_DUPLICATAS=0 desliga o índice.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CAMINHO_PADRAO = Path(
+    os.getenv("LUNGHIN_QUASE_DUPLICATAS_DB")
+    or Path(__file__).resolve().parents[2] / "cache" / "quase_duplicatas.sqlite3"
+)
+ATIVO = os.getenv("LUNGHIN_QUASE_DUPLICATAS", "1") != "0"
+LIMIAR_PADRAO = float(os.getenv("LUNGHIN_QUASE_DUPLICATAS_LIMIAR", "0.85"))
+MAX_REGISTROS_PADRAO = int(os.getenv("LUNGHIN_QUASE_DUPLICATAS_MAX", "100000"))
+
+TAMANHO_SHINGLE = 5
+NUM_PERMUTACOES = 128
+# 32 bandas de 4 linhas: pares com similaridade 0,85 viram candidatos com
+# probabilidade > 99,9%; pares abaixo de 0,4 raramente chegam à comparação
+BANDAS = 32
+LINHAS_POR_BANDA = NUM_PERMUTACOES // BANDAS
+MAX_CANDIDATOS = 200
+TAMANHO_ORIGEM = 200
+
+_PRIMO = np.uint64((1 << 61) - 1)
+_MASCARA_32 = np.uint64((1 << 32) - 1)
+# Semente fixa: as assinaturas gravadas precisam ser comparáveis entre processos
+_GERADOR = np.random.RandomState(20240601)
+_COEF_A = _GERADOR.randint(1, (1 << 61) - 1, NUM_PERMUTACOES, dtype=np.uint64)
+_COEF_B = _GERADOR.randint(0, (1 << 61) - 1, NUM_PERMUTACOES, dtype=np.uint64)
+
+# Rótulos de entidade (graph_builder) trocados pelo marcador '@'
+ROTULOS_MASCARADOS = frozenset({"EMPRESA", "PESSOA", "CNPJ"})
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9%@]+")
+_NUMERO = re.compile(r"\d+(?:[.,]\d+)*")
+# Sobre o texto normalizado (minúsculas, sem acentos)
+_MARCA = re.compile(
+    r"\b(?:nao|sem|nunca|nem|nenhum|nenhuma|vedad[ao]s?|proibid[ao]s?|salvo|exceto|excetuad[ao]s?"
+    r"|ressalvad[ao]s?|determinad[ao]s?|indeterminad[ao]s?|contratantes?|contratad[ao]s?"
+    r"|locador(?:a|es|as)?|locatari[ao]s?|cedentes?|cessionari[ao]s?|fiador(?:a|es|as)?)\b"
+)
+
+# Registros gravados com outra normalização ou outras guardas não são comparáveis
+VERSAO_ESQUEMA = 2
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    id INTEGER PRIMARY KEY,
+    espaco TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    numeros TEXT NOT NULL,
+    marcas TEXT NOT NULL,
+    assinatura BLOB NOT NULL,
+    origem TEXT NOT NULL,
+    resultado TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    UNIQUE (espaco, hash)
+);
+CREATE INDEX IF NOT EXISTS idx_registros_criacao ON registros (criado_em);
+CREATE TABLE IF NOT EXISTS bandas (
+    espaco TEXT NOT NULL,
+    chave INTEGER NOT NULL,
+    registro INTEGER NOT NULL,
+    PRIMARY KEY (espaco, chave, registro)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_bandas_registro ON bandas (registro);
+"""
+
+
+def termos_mascarados(entidades: Sequence[Dict[str, Any]]) -> Tuple[str, ...]:
+    """Textos das entidades a mascarar (ver ROTULOS_MASCARADOS), sem repetição."""
+    return tuple(
+        sorted({e["texto"] for e in entidades if e.get("label") in ROTULOS_MASCARADOS and e.get("texto")})
+    )
+
+
+def _mascarar(texto: str, termos: Sequence[str]) -> str:
+    if not termos:
+        return texto
+    # Mais longos primeiro: "ACME LTDA" antes de "ACME"
+    alternativas = (r"\s+".join(map(re.escape, t.split())) for t in sorted(termos, key=len, reverse=True))
+    return re.sub(r"(?<!\w)(?:" + "|".join(alternativas) + r")(?!\w)", "@", texto, flags=re.IGNORECASE)
+
+
+def normalizar_para_similaridade(texto: str, termos: Sequence[str] = ()) -> str:
+    """Minúsculas, sem acentos nem pontuação e com os `termos` (entidades) trocados por '@'."""
+    mascarado = _mascarar(texto or "", termos)
+    sem_acentos = unicodedata.normalize("NFKD", mascarado).encode("ascii", "ignore").decode("ascii")
+    return " ".join(_NAO_ALFANUMERICO.sub(" ", sem_acentos.lower()).split())
+
+
+def assinatura_minhash(normalizado: str) -> Optional[np.ndarray]:
+    """Assinatura MinHash (uint32[NUM_PERMUTACOES]) dos shingles do texto normalizado."""
+    if len(normalizado) < TAMANHO_SHINGLE:
+        return None
+    shingles = {normalizado[i : i + TAMANHO_SHINGLE] for i in range(len(normalizado) - TAMANHO_SHINGLE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("ascii")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # Permutações (a*x + b) mod p; o estouro de uint64 é deliberado e determinístico
+    permutados = ((hashes[:, None] * _COEF_A + _COEF_B) % _PRIMO) & _MASCARA_32
+    return permutados.min(axis=0).astype(np.uint32)
+
+
+def _chaves_bandas(assinatura: np.ndarray) -> List[int]:
+    linhas = assinatura.reshape(BANDAS, LINHAS_POR_BANDA)
+    return [
+        int.from_bytes(
+            hashlib.blake2b(banda.to_bytes(1, "little") + linhas[banda].tobytes(), digest_size=8).digest(),
+            "little",
+            signed=True,
+        )
+        for banda in range(BANDAS)
+    ]
+
+
+def _numeros(texto: str) -> str:
+    return "|".join(_NUMERO.findall(texto or ""))
+
+
+def _marcas(normalizado: str) -> str:
+    return "|".join(_MARCA.findall(normalizado))
+
+
+@dataclass(frozen=True)
+class Reaproveitamento:
+    resultado: Dict[str, Any]
+    similaridade: float
+    registro: int
+    origem: str
+
+    def marcador(self) -> Dict[str, Any]:
+        """Registro do reaproveitamento para a saída do pipeline."""
+        return {"similaridade": round(self.similaridade, 3), "registro": self.registro, "origem": self.origem}
+
+
+@dataclass(frozen=True)
+class _Consulta:
+    espaco: str
+    hash: str
+    numeros: str
+    marcas: str
+    assinatura: np.ndarray
+    chaves: List[int]
+
+
+class IndiceQuaseDuplicatas:
+    def __init__(
+        self,
+        caminho: Path | str = CAMINHO_PADRAO,
+        limiar: float = LIMIAR_PADRAO,
+        max_registros: int = MAX_REGISTROS_PADRAO,
+    ) -> None:
+        self.caminho = str(caminho)
+        self.limiar = limiar
+        self.max_registros = max_registros
+        self._lock = threading.Lock()
+        if self.caminho != ":memory:":
+            Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        if self._conexao.execute("PRAGMA user_version").fetchone()[0] != VERSAO_ESQUEMA:
+            # É um cache: registros de outro esquema são descartados, não migrados
+            self._conexao.executescript("DROP TABLE IF EXISTS registros; DROP TABLE IF EXISTS bandas;")
+            self._conexao.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        self._conexao.executescript(_ESQUEMA)
+
+    @staticmethod
+    def _consulta(versao: str, tipo: str, texto: str, termos: Sequence[str]) -> Optional[_Consulta]:
+        normalizado = normalizar_para_similaridade(texto, termos)
+        assinatura = assinatura_minhash(normalizado)
+        if assinatura is None:
+            return None
+        return _Consulta(
+            espaco=f"{versao}:{tipo}",
+            hash=hashlib.sha256(normalizado.encode("ascii")).hexdigest(),
+            # Sem os números das entidades mascaradas (CNPJ)
+            numeros=_numeros(normalizado),
+            marcas=_marcas(normalizado),
+            assinatura=assinatura,
+            chaves=_chaves_bandas(assinatura),
+        )
+
+    def buscar(
+        self, versao: str, itens: Sequence[Tuple[str, str]], termos: Sequence[str] = ()
+    ) -> List[Optional[Reaproveitamento]]:
+        """Para cada (tipo, texto), o registro mais parecido acima do limiar, ou None.
+
+        `termos` são as entidades do contrato a mascarar (ver `termos_mascarados`).
+        """
+        consultas = [self._consulta(versao, tipo, texto, termos) for tipo, texto in itens]
+        encontrados: List[Optional[Reaproveitamento]] = []
+        marcadores = ",".join("?" * BANDAS)
+        with self._lock:
+            for consulta in consultas:
+                if consulta is None:
+                    encontrados.append(None)
+                    continue
+                linhas = self._conexao.execute(
+                    "SELECT id, assinatura FROM registros WHERE id IN ("
+                    f"SELECT registro FROM bandas WHERE espaco = ? AND chave IN ({marcadores})"
+                    ") AND numeros = ? AND marcas = ? LIMIT ?",
+                    (consulta.espaco, *consulta.chaves, consulta.numeros, consulta.marcas, MAX_CANDIDATOS),
+                ).fetchall()
+                encontrados.append(self._melhor(consulta, linhas))
+        return encontrados
+
+    def _melhor(self, consulta: _Consulta, linhas: List[tuple]) -> Optional[Reaproveitamento]:
+        if not linhas:
+            return None
+        assinaturas = np.stack([np.frombuffer(linha[1], dtype=np.uint32) for linha in linhas])
+        similaridades = (assinaturas == consulta.assinatura).mean(axis=1)
+        melhor = int(similaridades.argmax())
+        if similaridades[melhor] < self.limiar:
+            return None
+        registro = linhas[melhor][0]
+        origem, resultado = self._conexao.execute(
+            "SELECT origem, resultado FROM registros WHERE id = ?", (registro,)
+        ).fetchone()
+        return Reaproveitamento(json.loads(resultado), float(similaridades[melhor]), registro, origem)
+
+    def registrar(
+        self, versao: str, itens: Sequence[Tuple[str, str, Dict[str, Any]]], termos: Sequence[str] = ()
+    ) -> int:
+        """Grava (tipo, texto, resultado); textos já registrados no espaço são ignorados."""
+        agora = time.time()
+        gravados = 0
+        with self._lock, self._conexao:
+            for tipo, texto, resultado in itens:
+                consulta = self._consulta(versao, tipo, texto, termos)
+                if consulta is None:
+                    continue
+                cursor = self._conexao.execute(
+                    "INSERT OR IGNORE INTO registros "
+                    "(espaco, hash, numeros, marcas, assinatura, origem, resultado, criado_em) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        consulta.espaco,
+                        consulta.hash,
+                        consulta.numeros,
+                        consulta.marcas,
+                        consulta.assinatura.tobytes(),
+                        " ".join(texto.split())[:TAMANHO_ORIGEM],
+                        json.dumps(resultado, ensure_ascii=False, default=str),
+                        agora,
+                    ),
+                )
+                if cursor.rowcount == 0:
+                    continue
+                self._conexao.executemany(
+                    "INSERT OR IGNORE INTO bandas VALUES (?, ?, ?)",
+                    ((consulta.espaco, chave, cursor.lastrowid) for chave in consulta.chaves),
+                )
+                gravados += 1
+            if gravados:
+                self._remover_excedente()
+        return gravados
+
+    def _remover_excedente(self) -> None:
+        total = self._conexao.execute("SELECT COUNT(*) FROM registros").fetchone()[0]
+        if total > self.max_registros:
+            # Remove um lote de 10% dos mais antigos para não pagar a limpeza a cada gravação
+            excedente = total - self.max_registros + max(1, self.max_registros // 10)
+            removidos = self._conexao.execute(
+                "SELECT id FROM registros ORDER BY criado_em LIMIT ?", (excedente,)
+            ).fetchall()
+            self._conexao.executemany("DELETE FROM bandas WHERE registro = ?", removidos)
+            self._conexao.executemany("DELETE FROM registros WHERE id = ?", removidos)
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "registros": self._conexao.execute("SELECT COUNT(*) FROM registros").fetchone()[0],
+                "bandas": self._conexao.execute("SELECT COUNT(*) FROM bandas").fetchone()[0],
+            }
+
+
+_INDICE: Optional[IndiceQuaseDuplicatas] = None
+_INDICE_LOCK = threading.Lock()
+
+
+def obter_indice_quase_duplicatas() -> IndiceQuaseDuplicatas:
+    global _INDICE
+    with _INDICE_LOCK:
+        if _INDICE is None:
+            _INDICE = IndiceQuaseDuplicatas()
+        return _INDICE
+
+
+__all__ = [
+    "ATIVO",
+    "Reaproveitamento",
+    "IndiceQuaseDuplicatas",
+    "termos_mascarados",
+    "normalizar_para_similaridade",
+    "assinatura_minhash",
+    "obter_indice_quase_duplicatas",
+]
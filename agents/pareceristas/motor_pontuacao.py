@@ -0,0 +1,215 @@
+# coding: utf-8
+"""
+Motor de pontuação de cláusulas orientado por tabela.
+
+As regras ficam em `regras_pontuacao.json` (ou no arquivo em
+LUNGHIN_REGRAS_PONTUACAO): para cada tipo de cláusula, uma lista ordenada de
+regras; vence a primeira cuja condição vale e seus campos (risco, qualidade,
+justificativa) sobrescrevem os do `padrao`. A condição combina `alguma` (ao
+menos uma das palavras no texto em minúsculas) e `todas` (todas as palavras);
+regra sem condição é o caso "senão". Tipos sem regras recebem o padrão.
+
+As regras são compiladas uma vez em:
+- listas de verificações `in` por tipo, para pontuar uma cláusula isolada;
+- matrizes palavras x regras, para pontuar um lote: a presença das palavras
+  vira uma matriz textos x palavras e todas as regras do lote são avaliadas
+  com dois produtos de matrizes.
+
+O arquivo é relido quando sua data de modificação muda (verificada no máximo
+a cada LUNGHIN_REGRAS_VERIFICAR_S segundos). Um arquivo inválido é registrado
+no log e as regras anteriores continuam valendo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from monitoring.logs import obter_logger, registrar_evento
+
+CAMINHO_REGRAS = Path(
+    os.getenv("LUNGHIN_REGRAS_PONTUACAO", Path(__file__).with_name("regras_pontuacao.json"))
+)
+INTERVALO_VERIFICACAO_S = float(os.getenv("LUNGHIN_REGRAS_VERIFICAR_S", "2"))
+
+_CAMPOS = ("risco", "qualidade", "justificativa")
+_CONDICOES = ("alguma", "todas")
+
+_logger = obter_logger("pontuacao")
+
+
+@dataclass(frozen=True)
+class Regra:
+    tipo: str
+    alguma: Tuple[str, ...]
+    todas: Tuple[str, ...]
+    risco: int
+    qualidade: int
+    justificativa: str
+
+    def aplica(self, texto: str) -> bool:
+        """`texto` já em minúsculas."""
+        if self.alguma and not any(p in texto for p in self.alguma):
+            return False
+        return all(p in texto for p in self.todas)
+
+    def pontuacao(self) -> Dict[str, Any]:
+        return {"risco": self.risco, "qualidade": self.qualidade, "justificativa": self.justificativa}
+
+
+class MotorPontuacao:
+    """Regras de pontuação compiladas a partir da tabela (ver docstring do módulo)."""
+
+    def __init__(self, tabela: Dict[str, Any]) -> None:
+        padrao = tabela.get("padrao") or {}
+        faltantes = [c for c in _CAMPOS if c not in padrao]
+        if faltantes:
+            raise ValueError(f"Pontuação padrão sem os campos: {', '.join(faltantes)}")
+        self.padrao: Dict[str, Any] = {c: padrao[c] for c in _CAMPOS}
+        # Identifica o conteúdo das regras (muda a cada edição do arquivo)
+        self.versao = hashlib.sha256(
+            json.dumps(tabela, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+
+        self.regras: Dict[str, Tuple[Regra, ...]] = {}
+        for tipo, regras in (tabela.get("regras") or {}).items():
+            compiladas = []
+            for regra in regras:
+                desconhecidos = set(regra) - set(_CAMPOS) - set(_CONDICOES)
+                if desconhecidos:
+                    raise ValueError(f"Regra de {tipo} com campos desconhecidos: {', '.join(sorted(desconhecidos))}")
+                campos = {**self.padrao, **{c: regra[c] for c in _CAMPOS if c in regra}}
+                compiladas.append(
+                    Regra(
+                        tipo=tipo,
+                        alguma=tuple(p.lower() for p in regra.get("alguma", ())),
+                        todas=tuple(p.lower() for p in regra.get("todas", ())),
+                        **campos,
+                    )
+                )
+            self.regras[tipo] = tuple(compiladas)
+        self._compilar_matrizes()
+
+    def _compilar_matrizes(self) -> None:
+        regras = [r for rs in self.regras.values() for r in rs]
+        self._palavras = tuple(sorted({p for r in regras for p in (*r.alguma, *r.todas)}))
+        coluna = {p: j for j, p in enumerate(self._palavras)}
+        self._codigo_tipo = {tipo: i for i, tipo in enumerate(self.regras)}
+        # Colunas que interessam a cada tipo: só essas são verificadas no texto
+        self._colunas_tipo = {
+            tipo: [coluna[p] for p in sorted({p for r in rs for p in (*r.alguma, *r.todas)})]
+            for tipo, rs in self.regras.items()
+        }
+
+        self._alguma = np.zeros((len(self._palavras), len(regras)), dtype=np.int32)
+        self._todas = np.zeros((len(self._palavras), len(regras)), dtype=np.int32)
+        for k, regra in enumerate(regras):
+            for p in regra.alguma:
+                self._alguma[coluna[p], k] = 1
+            for p in regra.todas:
+                self._todas[coluna[p], k] = 1
+        self._sem_alguma = np.array([not r.alguma for r in regras], dtype=bool)
+        self._n_todas = self._todas.sum(axis=0)
+        self._tipo_regra = np.array([self._codigo_tipo[r.tipo] for r in regras], dtype=np.int32)
+        self._pontuacoes = [r.pontuacao() for r in regras]
+
+    def pontuar(self, conteudo: str, tipo: str) -> Dict[str, Any]:
+        texto = conteudo.lower()
+        for regra in self.regras.get(tipo, ()):
+            if regra.aplica(texto):
+                return regra.pontuacao()
+        return dict(self.padrao)
+
+    def presenca(self, itens: Sequence[Tuple[str, str]]) -> np.ndarray:
+        """Matriz textos x palavras (0/1) com as palavras das regras do tipo de cada item."""
+        matriz = np.zeros((len(itens), len(self._palavras)), dtype=np.int32)
+        for i, (conteudo, tipo) in enumerate(itens):
+            colunas = self._colunas_tipo.get(tipo)
+            if colunas:
+                texto = conteudo.lower()
+                for j in colunas:
+                    if self._palavras[j] in texto:
+                        matriz[i, j] = 1
+        return matriz
+
+    def pontuar_lote(self, itens: Sequence[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Pontua pares (conteúdo, tipo) de uma vez; mesmo resultado de `pontuar` item a item."""
+        if not self._pontuacoes:
+            return [dict(self.padrao) for _ in itens]
+        presenca = self.presenca(itens)
+        alguma = ((presenca @ self._alguma) > 0) | self._sem_alguma
+        todas = (presenca @ self._todas) >= self._n_todas
+        codigos = np.array([self._codigo_tipo.get(tipo, -1) for _, tipo in itens], dtype=np.int32)
+        aplicaveis = alguma & todas & (codigos[:, None] == self._tipo_regra)
+        # As regras de um tipo são contíguas e em ordem: a primeira verdadeira é a que vale
+        vencedoras = np.where(aplicaveis.any(axis=1), aplicaveis.argmax(axis=1), -1)
+        return [dict(self._pontuacoes[k]) if k >= 0 else dict(self.padrao) for k in vencedoras.tolist()]
+
+
+def carregar_regras(caminho: Path | str = CAMINHO_REGRAS) -> MotorPontuacao:
+    with open(caminho, encoding="utf-8") as f:
+        return MotorPontuacao(json.load(f))
+
+
+_lock = threading.Lock()
+_motor: Optional[MotorPontuacao] = None
+_modificado_em: Optional[int] = None
+_verificado_em = 0.0
+
+
+def _recarregar_se_modificado(forcar: bool) -> MotorPontuacao:
+    global _motor, _modificado_em, _verificado_em
+    _verificado_em = time.monotonic()
+    try:
+        modificado_em = os.stat(CAMINHO_REGRAS).st_mtime_ns
+    except OSError:
+        if _motor is None or forcar:
+            raise
+        _logger.warning("Arquivo de regras de pontuação inacessível: %s", CAMINHO_REGRAS)
+        return _motor
+    if _motor is not None and modificado_em == _modificado_em and not forcar:
+        return _motor
+    try:
+        motor = carregar_regras(CAMINHO_REGRAS)
+    except (OSError, ValueError) as e:
+        if _motor is None or forcar:
+            raise
+        # Não tenta de novo até a próxima modificação do arquivo
+        _modificado_em = modificado_em
+        _logger.warning("Regras de pontuação inválidas em %s; mantendo as anteriores: %s", CAMINHO_REGRAS, e)
+        return _motor
+    _motor, _modificado_em = motor, modificado_em
+    registrar_evento(_logger, "regras_pontuacao_carregadas", caminho=str(CAMINHO_REGRAS), versao=motor.versao)
+    return motor
+
+
+def obter_motor_pontuacao() -> MotorPontuacao:
+    """Motor compilado das regras atuais, relido se o arquivo mudou."""
+    motor = _motor
+    if motor is not None and time.monotonic() - _verificado_em < INTERVALO_VERIFICACAO_S:
+        return motor
+    with _lock:
+        return _recarregar_se_modificado(forcar=False)
+
+
+def recarregar_regras_pontuacao() -> MotorPontuacao:
+    """Relê o arquivo agora; levanta o erro se ele for inválido."""
+    with _lock:
+        return _recarregar_se_modificado(forcar=True)
+
+
+__all__ = [
+    "Regra",
+    "MotorPontuacao",
+    "carregar_regras",
+    "obter_motor_pontuacao",
+    "recarregar_regras_pontuacao",
+]
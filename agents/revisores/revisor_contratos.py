@@ -8,14 +8,15 @@ pontuação de risco, e validação de coerência jurídica.
 
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 from agents.pareceristas.lawlinker import justificar_clausula
 from agents.validadores.clause_correlator import verificar_dependencias
+from agents.extratores.segmentador_clausulas import IndiceClausulas, indexar_clausulas
 from agents.interpretadores.extrator_clausulas import (
-    segmentar_por_regex,
+    blocos_do_indice,
     classificar_clausulas,
 )
-from agents.pareceristas.clause_scorer import pontuar_clausula
+from agents.pareceristas.clause_scorer import pontuar_clausula, pontuar_clausulas
 # from agents.validadores.clause_correlator import verificar_dependencias
 
 # Cláusulas consideradas obrigatórias para um contrato de prestação de serviços
@@ -30,47 +31,41 @@ MANDATORY_CLAUSES = [
 ]
 
 
-def revisar_contrato(texto_contrato: str) -> Dict:
-    """
-    Realiza a revisão completa do contrato textual:
-    - Extrai cláusulas
-    - Classifica tipos
-    - Identifica faltantes
-    - Aponta riscos e inconsistências com pontuação simbólica
+def parecer_da_clausula(clausula: Dict, pontuacao: Optional[Dict] = None) -> Dict:
+    """Pontuação e base legal de uma cláusula já classificada.
+
+    `pontuacao` já calculada (ex.: por `pareceres_das_clausulas`) dispensa `pontuar_clausula`.
     """
+    tipo = clausula["tipo_clausula"]
+    if pontuacao is None:
+        pontuacao = pontuar_clausula(clausula["conteudo"], tipo)
+    base_legal = justificar_clausula(tipo)
+    return {
+        "tipo": tipo,
+        "risco": pontuacao["risco"],
+        "qualidade": pontuacao["qualidade"],
+        "justificativa": pontuacao["justificativa"],
+        "base_legal": base_legal["justificativa"],
+        "fonte": base_legal["fonte"],
+    }
 
-    # Etapa 1: Segmentar e classificar cláusulas
-    blocos = segmentar_por_regex(texto_contrato)
-    clausulas = classificar_clausulas(blocos)
+
+def pareceres_das_clausulas(clausulas: List[Dict]) -> List[Dict]:
+    """`parecer_da_clausula` de cada cláusula, com a pontuação de todas calculada em lote."""
+    pontuacoes = pontuar_clausulas([(c["conteudo"], c["tipo_clausula"]) for c in clausulas])
+    return [parecer_da_clausula(c, p) for c, p in zip(clausulas, pontuacoes)]
+
+
+def compilar_parecer(clausulas: List[Dict], parecer_por_clausula: List[Dict]) -> Dict:
+    """Parecer técnico a partir das cláusulas classificadas e de seus pareceres individuais."""
     clausulas_index = {c["tipo_clausula"]: c for c in clausulas}
 
-    # Etapa 2: Verificar cláusulas obrigatórias ausentes
+    # Cláusulas obrigatórias ausentes
     faltantes = [cl for cl in MANDATORY_CLAUSES if cl not in clausulas_index]
 
-    # Etapa 3: Pontuar cada cláusula e vincular justificativa legal
-    parecer_por_clausula = []
-    for clausula in clausulas:
-        tipo = clausula["tipo_clausula"]
-        conteudo = clausula["conteudo"]
-
-        pontuacao = pontuar_clausula(conteudo, tipo)
-        base_legal = justificar_clausula(tipo)
-
-        parecer_por_clausula.append(
-            {
-                "tipo": tipo,
-                "risco": pontuacao["risco"],
-                "qualidade": pontuacao["qualidade"],
-                "justificativa": pontuacao["justificativa"],
-                "base_legal": base_legal["justificativa"],
-                "fonte": base_legal["fonte"],
-            }
-        )
-
-    # Etapa 4: (futura) Correlação jurídica entre cláusulas
-    correlacoes = verificar_dependencias(clausulas_index)  # verificar_dependencias(clausulas_index)
-
-    # Etapa 5: Compilar parecer
+    # (futura) Correlação jurídica entre cláusulas
+    correlacoes = verificar_dependencias(clausulas_index)
+
     return {
         "clausulas_detectadas": [c["tipo_clausula"] for c in clausulas],
         "clausulas_faltantes": faltantes,
@@ -80,4 +75,24 @@ def revisar_contrato(texto_contrato: str) -> Dict:
     }
 
 
-__all__ = ["revisar_contrato"]
+def revisar_contrato(texto_contrato: str, indice: Optional[IndiceClausulas] = None) -> Dict:
+    """
+    Realiza a revisão completa do contrato textual:
+    - Extrai cláusulas
+    - Classifica tipos
+    - Identifica faltantes
+    - Aponta riscos e inconsistências com pontuação simbólica
+
+    `indice` reaproveita a segmentação já feita no pipeline.
+    """
+
+    # Etapa 1: Segmentar e classificar cláusulas
+    if indice is None:
+        indice = indexar_clausulas(texto_contrato)
+    clausulas = classificar_clausulas(blocos_do_indice(indice))
+
+    # Etapas 2 a 5: pontuar cada cláusula, vincular a base legal e compilar o parecer
+    return compilar_parecer(clausulas, pareceres_das_clausulas(clausulas))
+
+
+__all__ = ["revisar_contrato", "parecer_da_clausula", "pareceres_das_clausulas", "compilar_parecer"]
@@ -1,21 +1,43 @@
-import re
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence
+
+from agents.extratores.segmentador_clausulas import IndiceClausulas
+from agents.extratores.varredor_padroes import Ocorrencia, campos_em_branco
+
+FORA_DE_CLAUSULA = "PREÂMBULO"
+
+
+def localizar_campos_em_branco(texto: str) -> List[Ocorrencia]:
+    """Campos em branco com tipo e posição (início/fim) no texto."""
+    return campos_em_branco(texto)
+
 
 def detectar_campos_em_branco(texto: str) -> List[str]:
     """
     Detecta campos típicos não preenchidos em contratos.
     Retorna lista de ocorrências como placeholders, campos rasurados, tracinhos ou marcadores.
     """
-    padroes = [
-        r"___+",                          # Tracinhos
-        r"X{3,}",                         # Placeholder tipo XXX
-        r"\( ?[Xx] ?\)",                  # Opções em aberto (checkbox)
-        r"\[MNg\d+\]",                    # Comentários internos como [MNg2]
-        r"[A-Z ]{3,}[:：] ?_+",           # Campos do tipo "NOME: ____"
-        r"\bFORO\b.*_+",                  # Cláusula de foro em branco
-        r"R\$ ?_+",                       # Valores não definidos
-    ]
-    encontrados = []
-    for padrao in padroes:
-        encontrados.extend(re.findall(padrao, texto))
-    return encontrados
+    return [o.texto for o in campos_em_branco(texto)]
+
+
+def campos_em_branco_por_clausula(
+    indice: IndiceClausulas, ocorrencias: Optional[Sequence[Ocorrencia]] = None
+) -> List[Dict[str, Any]]:
+    """Campos em branco agrupados pela cláusula onde aparecem, na ordem do texto.
+
+    Cada grupo traz o título e a `posicao` da cláusula no índice (None no
+    preâmbulo): cláusulas diferentes com o mesmo título ficam em grupos
+    separados. `ocorrencias` evita varrer o texto de novo quando já se tem
+    `campos_em_branco(indice.texto)`.
+    """
+    if ocorrencias is None:
+        ocorrencias = campos_em_branco(indice.texto)
+    grupos: Dict[Optional[int], Dict[str, Any]] = {}
+    for ocorrencia in ocorrencias:
+        clausula = indice.clausula_em(ocorrencia.inicio)
+        posicao = clausula.posicao if clausula is not None else None
+        grupo = grupos.get(posicao)
+        if grupo is None:
+            titulo = clausula.titulo if clausula is not None else FORA_DE_CLAUSULA
+            grupo = grupos[posicao] = {"clausula": titulo, "posicao": posicao, "campos": []}
+        grupo["campos"].append(ocorrencia.texto)
+    return list(grupos.values())
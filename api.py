@@ -1,36 +1,255 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
 import os
-import uuid
+from typing import List, Optional
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 load_dotenv()
 
 
-from crew.juriscrew import run_pipeline  # Certifique-se que isso existe ou crie um mock por enquanto
+from crew.juriscrew import run_pipeline, run_pipeline_incremental  # Certifique-se que isso existe ou crie um mock por enquanto
+from crew.reanalise import obter_repositorio_analises
+from agents.exportadores.relatorios_sob_demanda import (
+    ERRO as ERRO_RELATORIO,
+    PRONTO,
+    RENDERIZANDO,
+    obter_gerenciador_relatorios,
+)
+from agents.extratores.graph_builder import obter_grafo
+from agents.extratores.indice_invertido import LIMITE_PADRAO, obter_indice_invertido
+from agents.extratores.modelos_nlp import aquecer_modelos
+from agents.ingestores.ocr_pool import OCRIndisponivel, iniciar_pool_ocr, encerrar_pool_ocr
+from monitoring.dashboard import exportar_prometheus
+from monitoring.logs import configurar_logs, obter_logger
+from backend.controllers.pipeline_controller import CONCLUIDO, ERRO, FilaCheia, GerenciadorJobs
+from backend.controllers.resposta_controller import MODOS, RespostaJson, projetar_resultado
+from backend.controllers.upload_controller import (
+    LimiteCorpoMiddleware,
+    UploadMuitoGrande,
+    UploadSalvo,
+    remover_upload,
+    salvar_upload_em_streaming,
+)
 
-app = FastAPI()
+GZIP_TAMANHO_MINIMO = int(os.getenv("LUNGHIN_GZIP_TAMANHO_MINIMO", "1024"))
 
+app = FastAPI(default_response_class=RespostaJson)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_TAMANHO_MINIMO)
+app.add_middleware(LimiteCorpoMiddleware)
+jobs = GerenciadorJobs(run_pipeline)
+_logger = obter_logger("api")
 
-@app.post("/executar-pipeline")
-async def executar_pipeline(documento: UploadFile = File(...)):
+
+@app.on_event("startup")
+def iniciar_logs():
+    configurar_logs()
+
+
+@app.on_event("startup")
+def aquecer_modelos_nlp():
+    # Carrega o spaCy antes da primeira requisição
+    aquecer_modelos()
+
+
+@app.on_event("startup")
+def iniciar_motores_ocr():
+    # Os motores PaddleOCR carregam seus modelos fora do caminho da requisição.
+    # A espera é limitada: sem OCR a API sobe e só os PDFs escaneados falham.
     try:
-        # Cria um caminho temporário para salvar o arquivo
-        extensao = documento.filename.split(".")[-1]
-        nome_temp = f"temp_{uuid.uuid4()}.{extensao}"
-        caminho_arquivo = os.path.join("temp_uploads", nome_temp)
+        iniciar_pool_ocr()
+    except TimeoutError:
+        _logger.warning("Motores de OCR ainda carregando; a API sobe sem esperá-los")
+    except OCRIndisponivel as e:
+        _logger.error("OCR indisponível: %s", e)
+
+
+@app.on_event("shutdown")
+def encerrar_motores_ocr():
+    encerrar_pool_ocr()
+
 
-        # Garante que o diretório existe
-        os.makedirs("temp_uploads", exist_ok=True)
+@app.on_event("shutdown")
+def encerrar_jobs():
+    jobs.encerrar(aguardar=False)
 
-        # Salva o arquivo
-        with open(caminho_arquivo, "wb") as f:
-            f.write(await documento.read())
 
-        # Executa o pipeline principal
-        resultado = run_pipeline(caminho_arquivo)
+@app.on_event("shutdown")
+def encerrar_relatorios():
+    obter_gerenciador_relatorios().encerrar(aguardar=False)
 
-        # Retorna o resultado em JSON
-        return JSONResponse(content=resultado)
 
+def _resposta_resultado(resultado: dict, modo: Optional[str], campos: Optional[str]) -> RespostaJson:
+    # A API não renderiza o PDF no pipeline; o cliente que quiser o baixa depois
+    resultado = {**resultado, "relatorio_url": f"/relatorio/{resultado['graph_id']}"}
+    try:
+        projetado = projetar_resultado(resultado, modo, campos.split(",") if campos else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RespostaJson(content=projetado)
+
+
+async def _salvar_upload(documento: UploadFile) -> UploadSalvo:
+    # O corpo acima do limite já é recusado pelo LimiteCorpoMiddleware; aqui
+    # sobra o arquivo que cabe na margem do multipart mas passa do limite
+    try:
+        return await salvar_upload_em_streaming(documento)
+    except UploadMuitoGrande as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metricas():
+    return PlainTextResponse(exportar_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/jobs", status_code=202)
+async def criar_job(documento: UploadFile = File(...)):
+    upload = await _salvar_upload(documento)
+    try:
+        job = jobs.submeter(
+            upload.caminho,
+            ao_finalizar=lambda job: remover_upload(job.caminho_arquivo),
+            hash_conteudo=upload.sha256,
+            gerar_pdf=False,
+            nome=upload.nome_original,
+        )
+    except FilaCheia as e:
+        remover_upload(upload.caminho)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+def status_job(job_id: str):
+    job = jobs.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job.resumo()
+
+
+@app.get("/jobs/{job_id}/resultado")
+def resultado_job(job_id: str, modo: Optional[str] = None, campos: Optional[str] = None):
+    job = jobs.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job.status == ERRO:
+        raise HTTPException(status_code=500, detail=f"Erro ao executar pipeline: {job.erro}")
+    if job.status != CONCLUIDO:
+        return JSONResponse(status_code=202, content=job.resumo())
+    return _resposta_resultado(job.resultado, modo, campos)
+
+
+@app.get("/grafos/{graph_id}")
+def consultar_grafo(graph_id: str):
+    grafo = obter_grafo(graph_id)
+    if grafo is None:
+        raise HTTPException(status_code=404, detail="Grafo não encontrado")
+    return {"graph_id": graph_id, **grafo}
+
+
+def _ler_em_blocos(arquivo, tamanho: int = 64 * 1024):
+    with arquivo:
+        while True:
+            bloco = arquivo.read(tamanho)
+            if not bloco:
+                return
+            yield bloco
+
+
+@app.get("/relatorio/{graph_id}")
+def baixar_relatorio(graph_id: str):
+    gerenciador = obter_gerenciador_relatorios()
+    estado = gerenciador.solicitar(graph_id)
+    if estado is not None and estado.status == PRONTO:
+        try:
+            # Aberto aqui: a limpeza pode apagar o PDF em seguida, mas não o descritor já aberto
+            arquivo = open(estado.caminho, "rb")
+        except FileNotFoundError:
+            # Apagado entre a solicitação e a abertura: agenda uma nova renderização
+            estado = gerenciador.solicitar(graph_id)
+        else:
+            return StreamingResponse(
+                _ler_em_blocos(arquivo),
+                media_type="application/pdf",
+                headers={
+                    "Content-Disposition": f'attachment; filename="relatorio_{graph_id}.pdf"',
+                    "Content-Length": str(os.fstat(arquivo.fileno()).st_size),
+                },
+            )
+    if estado is None:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado")
+    if estado.status == ERRO_RELATORIO:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {estado.erro}")
+    return JSONResponse(
+        status_code=202,
+        content={"graph_id": graph_id, "status": RENDERIZANDO},
+        headers={"Retry-After": "2"},
+    )
+
+
+@app.get("/contratos/busca")
+def buscar_contratos(
+    entidade: List[str] = Query([], description="LABEL:valor, ex.: CNPJ:12.345.678/0001-90"),
+    clausula: List[str] = Query([], description="tipo de cláusula presente"),
+    sem_clausula: List[str] = Query([], description="tipo de cláusula ausente"),
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=1000),
+):
+    pares = []
+    for criterio in entidade:
+        label, separador, valor = criterio.partition(":")
+        if not separador or not valor.strip():
+            raise HTTPException(status_code=400, detail=f"Entidade inválida (use LABEL:valor): {criterio}")
+        pares.append((label.strip().upper(), valor))
+    indice = obter_indice_invertido()
+    try:
+        contratos = indice.buscar(pares, clausula, sem_clausula, limite)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    resposta = {"quantidade": len(contratos), "contratos": contratos}
+    if clausula or sem_clausula:
+        # Contratos indexados com outra tabela de tipos podem faltar no resultado
+        resposta["desatualizados"] = indice.desatualizados()
+    return resposta
+
+
+@app.post("/executar-pipeline")
+async def executar_pipeline(
+    documento: UploadFile = File(...),
+    modo: Optional[str] = Query(None, description="completo (padrão), sem_texto, parecer ou resumo"),
+    campos: Optional[str] = Query(None, description="lista de campos separados por vírgula"),
+    analise_anterior: Optional[str] = Query(None, description="graph_id da versão anterior do contrato"),
+    versionado: bool = Query(False, description="guarda o estado por cláusula para reanálises futuras"),
+):
+    if modo is not None and modo not in MODOS:
+        raise HTTPException(status_code=400, detail=f"Modo desconhecido: {modo} (use {', '.join(MODOS)})")
+    if analise_anterior is not None and not obter_repositorio_analises().existe(analise_anterior):
+        raise HTTPException(status_code=404, detail=f"Análise anterior não encontrada: {analise_anterior}")
+    upload = await _salvar_upload(documento)
+    try:
+        # Executa o pipeline principal fora do event loop
+        if analise_anterior is not None or versionado:
+            resultado = await run_in_threadpool(
+                run_pipeline_incremental,
+                upload.caminho,
+                analise_anterior,
+                hash_conteudo=upload.sha256,
+                gerar_pdf=False,
+                nome=upload.nome_original,
+            )
+        else:
+            resultado = await run_in_threadpool(
+                run_pipeline,
+                upload.caminho,
+                hash_conteudo=upload.sha256,
+                gerar_pdf=False,
+                nome=upload.nome_original,
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao executar pipeline: {str(e)}")
+    finally:
+        remover_upload(upload.caminho)
+
+    # Retorna o resultado em JSON, apenas com os campos pedidos
+    return _resposta_resultado(resultado, modo, campos)
@@ -0,0 +1,160 @@
+# coding: utf-8
+"""Execução assíncrona do pipeline em jobs.
+
+A API enfileira o documento e devolve um id de job na hora; um pool limitado
+de threads executa `run_pipeline` fora do event loop. O estado de cada job
+(fila, execução, etapas concluídas, resultado ou erro) fica disponível para
+consulta. Quando fila e trabalhadores estão ocupados, `submeter` levanta
+`FilaCheia` para que a API responda 429.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+MAX_TRABALHADORES = int(os.getenv("LUNGHIN_JOBS_TRABALHADORES", "2"))
+MAX_FILA = int(os.getenv("LUNGHIN_JOBS_MAX_FILA", "20"))
+MAX_JOBS_RETIDOS = int(os.getenv("LUNGHIN_JOBS_RETIDOS", "1000"))
+
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+
+class FilaCheia(Exception):
+    """Não há vaga na fila de jobs."""
+
+
+@dataclass
+class Job:
+    id: str
+    caminho_arquivo: str
+    status: str = NA_FILA
+    etapas: Dict[str, str] = field(default_factory=dict)
+    criado_em: float = field(default_factory=time.time)
+    iniciado_em: Optional[float] = None
+    concluido_em: Optional[float] = None
+    resultado: Optional[Dict[str, Any]] = None
+    erro: Optional[str] = None
+
+    def resumo(self) -> Dict[str, Any]:
+        """Estado do job sem o resultado, para consultas de acompanhamento."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "etapas": dict(self.etapas),
+            "criado_em": self.criado_em,
+            "iniciado_em": self.iniciado_em,
+            "concluido_em": self.concluido_em,
+            "erro": self.erro,
+        }
+
+
+class GerenciadorJobs:
+    """Fila limitada de jobs executados por um pool fixo de threads."""
+
+    def __init__(
+        self,
+        executar: Callable[..., Dict[str, Any]],
+        max_trabalhadores: int = MAX_TRABALHADORES,
+        max_fila: int = MAX_FILA,
+        max_retidos: int = MAX_JOBS_RETIDOS,
+    ) -> None:
+        self._executar = executar
+        self._executor = ThreadPoolExecutor(max_workers=max_trabalhadores, thread_name_prefix="lunghin-job")
+        # Vagas = jobs em execução + jobs aguardando
+        self._vagas = threading.BoundedSemaphore(max_trabalhadores + max_fila)
+        self._max_retidos = max_retidos
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submeter(
+        self,
+        caminho_arquivo: str,
+        ao_finalizar: Optional[Callable[[Job], None]] = None,
+        **kwargs: Any,
+    ) -> Job:
+        if not self._vagas.acquire(blocking=False):
+            raise FilaCheia("Fila de processamento cheia")
+        job = Job(id=str(uuid.uuid4()), caminho_arquivo=caminho_arquivo)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._descartar_antigos()
+        try:
+            futuro = self._executor.submit(self._rodar, job, ao_finalizar, kwargs)
+        except Exception:
+            self._vagas.release()
+            raise
+        # Um job cancelado ainda na fila (encerrar sem aguardar) nunca chega a
+        # `_rodar`; o callback libera a vaga e executa `ao_finalizar` por ele.
+        futuro.add_done_callback(lambda f: self._cancelado(job, ao_finalizar) if f.cancelled() else None)
+        return job
+
+    def _rodar(self, job: Job, ao_finalizar: Optional[Callable[[Job], None]], kwargs: Dict[str, Any]) -> None:
+        job.status = EXECUTANDO
+        job.iniciado_em = time.time()
+
+        def progresso(etapa: str, estado: str) -> None:
+            job.etapas[etapa] = estado
+
+        try:
+            job.resultado = self._executar(job.caminho_arquivo, progresso=progresso, **kwargs)
+            job.status = CONCLUIDO
+        except Exception as exc:
+            job.erro = str(exc)
+            job.status = ERRO
+        finally:
+            self._finalizar(job, ao_finalizar)
+
+    def _cancelado(self, job: Job, ao_finalizar: Optional[Callable[[Job], None]]) -> None:
+        job.erro = "Job cancelado no encerramento do servidor"
+        job.status = ERRO
+        self._finalizar(job, ao_finalizar)
+
+    def _finalizar(self, job: Job, ao_finalizar: Optional[Callable[[Job], None]]) -> None:
+        job.concluido_em = time.time()
+        self._vagas.release()
+        if ao_finalizar is not None:
+            try:
+                ao_finalizar(job)
+            except Exception:
+                pass
+
+    def _descartar_antigos(self) -> None:
+        """Esquece os jobs finalizados mais antigos acima do limite de retenção."""
+        excedente = len(self._jobs) - self._max_retidos
+        if excedente <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.status in (CONCLUIDO, ERRO)][:excedente]:
+            del self._jobs[job_id]
+
+    def obter(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def profundidade_fila(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.status == NA_FILA)
+
+    def encerrar(self, aguardar: bool = True) -> None:
+        """Encerra o pool; sem `aguardar`, os jobs na fila terminam em ERRO."""
+        self._executor.shutdown(wait=aguardar, cancel_futures=not aguardar)
+
+
+__all__ = [
+    "FilaCheia",
+    "Job",
+    "GerenciadorJobs",
+    "NA_FILA",
+    "EXECUTANDO",
+    "CONCLUIDO",
+    "ERRO",
+]
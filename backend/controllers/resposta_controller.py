@@ -0,0 +1,83 @@
+# coding: utf-8
+"""Projeção e serialização dos resultados do pipeline nas respostas da API.
+
+O resultado completo traz o texto integral do contrato, que em documentos
+longos domina o tamanho da resposta e quase nunca é usado pelo cliente. Por
+padrão a resposta continua completa; os modos escolhem um conjunto menor de
+campos, `campos` permite pedir uma lista explícita e LUNGHIN_RESPOSTA_MODO
+troca o modo padrão da instalação. A serialização usa orjson quando instalado (opcional) e, sem ele,
+o `json` da biblioteca padrão no formato compacto.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+MODO_COMPLETO = "completo"
+MODO_SEM_TEXTO = "sem_texto"
+MODO_PADRAO = os.getenv("LUNGHIN_RESPOSTA_MODO", MODO_COMPLETO)
+
+_CAMPOS_POR_MODO: Dict[str, Tuple[str, ...]] = {
+    "parecer": ("status", "graph_id", "parecer_tecnico", "parecer_final", "relatorio_url"),
+    "resumo": (
+        "status",
+        "graph_id",
+        "tipo_entrada",
+        "parecer_final",
+        "campos_em_branco",
+        "relatorio_url",
+        "revisao",
+        "tempos_etapas",
+    ),
+}
+MODOS: Tuple[str, ...] = (MODO_COMPLETO, MODO_SEM_TEXTO, *_CAMPOS_POR_MODO)
+
+
+def projetar_resultado(
+    resultado: Dict[str, Any],
+    modo: Optional[str] = None,
+    campos: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """Subconjunto do resultado para a resposta.
+
+    `campos` (lista explícita) tem precedência sobre `modo`. Levanta
+    ValueError para modos ou campos desconhecidos.
+    """
+    if campos is not None:
+        campos = [c.strip() for c in campos if c.strip()]
+        desconhecidos = [c for c in campos if c not in resultado]
+        if desconhecidos:
+            raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+        return {c: resultado[c] for c in campos}
+
+    modo = modo or MODO_PADRAO
+    if modo == MODO_COMPLETO:
+        return resultado
+    if modo == MODO_SEM_TEXTO:
+        return {c: v for c, v in resultado.items() if c != "texto"}
+    if modo not in _CAMPOS_POR_MODO:
+        raise ValueError(f"Modo desconhecido: {modo} (use {', '.join(MODOS)})")
+    return {c: resultado[c] for c in _CAMPOS_POR_MODO[modo] if c in resultado}
+
+
+class RespostaJson(JSONResponse):
+    """JSONResponse compacta, com orjson quando disponível."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str
+        ).encode("utf-8")
+
+
+__all__ = ["MODO_COMPLETO", "MODO_SEM_TEXTO", "MODO_PADRAO", "MODOS", "projetar_resultado", "RespostaJson"]
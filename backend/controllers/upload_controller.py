@@ -0,0 +1,146 @@
+# coding: utf-8
+"""Recebimento de uploads em streaming.
+
+O arquivo é gravado em disco em blocos de tamanho fixo, com o limite de
+tamanho verificado à medida que os bytes chegam e o SHA-256 calculado na
+mesma passagem (usado como chave pelo cache de ingestão). A memória por
+requisição fica limitada a um bloco, qualquer que seja o tamanho do upload;
+as gravações rodam no threadpool, fora do event loop.
+
+O Starlette lê o corpo multipart inteiro (para um arquivo temporário) antes
+de o endpoint rodar, então o limite também é aplicado antes disso, pelo
+`LimiteCorpoMiddleware`: ele conta os bytes do corpo conforme chegam, com ou
+sem Content-Length (uploads chunked), e interrompe a leitura com 413.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+DIRETORIO_UPLOADS = "temp_uploads"
+TAMANHO_BLOCO = 1024 * 1024
+TAMANHO_MAXIMO = int(os.getenv("LUNGHIN_UPLOAD_MAX_MB", "50")) * 1024 * 1024
+# Cabeçalhos e delimitadores do multipart além do arquivo em si
+MARGEM_MULTIPART = 64 * 1024
+
+_MENSAGEM_413 = "Arquivo excede o tamanho máximo permitido"
+
+
+class UploadMuitoGrande(Exception):
+    """O upload excedeu o tamanho máximo permitido."""
+
+
+class LimiteCorpoMiddleware:
+    """Middleware ASGI que recusa com 413 corpos de requisição acima de `limite` bytes."""
+
+    def __init__(self, app, limite: int = TAMANHO_MAXIMO + MARGEM_MULTIPART) -> None:
+        self.app = app
+        self.limite = limite
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        declarado = dict(scope["headers"]).get(b"content-length", b"")
+        if declarado.isdigit() and int(declarado) > self.limite:
+            await self._recusar(scope, receive, send)
+            return
+
+        recebidos = 0
+
+        async def receber():
+            nonlocal recebidos
+            mensagem = await receive()
+            if mensagem["type"] == "http.request":
+                recebidos += len(mensagem.get("body", b""))
+                if recebidos > self.limite:
+                    # HTTPException atravessa o parser do FastAPI e vira a resposta 413
+                    raise HTTPException(status_code=413, detail=_MENSAGEM_413)
+            return mensagem
+
+        await self.app(scope, receber, send)
+
+    async def _recusar(self, scope, receive, send) -> None:
+        await JSONResponse({"detail": _MENSAGEM_413}, status_code=413)(scope, receive, send)
+
+
+def _gravar_bloco(arquivo, sha, bloco: bytes) -> None:
+    sha.update(bloco)
+    arquivo.write(bloco)
+
+
+@dataclass
+class UploadSalvo:
+    caminho: str
+    tamanho: int
+    sha256: str
+    # Nome enviado pelo cliente, sem diretórios nem extensão (o arquivo em disco é temp_<uuid>)
+    nome_original: Optional[str] = None
+
+
+def _nome_original(filename: Optional[str]) -> Optional[str]:
+    # Alguns clientes mandam o caminho completo, inclusive com barras do Windows
+    nome = PurePosixPath((filename or "").replace("\\", "/")).stem.strip()
+    return nome or None
+
+
+async def salvar_upload_em_streaming(
+    documento: UploadFile,
+    diretorio: str = DIRETORIO_UPLOADS,
+    tamanho_maximo: int = TAMANHO_MAXIMO,
+    tamanho_bloco: int = TAMANHO_BLOCO,
+) -> UploadSalvo:
+    """Grava o upload em disco bloco a bloco, calculando o hash no caminho.
+
+    Levanta `UploadMuitoGrande` assim que o limite é ultrapassado; nesse caso
+    (ou em qualquer outra falha) o arquivo parcial é removido.
+    """
+    extensao = os.path.splitext(documento.filename or "")[1].lower()
+    caminho = os.path.join(diretorio, f"temp_{uuid.uuid4()}{extensao}")
+    os.makedirs(diretorio, exist_ok=True)
+
+    sha = hashlib.sha256()
+    tamanho = 0
+    try:
+        with open(caminho, "wb") as f:
+            while True:
+                bloco = await documento.read(tamanho_bloco)
+                if not bloco:
+                    break
+                tamanho += len(bloco)
+                if tamanho > tamanho_maximo:
+                    raise UploadMuitoGrande(
+                        f"Arquivo excede o limite de {tamanho_maximo // (1024 * 1024)} MB"
+                    )
+                await run_in_threadpool(_gravar_bloco, f, sha, bloco)
+    except BaseException:
+        remover_upload(caminho)
+        raise
+    return UploadSalvo(
+        caminho=caminho, tamanho=tamanho, sha256=sha.hexdigest(), nome_original=_nome_original(documento.filename)
+    )
+
+
+def remover_upload(caminho: str) -> None:
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+__all__ = [
+    "LimiteCorpoMiddleware",
+    "UploadMuitoGrande",
+    "UploadSalvo",
+    "salvar_upload_em_streaming",
+    "remover_upload",
+]
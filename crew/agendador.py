@@ -0,0 +1,132 @@
+# coding: utf-8
+"""
+Executor de etapas do pipeline organizado como grafo de dependências (DAG).
+
+Cada etapa declara os valores que consome (entradas) e os que produz
+(saídas). Uma etapa é disparada assim que todas as suas entradas existem, de
+modo que etapas independentes rodam em paralelo em threads e a latência total
+fica limitada pelo caminho crítico, não pela soma das etapas.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from monitoring.dashboard import medir_etapa
+
+# Recebe (etapa, estado): "executando", "concluida" ou "erro"
+Progresso = Callable[[str, str], None]
+
+
+@dataclass(frozen=True)
+class Etapa:
+    nome: str
+    funcao: Callable[..., Any]
+    entradas: Tuple[str, ...] = ()
+    saidas: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        if not self.saidas:
+            object.__setattr__(self, "saidas", (self.nome,))
+
+
+@dataclass
+class ResultadoDag:
+    valores: Dict[str, Any]
+    tempos: Dict[str, float] = field(default_factory=dict)
+
+
+def _validar(etapas: Sequence[Etapa], disponiveis: Iterable[str]) -> None:
+    """Garante saídas únicas, entradas satisfeitas e ausência de ciclos."""
+    produtores: Dict[str, str] = {}
+    for etapa in etapas:
+        for saida in etapa.saidas:
+            if saida in produtores:
+                raise ValueError(f"'{saida}' é produzido por '{produtores[saida]}' e '{etapa.nome}'")
+            produtores[saida] = etapa.nome
+
+    conhecidos = set(disponiveis)
+    restantes = list(etapas)
+    while restantes:
+        prontas = [e for e in restantes if all(x in conhecidos for x in e.entradas)]
+        if not prontas:
+            faltando = {x for e in restantes for x in e.entradas if x not in conhecidos}
+            raise ValueError(f"Dependências não satisfeitas ou ciclo entre etapas: {sorted(faltando)}")
+        for etapa in prontas:
+            conhecidos.update(etapa.saidas)
+            restantes.remove(etapa)
+
+
+def _executar_etapa(etapa: Etapa, valores: Dict[str, Any]) -> Tuple[Any, float]:
+    with medir_etapa(etapa.nome):
+        inicio = time.perf_counter()
+        retorno = etapa.funcao(*(valores[nome] for nome in etapa.entradas))
+        return retorno, time.perf_counter() - inicio
+
+
+def executar_dag(
+    etapas: Sequence[Etapa],
+    valores_iniciais: Optional[Dict[str, Any]] = None,
+    max_paralelo: int = 4,
+    progresso: Optional[Progresso] = None,
+) -> ResultadoDag:
+    """Executa as etapas respeitando as dependências e mede o tempo de cada uma.
+
+    Etapas cujas saídas já constam em `valores_iniciais` são puladas. Etapas
+    com várias saídas devem retornar uma tupla na ordem declarada. Se alguma
+    etapa falhar, nenhuma outra é iniciada e a exceção é propagada.
+    """
+    valores: Dict[str, Any] = dict(valores_iniciais or {})
+    pendentes: List[Etapa] = [e for e in etapas if not all(s in valores for s in e.saidas)]
+    _validar(pendentes, valores)
+
+    resultado = ResultadoDag(valores=valores)
+    em_execucao: Dict[Future, Etapa] = {}
+    notificar = progresso or (lambda etapa, estado: None)
+
+    with ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix="lunghin-etapa") as executor:
+        while pendentes or em_execucao:
+            for etapa in [e for e in pendentes if all(x in valores for x in e.entradas)]:
+                pendentes.remove(etapa)
+                notificar(etapa.nome, "executando")
+                em_execucao[executor.submit(_executar_etapa, etapa, dict(valores))] = etapa
+
+            concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                etapa = em_execucao.pop(futuro)
+                try:
+                    retorno, duracao = futuro.result()
+                except Exception:
+                    notificar(etapa.nome, "erro")
+                    for outro in em_execucao:
+                        outro.cancel()
+                    raise
+                if len(etapa.saidas) == 1:
+                    valores[etapa.saidas[0]] = retorno
+                else:
+                    valores.update(zip(etapa.saidas, retorno))
+                resultado.tempos[etapa.nome] = duracao
+                notificar(etapa.nome, "concluida")
+    return resultado
+
+
+def caminho_critico(etapas: Sequence[Etapa], tempos: Dict[str, float]) -> Tuple[List[str], float]:
+    """Retorna a sequência de etapas mais lenta do DAG e sua duração total."""
+    produtor = {s: e for e in etapas for s in e.saidas}
+    melhor: Dict[str, Tuple[float, List[str]]] = {}
+
+    def custo(etapa: Etapa) -> Tuple[float, List[str]]:
+        if etapa.nome not in melhor:
+            anteriores = [custo(produtor[x]) for x in etapa.entradas if x in produtor]
+            base = max(anteriores, default=(0.0, []), key=lambda c: c[0])
+            melhor[etapa.nome] = (base[0] + tempos.get(etapa.nome, 0.0), base[1] + [etapa.nome])
+        return melhor[etapa.nome]
+
+    total, caminho = max((custo(e) for e in etapas), default=(0.0, []), key=lambda c: c[0])
+    return caminho, total
+
+
+__all__ = ["Etapa", "ResultadoDag", "executar_dag", "caminho_critico"]
@@ -3,36 +3,58 @@
 Orquestrador principal do pipeline jurídico.
 
 Este módulo centraliza as chamadas de cada agente do pipeline para que o
-processo possa ser executado de forma encadeada e modular. O pipeline
+processo possa ser executado de forma encadeada e modular. As etapas são
+declaradas com suas dependências e executadas pelo agendador de
+`crew.agendador`, que roda em paralelo as etapas independentes. O pipeline
 atualmente conta com:
 - Agente de ingestão
 - Agente de construção de grafo
 - Agente revisor técnico
 - Agente parecerista
-- Agente exportador (PDF)
+- Agente exportador (PDF, no pipeline ou sob demanda)
 """
 
 import json
+import logging
+import os
 from pathlib import Path
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 load_dotenv()
 
 from agents.ingestores.ingestor import processar_documento
-from agents.extratores.graph_builder import construir_grafo
+from agents.extratores.graph_builder import construir_grafo, criar_grafo, gerar_relacoes
 from agents.revisores.revisor_contratos import revisar_contrato
 from agents.pareceristas.parecerista import produzir_parecer
-from agents.exportadores.relatorio_pdf import gerar_relatorio_pdf
-from agents.interpretadores.avaliador_llm import avaliar_clausulas_com_llm
-from agents.validadores.detector_campos import detectar_campos_em_branco  # NOVO
+from agents.exportadores.relatorios_sob_demanda import obter_gerenciador_relatorios
+from agents.interpretadores.avaliador_llm import avaliar_clausulas
+from agents.validadores.detector_campos import campos_em_branco_por_clausula  # NOVO
+from agents.extratores.varredor_padroes import campos_em_branco
+from agents.extratores.segmentador_clausulas import IndiceClausulas, indexar_clausulas
+from agents.extratores.indice_invertido import indexar_resultado
+from crew.agendador import Etapa, Progresso, caminho_critico, executar_dag
+from crew.reanalise import obter_repositorio_analises, reanalisar
+from monitoring.logs import obter_logger, registrar_evento
 
-def executar_ingestao(caminho_arquivo: str) -> dict:
-    return processar_documento(caminho_arquivo)
+MAX_ETAPAS_PARALELAS = int(os.getenv("LUNGHIN_ETAPAS_PARALELAS", "4"))
 
-def executar_graph_builder(texto: str) -> dict:
-    return construir_grafo(texto)
+_logger = obter_logger("pipeline")
 
-def executar_revisor(texto: str) -> dict:
-    return revisar_contrato(texto)
+def executar_ingestao(caminho_arquivo: str, hash_conteudo: Optional[str] = None) -> dict:
+    return processar_documento(caminho_arquivo, hash_conteudo=hash_conteudo)
+
+def executar_segmentacao(texto: str) -> IndiceClausulas:
+    return indexar_clausulas(texto)
+
+def executar_graph_builder(texto: str, indice: Optional[IndiceClausulas] = None) -> dict:
+    return construir_grafo(texto, indice)
+
+def executar_revisor(texto: str, indice: Optional[IndiceClausulas] = None) -> dict:
+    return revisar_contrato(texto, indice)
+
+def executar_detector_campos(indice: IndiceClausulas) -> tuple:
+    ocorrencias = campos_em_branco(indice.texto)
+    return [o.texto for o in ocorrencias], campos_em_branco_por_clausula(indice, ocorrencias)
 
 def executar_parecerista(entidades: list, relacoes: list, parecer: dict) -> dict:
     return produzir_parecer(entidades, relacoes, parecer)
@@ -43,33 +65,182 @@ def executar_exportador(
     parecer_tecnico: dict,
     parecer_final: dict,
     avaliacoes_llm: list,
-) -> str:
-    return gerar_relatorio_pdf(dados_ingestao, grafo, parecer_tecnico, parecer_final, avaliacoes_llm)
+    gerar_pdf: bool = True,
+) -> Optional[str]:
+    # Os dados ficam registrados de qualquer forma; sem `gerar_pdf`, o PDF sai
+    # sob demanda (GET /relatorio/{graph_id}) e não pesa no tempo do pipeline
+    relatorios = obter_gerenciador_relatorios()
+    relatorios.registrar(dados_ingestao, grafo, parecer_tecnico, parecer_final, avaliacoes_llm)
+    return relatorios.renderizar(grafo["graph_id"]) if gerar_pdf else None
 
-def run_pipeline(caminho_arquivo: str) -> dict:
-    print("🚀 Iniciando pipeline")
-    dados_ingestao = executar_ingestao(caminho_arquivo)
-    print("✅ Etapa 1: ingestão concluída")
+def _etapas_pipeline() -> List[Etapa]:
+    """Declara as etapas do pipeline e as dependências entre elas.
 
-    grafo = executar_graph_builder(dados_ingestao["texto"])
-    print("✅ Etapa 2: grafo construído")
+    O texto ingerido é segmentado uma única vez; grafo, revisão, campos em
+    branco e avaliação LLM consomem o mesmo índice de cláusulas. O executor
+    roda em paralelo tudo o que não depende entre si.
+    """
+    return [
+        Etapa("ingestao", executar_ingestao, ("caminho_arquivo", "hash_conteudo"), ("dados_ingestao",)),
+        Etapa(
+            "segmentacao",
+            lambda d: executar_segmentacao(d["texto"]),
+            ("dados_ingestao",),
+            ("indice_clausulas",),
+        ),
+        Etapa(
+            "grafo",
+            lambda d, i: executar_graph_builder(d["texto"], i),
+            ("dados_ingestao", "indice_clausulas"),
+            ("grafo",),
+        ),
+        Etapa(
+            "revisao",
+            lambda d, i: executar_revisor(d["texto"], i),
+            ("dados_ingestao", "indice_clausulas"),
+            ("parecer_tecnico",),
+        ),
+        Etapa(
+            "campos_em_branco",
+            executar_detector_campos,
+            ("indice_clausulas",),
+            ("campos_em_branco", "campos_em_branco_por_clausula"),
+        ),
+        Etapa(
+            "avaliacao_llm",
+            lambda g, i: avaliar_clausulas(g["entidades"], indice=i),
+            ("grafo", "indice_clausulas"),
+            ("avaliacoes_llm",),
+        ),
+        Etapa(
+            "parecer",
+            lambda g, p: executar_parecerista(g["entidades"], g["relacoes"], p),
+            ("grafo", "parecer_tecnico"),
+            ("parecer_final",),
+        ),
+        Etapa(
+            "relatorio_pdf",
+            executar_exportador,
+            ("dados_ingestao", "grafo", "parecer_tecnico", "parecer_final", "avaliacoes_llm", "gerar_pdf"),
+            ("caminho_pdf",),
+        ),
+    ]
 
-    parecer_tecnico = executar_revisor(dados_ingestao["texto"])
-    print("✅ Etapa 3: revisão técnica concluída")
 
-    avaliacoes_llm = avaliar_clausulas_com_llm(grafo["entidades"])
-    print("🧠 Etapa 3.5: avaliação simbólica LLM concluída")
+def _notificador(progresso: Optional[Progresso]) -> Progresso:
+    def notificar(etapa: str, estado: str) -> None:
+        if estado == "concluida":
+            _logger.debug("Etapa %s concluída", etapa)
+        elif estado == "erro":
+            _logger.error("Etapa %s falhou", etapa)
+        if progresso is not None:
+            progresso(etapa, estado)
+    return notificar
 
-    parecer_final = executar_parecerista(grafo["entidades"], grafo["relacoes"], parecer_tecnico)
-    print("✅ Etapa 4: parecer final gerado")
 
-    campos_em_branco = detectar_campos_em_branco(dados_ingestao["texto"])
-    print(f"🕳️ Etapa 4.5: campos em branco detectados: {len(campos_em_branco)} encontrados")
+def run_pipeline(
+    caminho_arquivo: str,
+    progresso: Optional[Progresso] = None,
+    hash_conteudo: Optional[str] = None,
+    gerar_pdf: bool = True,
+    nome: Optional[str] = None,
+) -> dict:
+    """Executa o pipeline completo para um arquivo.
 
-    caminho_pdf = executar_exportador(
-        dados_ingestao, grafo, parecer_tecnico, parecer_final, avaliacoes_llm
+    Com `gerar_pdf=False` o relatório não é renderizado aqui: `relatorio_pdf`
+    vem como None e o PDF pode ser obtido depois em GET /relatorio/{graph_id}.
+    `nome` identifica o contrato no índice invertido (padrão: o nome do
+    arquivo sem extensão); uploads da API passam o nome original, não o do
+    arquivo temporário.
+    """
+    _logger.info("Iniciando pipeline para %s", caminho_arquivo)
+    return _executar_etapas(
+        {"caminho_arquivo": caminho_arquivo, "hash_conteudo": hash_conteudo, "gerar_pdf": gerar_pdf, "nome": nome},
+        progresso,
+    )
+
+
+def run_pipeline_incremental(
+    caminho_arquivo: str,
+    analise_anterior: Optional[str] = None,
+    progresso: Optional[Progresso] = None,
+    hash_conteudo: Optional[str] = None,
+    gerar_pdf: bool = True,
+    nome: Optional[str] = None,
+) -> dict:
+    """Pipeline versionado: reaproveita os trechos inalterados de `analise_anterior`.
+
+    Entidades, pontuação e diagnósticos LLM só são recalculados para as
+    cláusulas novas ou alteradas (ver `crew.reanalise`). O `graph_id` do
+    resultado é o id desta análise, a ser passado na próxima versão; o
+    resultado traz em `revisao` o resumo das alterações. Levanta KeyError se
+    `analise_anterior` não existir.
+    """
+    anterior = None
+    if analise_anterior is not None:
+        anterior = obter_repositorio_analises().obter(analise_anterior)
+        if anterior is None:
+            raise KeyError(f"Análise anterior não encontrada: {analise_anterior}")
+    _logger.info("Iniciando pipeline incremental para %s (base: %s)", caminho_arquivo, analise_anterior)
+
+    dados_ingestao = executar_ingestao(caminho_arquivo, hash_conteudo)
+    indice = executar_segmentacao(dados_ingestao["texto"])
+    reanalise = reanalisar(indice, anterior)
+    relacoes = gerar_relacoes(reanalise.entidades, dados_ingestao["texto"])
+    grafo = {
+        "entidades": reanalise.entidades,
+        "relacoes": relacoes,
+        "graph_id": criar_grafo(reanalise.entidades, relacoes),
+    }
+
+    resultado = _executar_etapas(
+        {
+            "caminho_arquivo": caminho_arquivo,
+            "nome": nome,
+            "gerar_pdf": gerar_pdf,
+            "dados_ingestao": dados_ingestao,
+            "indice_clausulas": indice,
+            "grafo": grafo,
+            "parecer_tecnico": reanalise.parecer_tecnico,
+            "avaliacoes_llm": reanalise.avaliacoes_llm,
+        },
+        progresso,
+    )
+    obter_repositorio_analises().salvar(grafo["graph_id"], {"trechos": reanalise.trechos})
+    resultado["revisao"] = {
+        "analise_anterior": analise_anterior,
+        "trechos_reaproveitados": reanalise.reaproveitados,
+        "trechos_recalculados": reanalise.recalculados,
+        **reanalise.resumo,
+    }
+    return resultado
+
+
+def _executar_etapas(valores_iniciais: Dict[str, object], progresso: Optional[Progresso] = None) -> dict:
+    etapas = _etapas_pipeline()
+    execucao = executar_dag(
+        etapas,
+        valores_iniciais,
+        max_paralelo=MAX_ETAPAS_PARALELAS,
+        progresso=_notificador(progresso),
+    )
+    valores = execucao.valores
+    dados_ingestao = valores["dados_ingestao"]
+    grafo = valores["grafo"]
+    parecer_tecnico = valores["parecer_tecnico"]
+    parecer_final = valores["parecer_final"]
+    avaliacoes_llm = valores["avaliacoes_llm"]
+    campos_em_branco = valores["campos_em_branco"]
+    caminho_pdf = valores["caminho_pdf"]
+
+    caminho, duracao_critica = caminho_critico(etapas, execucao.tempos)
+    registrar_evento(
+        _logger,
+        "caminho_critico",
+        caminho=caminho,
+        duracao_s=round(duracao_critica, 4),
+        soma_etapas_s=round(sum(execucao.tempos.values()), 4),
     )
-    print(f"✅ Etapa 5: relatório PDF gerado em {caminho_pdf}")
 
     resultado = {
         "status": "ok",
@@ -83,16 +254,24 @@ def run_pipeline(caminho_arquivo: str) -> dict:
         "parecer_final": parecer_final,
         "avaliacoes_llm": avaliacoes_llm,
         "campos_em_branco": campos_em_branco,
+        "campos_em_branco_por_clausula": valores["campos_em_branco_por_clausula"],
         "relatorio_pdf": str(caminho_pdf) if isinstance(caminho_pdf, Path) else caminho_pdf,
+        "tempos_etapas": {nome: round(t, 4) for nome, t in execucao.tempos.items()},
     }
 
+    # Índice invertido entre contratos; falha aqui não invalida a análise
+    caminho_arquivo = valores.get("caminho_arquivo")
+    nome = valores.get("nome") or (Path(caminho_arquivo).stem if caminho_arquivo else None)
     try:
-        print("📦 Resultado final:")
-        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        indexar_resultado(resultado, nome=nome)
     except Exception as e:
-        print(f"❌ Erro ao serializar JSON final: {e}")
+        _logger.warning("Falha ao atualizar o índice de contratos: %s", e)
+
+    # Serializar o resultado inteiro custa caro em contratos longos; só em DEBUG
+    if _logger.isEnabledFor(logging.DEBUG):
+        _logger.debug("Resultado final: %s", json.dumps(resultado, ensure_ascii=False, default=str))
 
     return resultado
 
 
-__all__ = ["run_pipeline"]
+__all__ = ["run_pipeline", "run_pipeline_incremental"]
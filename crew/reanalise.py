@@ -0,0 +1,260 @@
+# coding: utf-8
+"""
+Reanálise incremental de versões revisadas de um contrato.
+
+O contrato é dividido em trechos (preâmbulo + cláusulas do índice
+compartilhado, o mesmo de `segmentar_por_regex` e `segmentar_clausulas`) e
+cada trecho é identificado pelo SHA-256 do texto normalizado. Na versão nova,
+trechos cujo hash já existia na análise anterior reaproveitam entidades,
+pontuação (`pontuar_clausula`) e diagnóstico LLM; só os trechos novos ou
+alterados passam por NER, pontuação e LLM. O custo de uma rodada de revisão
+passa a depender do tamanho da alteração, não do contrato.
+
+O estado por trecho de cada análise fica em SQLite (LUNGHIN_ANALISES_DB),
+indexado pelo `graph_id`, que serve de id da análise para a rodada seguinte.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agents.extratores.graph_builder import entidade_da_clausula, entidades_ner, entidades_padrao
+from agents.extratores.modelos_nlp import processar_textos
+from agents.extratores.segmentador_clausulas import Clausula, IndiceClausulas
+from agents.interpretadores.avaliador_llm import TIPOS_CRITICOS, avaliar_clausulas
+from agents.interpretadores.extrator_clausulas import blocos_do_indice, classificar_clausulas
+from agents.pareceristas.motor_pontuacao import obter_motor_pontuacao
+from agents.revisores.revisor_contratos import compilar_parecer, pareceres_das_clausulas
+from agents.validadores.detector_campos import FORA_DE_CLAUSULA
+
+CAMINHO_PADRAO = Path(
+    os.getenv("LUNGHIN_ANALISES_DB")
+    or Path(__file__).resolve().parents[1] / "cache" / "analises.sqlite3"
+)
+MAX_ANALISES_PADRAO = int(os.getenv("LUNGHIN_ANALISES_MAX", "20000"))
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS analises (
+    analise_id TEXT PRIMARY KEY,
+    dados TEXT NOT NULL,
+    criado_em REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_analises_criacao ON analises (criado_em);
+"""
+
+
+def hash_trecho(texto: str) -> str:
+    return hashlib.sha256(" ".join(texto.split()).casefold().encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class Trecho:
+    titulo: str
+    texto: str
+    hash: str
+    clausula: Optional[Clausula] = None
+
+
+def trechos_do_indice(indice: IndiceClausulas) -> List[Trecho]:
+    """Preâmbulo (texto antes da primeira cláusula, se houver) e cada cláusula."""
+    trechos: List[Trecho] = []
+    clausulas = list(indice)
+    preambulo = indice.texto[: clausulas[0].inicio] if clausulas else indice.texto
+    if preambulo.strip():
+        trechos.append(Trecho(FORA_DE_CLAUSULA, preambulo, hash_trecho(preambulo)))
+    trechos.extend(Trecho(c.titulo, c.texto, hash_trecho(c.texto), c) for c in clausulas)
+    return trechos
+
+
+@dataclass
+class Reanalise:
+    entidades: List[Dict[str, Any]]
+    parecer_tecnico: Dict[str, Any]
+    avaliacoes_llm: List[Dict[str, Any]]
+    # Estado por trecho, gravado para servir de base à próxima versão
+    trechos: List[Dict[str, Any]]
+    reaproveitados: int = 0
+    recalculados: int = 0
+    resumo: Dict[str, Any] = field(default_factory=dict)
+
+
+def resumir_alteracoes(anteriores: List[Dict[str, Any]], atuais: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cláusulas inalteradas, alteradas, novas e removidas entre duas versões."""
+    resumo: Dict[str, Any] = {"inalteradas": 0, "alteradas": [], "novas": [], "removidas": []}
+    comparador = SequenceMatcher(None, [t["hash"] for t in anteriores], [t["hash"] for t in atuais], autojunk=False)
+    for operacao, i1, i2, j1, j2 in comparador.get_opcodes():
+        if operacao == "equal":
+            resumo["inalteradas"] += i2 - i1
+            continue
+        antigas, novas = anteriores[i1:i2], atuais[j1:j2]
+        if operacao == "replace":
+            pares = min(len(antigas), len(novas))
+            resumo["alteradas"].extend(
+                {"anterior": a["titulo"], "atual": n["titulo"]} for a, n in zip(antigas[:pares], novas[:pares])
+            )
+            antigas, novas = antigas[pares:], novas[pares:]
+        resumo["removidas"].extend(t["titulo"] for t in antigas)
+        resumo["novas"].extend(t["titulo"] for t in novas)
+    return resumo
+
+
+def _critica(estado: Dict[str, Any]) -> bool:
+    entidade = estado.get("entidade_clausula")
+    return entidade is not None and entidade["label"] in TIPOS_CRITICOS
+
+
+def reanalisar(indice: IndiceClausulas, anterior: Optional[Dict[str, Any]] = None) -> Reanalise:
+    """Analisa a versão em `indice` reaproveitando os trechos inalterados de `anterior`.
+
+    Sem `anterior`, todos os trechos são analisados (primeira versão).
+    """
+    trechos = trechos_do_indice(indice)
+    disponiveis: Dict[str, List[Dict[str, Any]]] = {}
+    for estado in (anterior or {}).get("trechos", []):
+        disponiveis.setdefault(estado["hash"], []).append(estado)
+
+    versao_regras = obter_motor_pontuacao().versao
+    # Classificação e rótulo do grafo são baratos e dependem da posição; valem para todos
+    classificadas = iter(classificar_clausulas(blocos_do_indice(indice)))
+    estados: List[Dict[str, Any]] = []
+    reaproveitados = 0
+    for trecho in trechos:
+        candidatos = disponiveis.get(trecho.hash)
+        if candidatos:
+            estado = dict(candidatos.pop(0))
+            reaproveitados += 1
+            # Diagnósticos com erro não são reaproveitados; a cláusula é avaliada de novo
+            if "erro" in estado.get("avaliacao_llm", {}):
+                del estado["avaliacao_llm"]
+            # Pontuações de outra versão das regras são refeitas
+            if estado.get("versao_regras") != versao_regras:
+                estado.pop("parecer", None)
+        else:
+            estado = {"hash": trecho.hash}
+        estado["titulo"] = trecho.titulo
+        if trecho.clausula is not None:
+            estado["classificada"] = next(classificadas)
+            estado["entidade_clausula"] = entidade_da_clausula(trecho.clausula)
+        estados.append(estado)
+
+    # Daqui em diante só se calcula o que falta: NER (em lote), pontuação e LLM
+    sem_entidades = [(t, e) for t, e in zip(trechos, estados) if "ner" not in e]
+    for (trecho, estado), doc in zip(sem_entidades, processar_textos([t.texto for t, _ in sem_entidades])):
+        estado["ner"] = entidades_ner(doc)
+        estado["padrao"] = entidades_padrao(trecho.texto)
+    sem_parecer = [e for e in estados if "classificada" in e and "parecer" not in e]
+    for estado, parecer in zip(sem_parecer, pareceres_das_clausulas([e["classificada"] for e in sem_parecer])):
+        estado["parecer"] = parecer
+
+    criticas = [e for e in estados if _critica(e)]
+    pendentes = [e for e in criticas if "avaliacao_llm" not in e]
+    if pendentes:
+        # A ordem das avaliações é a das entidades enviadas
+        avaliacoes = avaliar_clausulas([e["entidade_clausula"] for e in pendentes], indice=indice)
+        for estado, avaliacao in zip(pendentes, avaliacoes):
+            estado["avaliacao_llm"] = avaliacao
+
+    entidades = [ent for e in estados for ent in e["ner"]]
+    entidades += [ent for e in estados for ent in e["padrao"]]
+    entidades += [e["entidade_clausula"] for e in estados if e.get("entidade_clausula")]
+    clausulas = [e["classificada"] for e in estados if "classificada" in e]
+    parecer_tecnico = compilar_parecer(clausulas, [e["parecer"] for e in estados if "classificada" in e])
+    avaliacoes_llm = [e["avaliacao_llm"] for e in criticas if "avaliacao_llm" in e]
+
+    persistidos = [
+        {
+            "hash": e["hash"],
+            "titulo": e["titulo"],
+            "ner": e["ner"],
+            "padrao": e["padrao"],
+            **({"parecer": e["parecer"], "versao_regras": versao_regras} if "parecer" in e else {}),
+            **({"avaliacao_llm": e["avaliacao_llm"]} if "avaliacao_llm" in e else {}),
+        }
+        for e in estados
+    ]
+    return Reanalise(
+        entidades=entidades,
+        parecer_tecnico=parecer_tecnico,
+        avaliacoes_llm=avaliacoes_llm,
+        trechos=persistidos,
+        reaproveitados=reaproveitados,
+        recalculados=len(trechos) - reaproveitados,
+        resumo=resumir_alteracoes((anterior or {}).get("trechos", []), persistidos) if anterior else {},
+    )
+
+
+class RepositorioAnalises:
+    """Estado por trecho de cada análise versionada, por id de análise."""
+
+    def __init__(self, caminho: Path | str = CAMINHO_PADRAO, max_analises: int = MAX_ANALISES_PADRAO) -> None:
+        self.caminho = str(caminho)
+        self.max_analises = max_analises
+        self._lock = threading.Lock()
+        if self.caminho != ":memory:":
+            Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(_ESQUEMA)
+
+    def salvar(self, analise_id: str, dados: Dict[str, Any]) -> None:
+        serializado = json.dumps(dados, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO analises VALUES (?, ?, ?)", (analise_id, serializado, time.time())
+            )
+            total = self._conexao.execute("SELECT COUNT(*) FROM analises").fetchone()[0]
+            if total > self.max_analises:
+                # Remove um lote de 10% das mais antigas para não pagar a limpeza a cada gravação
+                excedente = total - self.max_analises + max(1, self.max_analises // 10)
+                self._conexao.execute(
+                    "DELETE FROM analises WHERE analise_id IN "
+                    "(SELECT analise_id FROM analises ORDER BY criado_em LIMIT ?)",
+                    (excedente,),
+                )
+            self._conexao.commit()
+
+    def obter(self, analise_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT dados FROM analises WHERE analise_id = ?", (analise_id,)
+            ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def existe(self, analise_id: str) -> bool:
+        with self._lock:
+            return self._conexao.execute(
+                "SELECT 1 FROM analises WHERE analise_id = ?", (analise_id,)
+            ).fetchone() is not None
+
+
+_REPOSITORIO: Optional[RepositorioAnalises] = None
+_REPOSITORIO_LOCK = threading.Lock()
+
+
+def obter_repositorio_analises() -> RepositorioAnalises:
+    global _REPOSITORIO
+    with _REPOSITORIO_LOCK:
+        if _REPOSITORIO is None:
+            _REPOSITORIO = RepositorioAnalises()
+        return _REPOSITORIO
+
+
+__all__ = [
+    "Trecho",
+    "Reanalise",
+    "hash_trecho",
+    "trechos_do_indice",
+    "resumir_alteracoes",
+    "reanalisar",
+    "RepositorioAnalises",
+    "obter_repositorio_analises",
+]
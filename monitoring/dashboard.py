@@ -0,0 +1,263 @@
+# coding: utf-8
+"""
+Instrumentação das etapas do pipeline e exposição de métricas.
+
+`medir_etapa` registra tempo de parede, tempo de CPU da thread, aumento do
+pico de RSS e anotações da etapa (páginas, tokens...). Os valores alimentam
+histogramas no formato de exposição do Prometheus (rota `/metrics` da API) e
+um evento JSON por etapa no logger `lunghin.metricas`. Com
+LUNGHIN_INSTRUMENTACAO=0 tudo vira no-op de custo desprezível.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from monitoring.logs import obter_logger, registrar_evento
+
+INSTRUMENTACAO_ATIVA = os.getenv("LUNGHIN_INSTRUMENTACAO", "1") != "0"
+
+BALDES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+BALDES_BYTES = tuple(2 ** n * 1024 * 1024 for n in range(0, 12))  # 1 MiB .. 2 GiB
+
+# ru_maxrss é em KiB no Linux e em bytes no macOS
+_FATOR_RSS = 1 if sys.platform == "darwin" else 1024
+
+_logger = obter_logger("metricas")
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+
+def _rotulos(valores: Dict[str, Any]) -> Rotulos:
+    return tuple(sorted((k, str(v)) for k, v in valores.items()))
+
+
+def _formatar_rotulos(rotulos: Rotulos, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    escapados = (
+        f'{k}="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in pares
+    )
+    return "{" + ",".join(escapados) + "}"
+
+
+class Histograma:
+    def __init__(self, nome: str, ajuda: str, baldes: Tuple[float, ...] = BALDES_SEGUNDOS) -> None:
+        self.nome = nome
+        self.ajuda = ajuda
+        self.baldes = baldes
+        self._series: Dict[Rotulos, list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, **rotulos: Any) -> None:
+        chave = _rotulos(rotulos)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                # [contagens por balde..., soma, total]
+                serie = self._series[chave] = [0] * len(self.baldes) + [0.0, 0]
+            indice = bisect.bisect_left(self.baldes, valor)
+            if indice < len(self.baldes):
+                serie[indice] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exportar(self) -> str:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            for rotulos, serie in sorted(self._series.items()):
+                acumulado = 0
+                for limite, contagem in zip(self.baldes, serie):
+                    acumulado += contagem
+                    linhas.append(f"{self.nome}_bucket{_formatar_rotulos(rotulos, [('le', repr(float(limite)))])} {acumulado}")
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(rotulos, [('le', '+Inf')])} {serie[-1]}")
+                linhas.append(f"{self.nome}_sum{_formatar_rotulos(rotulos)} {serie[-2]}")
+                linhas.append(f"{self.nome}_count{_formatar_rotulos(rotulos)} {serie[-1]}")
+        return "\n".join(linhas)
+
+
+class Contador:
+    def __init__(self, nome: str, ajuda: str) -> None:
+        self.nome = nome
+        self.ajuda = ajuda
+        self._series: Dict[Rotulos, float] = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, valor: float = 1, **rotulos: Any) -> None:
+        chave = _rotulos(rotulos)
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+    def exportar(self) -> str:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        with self._lock:
+            for rotulos, valor in sorted(self._series.items()):
+                linhas.append(f"{self.nome}{_formatar_rotulos(rotulos)} {valor}")
+        return "\n".join(linhas)
+
+
+DURACAO_ETAPA = Histograma("lunghin_etapa_duracao_segundos", "Tempo de parede por etapa do pipeline")
+CPU_ETAPA = Histograma("lunghin_etapa_cpu_segundos", "Tempo de CPU da thread por etapa do pipeline")
+RSS_ETAPA = Histograma("lunghin_etapa_rss_delta_bytes", "Aumento do pico de RSS durante a etapa", BALDES_BYTES)
+FALHAS_ETAPA = Contador("lunghin_etapa_falhas_total", "Etapas que terminaram com exceção")
+PAGINAS = Contador("lunghin_paginas_total", "Páginas ingeridas por origem do texto")
+DURACAO_LLM = Histograma("lunghin_llm_chamada_duracao_segundos", "Latência das chamadas ao LLM")
+TOKENS_LLM = Contador("lunghin_llm_tokens_total", "Tokens consumidos nas chamadas ao LLM")
+QUASE_DUPLICATAS = Contador(
+    "lunghin_quase_duplicatas_total", "Cláusulas críticas consultadas no índice de quase duplicatas"
+)
+
+METRICAS = (DURACAO_ETAPA, CPU_ETAPA, RSS_ETAPA, FALHAS_ETAPA, PAGINAS, DURACAO_LLM, TOKENS_LLM, QUASE_DUPLICATAS)
+
+_medicao_atual: contextvars.ContextVar[Optional["Medicao"]] = contextvars.ContextVar(
+    "lunghin_medicao_atual", default=None
+)
+
+
+def _pico_rss_bytes() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _FATOR_RSS
+
+
+class Medicao:
+    """Medição de uma etapa; use como context manager via `medir_etapa`."""
+
+    __slots__ = ("etapa", "anotacoes", "_inicio", "_cpu", "_rss", "_token")
+
+    def __init__(self, etapa: str) -> None:
+        self.etapa = etapa
+        self.anotacoes: Dict[str, Any] = {}
+
+    def anotar(self, **campos: Any) -> None:
+        self.anotacoes.update(campos)
+
+    def __enter__(self) -> "Medicao":
+        self._token = _medicao_atual.set(self)
+        self._rss = _pico_rss_bytes()
+        self._cpu = time.thread_time()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb) -> None:
+        duracao = time.perf_counter() - self._inicio
+        cpu = time.thread_time() - self._cpu
+        rss_delta = _pico_rss_bytes() - self._rss
+        _medicao_atual.reset(self._token)
+
+        DURACAO_ETAPA.observar(duracao, etapa=self.etapa)
+        CPU_ETAPA.observar(cpu, etapa=self.etapa)
+        RSS_ETAPA.observar(rss_delta, etapa=self.etapa)
+        if tipo_exc is not None:
+            FALHAS_ETAPA.incrementar(etapa=self.etapa)
+        registrar_evento(
+            _logger,
+            "etapa",
+            etapa=self.etapa,
+            status="erro" if tipo_exc is not None else "ok",
+            duracao_s=round(duracao, 6),
+            cpu_s=round(cpu, 6),
+            rss_delta_bytes=rss_delta,
+            **self.anotacoes,
+        )
+
+
+class _MedicaoNula:
+    __slots__ = ()
+
+    def anotar(self, **campos: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_MedicaoNula":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_NULA = _MedicaoNula()
+
+
+def medir_etapa(etapa: str):
+    """Context manager que mede a etapa `etapa` (no-op se desativado)."""
+    if not INSTRUMENTACAO_ATIVA:
+        return _NULA
+    return Medicao(etapa)
+
+
+def anotar_etapa(**campos: Any) -> None:
+    """Acrescenta campos ao evento JSON da etapa em andamento nesta thread."""
+    if INSTRUMENTACAO_ATIVA:
+        medicao = _medicao_atual.get()
+        if medicao is not None:
+            medicao.anotar(**campos)
+
+
+def registrar_paginas(origens: Iterable[str]) -> None:
+    if not INSTRUMENTACAO_ATIVA:
+        return
+    contagem: Dict[str, int] = {}
+    for origem in origens:
+        contagem[origem] = contagem.get(origem, 0) + 1
+    for origem, total in contagem.items():
+        PAGINAS.incrementar(total, origem=origem)
+    anotar_etapa(paginas=sum(contagem.values()), paginas_por_origem=contagem)
+
+
+def registrar_uso_llm(modelo: str, uso: Any, latencia: float, modo: str = "individual") -> None:
+    """Registra latência e tokens (objeto `usage` da OpenAI) de uma chamada ao LLM."""
+    if not INSTRUMENTACAO_ATIVA:
+        return
+    DURACAO_LLM.observar(latencia, modelo=modelo, modo=modo)
+    prompt = getattr(uso, "prompt_tokens", 0) or 0
+    resposta = getattr(uso, "completion_tokens", 0) or 0
+    TOKENS_LLM.incrementar(prompt, modelo=modelo, tipo="prompt")
+    TOKENS_LLM.incrementar(resposta, modelo=modelo, tipo="resposta")
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        anotacoes = medicao.anotacoes
+        anotacoes["chamadas_llm"] = anotacoes.get("chamadas_llm", 0) + 1
+        anotacoes["tokens_llm"] = anotacoes.get("tokens_llm", 0) + prompt + resposta
+    registrar_evento(
+        _logger,
+        "llm",
+        modelo=modelo,
+        modo=modo,
+        duracao_s=round(latencia, 6),
+        tokens_prompt=prompt,
+        tokens_resposta=resposta,
+    )
+
+
+def registrar_quase_duplicatas(reaproveitadas: int, consultadas: int) -> None:
+    """Registra quantas cláusulas reaproveitaram o diagnóstico de uma quase duplicata."""
+    if not INSTRUMENTACAO_ATIVA or not consultadas:
+        return
+    QUASE_DUPLICATAS.incrementar(reaproveitadas, desfecho="reaproveitada")
+    QUASE_DUPLICATAS.incrementar(consultadas - reaproveitadas, desfecho="enviada_ao_llm")
+    anotar_etapa(diagnosticos_reaproveitados=reaproveitadas)
+
+
+def exportar_prometheus() -> str:
+    """Todas as métricas no formato texto de exposição do Prometheus."""
+    return "\n".join(m.exportar() for m in METRICAS) + "\n"
+
+
+__all__ = [
+    "INSTRUMENTACAO_ATIVA",
+    "Histograma",
+    "Contador",
+    "medir_etapa",
+    "anotar_etapa",
+    "registrar_paginas",
+    "registrar_uso_llm",
+    "registrar_quase_duplicatas",
+    "exportar_prometheus",
+]
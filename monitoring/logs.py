@@ -0,0 +1,58 @@
+# coding: utf-8
+"""Logs estruturados (uma linha JSON por evento) do sistema Lunghin.AI."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+from typing import Any
+
+NIVEL_PADRAO = os.getenv("LUNGHIN_LOG_NIVEL", "INFO")
+LOGGER_RAIZ = "lunghin"
+
+_CAMPOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class FormatadorJson(logging.Formatter):
+    """Serializa o registro e os campos passados em `extra` como JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        evento = {
+            "ts": round(record.created, 6),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _CAMPOS_PADRAO:
+                evento[chave] = valor
+        if record.exc_info:
+            evento["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+def configurar_logs(nivel: str = NIVEL_PADRAO) -> logging.Logger:
+    """Instala o formatador JSON no logger `lunghin` (idempotente)."""
+    raiz = logging.getLogger(LOGGER_RAIZ)
+    raiz.setLevel(nivel)
+    if not any(isinstance(h.formatter, FormatadorJson) for h in raiz.handlers):
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(FormatadorJson())
+        raiz.addHandler(handler)
+        raiz.propagate = False
+    return raiz
+
+
+def obter_logger(nome: str) -> logging.Logger:
+    return logging.getLogger(f"{LOGGER_RAIZ}.{nome}")
+
+
+def registrar_evento(logger: logging.Logger, evento: str, nivel: int = logging.INFO, **campos: Any) -> None:
+    """Emite um evento estruturado; não custa nada se o nível estiver desligado."""
+    if logger.isEnabledFor(nivel):
+        logger.log(nivel, evento, extra={"evento": evento, **campos})
+
+
+__all__ = ["FormatadorJson", "configurar_logs", "obter_logger", "registrar_evento"]
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import os
+import time
+
+import fitz  # PyMuPDF
+
+from agents.ingestores.ingestor import _ocr_paginas
+from agents.ingestores.ocr_pool import PoolOCR
+
+
+def medir_vazao(caminho_pdf: str, tamanho_pool: int, max_paginas: int) -> float:
+    """Retorna a vazao de OCR (paginas/s) com um pool de `tamanho_pool` motores."""
+    pool = PoolOCR(tamanho_pool).iniciar()
+    try:
+        with fitz.open(caminho_pdf) as doc:
+            paginas = range(min(doc.page_count, max_paginas))
+            # Aquece cada motor antes de cronometrar
+            _ocr_paginas(doc, range(min(tamanho_pool, len(paginas))), pool)
+            inicio = time.perf_counter()
+            _ocr_paginas(doc, paginas, pool)
+            return len(paginas) / (time.perf_counter() - inicio)
+    finally:
+        pool.encerrar()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vazao de OCR por pagina em funcao do numero de motores.")
+    parser.add_argument("pdf", help="PDF escaneado usado na medicao")
+    parser.add_argument("--max-motores", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-paginas", type=int, default=64)
+    args = parser.parse_args()
+
+    base = None
+    print(f"{'motores':>8} {'pag/s':>8} {'speedup':>8} {'eficiencia':>10}")
+    for motores in range(1, args.max_motores + 1):
+        vazao = medir_vazao(args.pdf, motores, args.max_paginas)
+        base = base or vazao
+        speedup = vazao / base
+        print(f"{motores:>8} {vazao:>8.2f} {speedup:>8.2f} {speedup / motores:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
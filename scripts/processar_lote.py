@@ -2,57 +2,309 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import argparse
 import json
-from pathlib import Path
-from crew.juriscrew import run_pipeline
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+NOME_MANIFESTO = "manifesto_lote.jsonl"
+TIMEOUT_PADRAO = 600
+MAIS_LENTOS = 5
+
+
+def _salvar_saidas(resultado: dict, pasta_saida_individual: Path) -> None:
+    pasta_saida_individual.mkdir(parents=True, exist_ok=True)
+
+    # Copiar PDF final
+    pdf_path = Path(resultado["relatorio_pdf"])
+    if pdf_path.exists():
+        destino_pdf = pasta_saida_individual / "relatorio.pdf"
+        destino_pdf.write_bytes(pdf_path.read_bytes())
+
+    # Salvar JSON com parecer final
+    with open(pasta_saida_individual / "parecer.json", "w", encoding="utf-8") as f:
+        json.dump(resultado["parecer_final"], f, indent=2, ensure_ascii=False)
+
+    # Salvar entidades + relações
+    with open(pasta_saida_individual / "entidades.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "entidades": resultado["entidades"],
+            "relacoes": resultado["relacoes"]
+        }, f, indent=2, ensure_ascii=False)
+
+    # Salvar campos em branco detectados
+    with open(pasta_saida_individual / "campos_em_branco.json", "w", encoding="utf-8") as f:
+        json.dump(resultado["campos_em_branco"], f, indent=2, ensure_ascii=False)
+
+
+# ---------------------------------------------------------------------------
+# Manifesto: registro append-only dos contratos já processados
+# ---------------------------------------------------------------------------
+
+def carregar_manifesto(pasta_saida: str) -> Dict[str, dict]:
+    """Última entrada de cada contrato no manifesto (linhas truncadas são ignoradas)."""
+    caminho = Path(pasta_saida) / NOME_MANIFESTO
+    entradas: Dict[str, dict] = {}
+    if not caminho.exists():
+        return entradas
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                entrada = json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+            entradas[entrada["nome"]] = entrada
+    return entradas
+
+
+def _registrar_manifesto(pasta_saida: str, entrada: dict) -> None:
+    with open(Path(pasta_saida) / NOME_MANIFESTO, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _ja_processado(nome: str, pasta_saida: str, manifesto: Dict[str, dict]) -> bool:
+    entrada = manifesto.get(nome)
+    return (
+        entrada is not None
+        and entrada.get("status") == "ok"
+        and (Path(pasta_saida) / nome / "parecer.json").exists()
+    )
+
+
+# ---------------------------------------------------------------------------
+# Trabalhadores: processos de vida longa com modelos aquecidos
+# ---------------------------------------------------------------------------
+
+def _trabalhador(tarefas, emissor, pasta_saida: str) -> None:
+    # Importa o pipeline apenas no trabalhador; o processo pai fica leve
+    from agents.extratores.modelos_nlp import aquecer_modelos
+    from crew.juriscrew import run_pipeline
+
+    aquecer_modelos()
+    emissor.send(("pronto", None))
+    while True:
+        caminho = tarefas.get()
+        if caminho is None:
+            break
+        nome = Path(caminho).stem
+        inicio = time.perf_counter()
+        try:
+            resultado = run_pipeline(caminho)
+            _salvar_saidas(resultado, Path(pasta_saida) / nome)
+            entrada = {"nome": nome, "status": "ok"}
+        except Exception as e:
+            entrada = {"nome": nome, "status": "erro", "erro": str(e)}
+        entrada["duracao_s"] = round(time.perf_counter() - inicio, 3)
+        emissor.send(("fim", entrada))
 
-def processar_em_lote(pasta_entrada: str, pasta_saida: str) -> None:
-    contratos = list(Path(pasta_entrada).glob("*.pdf"))
+
+@dataclass
+class _Trabalhador:
+    processo: mp.Process
+    tarefas: Any
+    receptor: Connection
+    pronto: bool = False
+    # Documento entregue a este trabalhador e quando foi entregue
+    caminho: Optional[str] = None
+    inicio: float = 0.0
+
+
+class _PoolLote:
+    """Processos trabalhadores com timeout por documento.
+
+    O pai entrega um documento por vez a cada trabalhador pronto, pela fila
+    própria do trabalhador, e recebe o resultado por um pipe exclusivo dele:
+    sabe sempre qual documento está com quem, e encerrar um trabalhador não
+    corrompe filas usadas pelos outros. Um trabalhador que estoura o timeout
+    ou morre depois de aquecer é substituído por outro, que aquece seus
+    modelos de novo; um que morre ainda aquecendo não é substituído (a falha
+    se repetiria).
+    """
+
+    def __init__(self, trabalhadores: int, pasta_saida: str) -> None:
+        self._ctx = mp.get_context("spawn")
+        self._pasta_saida = pasta_saida
+        self.trabalhadores: List[_Trabalhador] = [self._novo() for _ in range(trabalhadores)]
+
+    def _novo(self) -> _Trabalhador:
+        receptor, emissor = self._ctx.Pipe(duplex=False)
+        tarefas = self._ctx.Queue()
+        processo = self._ctx.Process(
+            target=_trabalhador, args=(tarefas, emissor, self._pasta_saida), daemon=True
+        )
+        processo.start()
+        # Sem a cópia do pai, o receptor vê EOF quando o trabalhador morre
+        emissor.close()
+        return _Trabalhador(processo, tarefas, receptor)
+
+    def livres(self) -> List[_Trabalhador]:
+        return [t for t in self.trabalhadores if t.pronto and t.caminho is None]
+
+    def enviar(self, trabalhador: _Trabalhador, caminho: str) -> None:
+        trabalhador.caminho, trabalhador.inicio = caminho, time.perf_counter()
+        trabalhador.tarefas.put(caminho)
+
+    def receber(self, timeout: float) -> List[Tuple[_Trabalhador, str, Any]]:
+        """Mensagens disponíveis em até `timeout` segundos, de todos os trabalhadores."""
+        por_receptor = {t.receptor: t for t in self.trabalhadores}
+        mensagens = []
+        for receptor in wait(list(por_receptor), timeout=timeout):
+            mensagens.extend(self.drenar(por_receptor[receptor]))
+        return mensagens
+
+    def drenar(self, trabalhador: _Trabalhador) -> List[Tuple[_Trabalhador, str, Any]]:
+        mensagens = []
+        try:
+            while trabalhador.receptor.poll():
+                tipo, carga = trabalhador.receptor.recv()
+                mensagens.append((trabalhador, tipo, carga))
+        except (EOFError, OSError):
+            # Trabalhador morto; a verificação de processos trata
+            pass
+        return mensagens
+
+    def remover(self, trabalhador: _Trabalhador, substituir: bool) -> None:
+        if trabalhador.processo.is_alive():
+            trabalhador.processo.terminate()
+        trabalhador.processo.join(5)
+        trabalhador.receptor.close()
+        indice = self.trabalhadores.index(trabalhador)
+        if substituir:
+            self.trabalhadores[indice] = self._novo()
+        else:
+            del self.trabalhadores[indice]
+
+    def encerrar(self, imediato: bool = False) -> None:
+        for t in self.trabalhadores:
+            if imediato:
+                t.processo.terminate()
+            else:
+                t.tarefas.put(None)
+        for t in self.trabalhadores:
+            t.processo.join(5 if not imediato else 1)
+            if t.processo.is_alive():
+                t.processo.terminate()
+
+
+def _imprimir_resumo(entradas: List[dict], pulados: int, duracao_total: float) -> None:
+    ok = [e for e in entradas if e["status"] == "ok"]
+    falhas = [e for e in entradas if e["status"] != "ok"]
+    por_minuto = len(entradas) / (duracao_total / 60) if duracao_total > 0 else 0.0
+    print("\n📊 Resumo do lote")
+    print(f"   Processados: {len(ok)} | Falhas: {len(falhas)} | Pulados (já processados): {pulados}")
+    print(f"   Tempo total: {duracao_total:.1f}s | Vazão: {por_minuto:.1f} documentos/min")
+    for e in falhas:
+        print(f"   ❌ {e['nome']}: {e.get('erro')}")
+    lentos = sorted(entradas, key=lambda e: e.get("duracao_s", 0), reverse=True)[:MAIS_LENTOS]
+    if lentos:
+        print("   Mais lentos:")
+        for e in lentos:
+            print(f"     {e['nome']}: {e.get('duracao_s', 0):.1f}s ({e['status']})")
+
+
+def processar_em_lote(
+    pasta_entrada: str,
+    pasta_saida: str,
+    trabalhadores: Optional[int] = None,
+    timeout: float = TIMEOUT_PADRAO,
+    reprocessar: bool = False,
+) -> List[dict]:
+    """Processa os PDFs de `pasta_entrada` em paralelo, retomando de onde parou.
+
+    Cada contrato concluído é registrado em `<pasta_saida>/manifesto_lote.jsonl`;
+    em uma nova execução, contratos já registrados com sucesso e com saída em
+    `<pasta_saida>/<nome>/` são pulados (a menos que `reprocessar`). Cada
+    contrato processado entra também no índice invertido entre contratos
+    (`agents.extratores.indice_invertido`), sob o mesmo `nome` do manifesto.
+    """
+    contratos = sorted(Path(pasta_entrada).glob("*.pdf"))
 
     if not contratos:
         print("⚠️ Nenhum arquivo PDF encontrado na pasta de entrada.")
-        return
+        return []
 
-    for contrato_path in contratos:
-        nome = contrato_path.stem
-        print(f"\n📄 Processando: {nome}")
+    Path(pasta_saida).mkdir(parents=True, exist_ok=True)
+    manifesto = {} if reprocessar else carregar_manifesto(pasta_saida)
+    pendentes = [c for c in contratos if not _ja_processado(c.stem, pasta_saida, manifesto)]
+    pulados = len(contratos) - len(pendentes)
+    if not pendentes:
+        print(f"✅ Todos os {len(contratos)} contratos já foram processados.")
+        return []
 
-        try:
-            resultado = run_pipeline(contrato_path.as_posix())
+    trabalhadores = max(1, min(trabalhadores or os.cpu_count() or 1, len(pendentes)))
+    print(f"📦 {len(pendentes)} contratos a processar com {trabalhadores} trabalhadores ({pulados} pulados)")
 
-            # Criar pasta de saída individual para o contrato
-            pasta_saida_individual = Path(pasta_saida) / nome
-            pasta_saida_individual.mkdir(parents=True, exist_ok=True)
-            print(f"📁 Pasta criada: {pasta_saida_individual}")
+    inicio_lote = time.perf_counter()
+    pool = _PoolLote(trabalhadores, pasta_saida)
+    fila = deque(contrato.as_posix() for contrato in pendentes)
+    concluidos: List[dict] = []
 
-            # Copiar PDF final
-            pdf_path = Path(resultado["relatorio_pdf"])
-            if pdf_path.exists():
-                destino_pdf = pasta_saida_individual / "relatorio.pdf"
-                destino_pdf.write_bytes(pdf_path.read_bytes())
+    def concluir(entrada: dict, simbolo: Optional[str] = None) -> None:
+        _registrar_manifesto(pasta_saida, entrada)
+        concluidos.append(entrada)
+        simbolo = simbolo or ("✅" if entrada["status"] == "ok" else "❌")
+        detalhe = entrada.get("erro") if simbolo == "⏰" else f"{entrada['duracao_s']:.1f}s"
+        print(f"{simbolo} [{len(concluidos)}/{len(pendentes)}] {entrada['nome']} ({detalhe})")
 
-            # Salvar JSON com parecer final
-            with open(pasta_saida_individual / "parecer.json", "w", encoding="utf-8") as f:
-                json.dump(resultado["parecer_final"], f, indent=2, ensure_ascii=False)
+    try:
+        while fila or any(t.caminho is not None for t in pool.trabalhadores):
+            for trabalhador in pool.livres():
+                if not fila:
+                    break
+                pool.enviar(trabalhador, fila.popleft())
 
-            # Salvar entidades + relações
-            with open(pasta_saida_individual / "entidades.json", "w", encoding="utf-8") as f:
-                json.dump({
-                    "entidades": resultado["entidades"],
-                    "relacoes": resultado["relacoes"]
-                }, f, indent=2, ensure_ascii=False)
+            for trabalhador, tipo, carga in pool.receber(timeout=1.0):
+                if tipo == "pronto":
+                    trabalhador.pronto = True
+                elif tipo == "fim":
+                    trabalhador.caminho = None
+                    concluir(carga)
 
-            # Salvar campos em branco detectados
-            with open(pasta_saida_individual / "campos_em_branco.json", "w", encoding="utf-8") as f:
-                json.dump(resultado["campos_em_branco"], f, indent=2, ensure_ascii=False)
+            agora = time.perf_counter()
+            for trabalhador in list(pool.trabalhadores):
+                estourou = trabalhador.caminho is not None and agora - trabalhador.inicio > timeout
+                if not estourou and trabalhador.processo.is_alive():
+                    continue
+                if not estourou:
+                    # O resultado pode ter chegado junto com a morte do processo
+                    for _, tipo, carga in pool.drenar(trabalhador):
+                        if tipo == "fim":
+                            trabalhador.caminho = None
+                            concluir(carga)
+                if trabalhador.caminho is not None:
+                    motivo = f"tempo limite de {timeout:.0f}s excedido" if estourou else "trabalhador encerrado"
+                    duracao = round(agora - trabalhador.inicio, 3)
+                    entrada = {"nome": Path(trabalhador.caminho).stem, "status": "erro", "erro": motivo}
+                    concluir({**entrada, "duracao_s": duracao}, "⏰")
+                    trabalhador.caminho = None
+                pool.remover(trabalhador, substituir=estourou or trabalhador.pronto)
 
-            print(f"✅ {nome} processado com sucesso.")
+            if not pool.trabalhadores:
+                print("❌ Nenhum trabalhador ativo; abortando o lote (o manifesto permite retomar).")
+                break
+    except KeyboardInterrupt:
+        print("\n🛑 Interrompido; o manifesto permite retomar do ponto atual.")
+        pool.encerrar(imediato=True)
+    else:
+        pool.encerrar()
 
-        except Exception as e:
-            print(f"❌ Erro ao processar {nome}: {e}")
+    _imprimir_resumo(concluidos, pulados, time.perf_counter() - inicio_lote)
+    return concluidos
 
 
 if __name__ == "__main__":
-    pasta_entrada = "contratos_teste"
-    pasta_saida = "outputs"
-    processar_em_lote(pasta_entrada, pasta_saida)
+    parser = argparse.ArgumentParser(description="Processa contratos em lote, em paralelo e com retomada.")
+    parser.add_argument("--entrada", default="contratos_teste")
+    parser.add_argument("--saida", default="outputs")
+    parser.add_argument("--trabalhadores", type=int, default=None, help="padrão: número de CPUs")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT_PADRAO, help="segundos por documento")
+    parser.add_argument("--reprocessar", action="store_true", help="ignora o manifesto existente")
+    args = parser.parse_args()
+    processar_em_lote(args.entrada, args.saida, args.trabalhadores, args.timeout, args.reprocessar)
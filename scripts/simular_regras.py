@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import json
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from agents.extratores.segmentador_clausulas import indexar_clausulas
+from agents.ingestores.ingestor import processar_documento
+from agents.interpretadores.extrator_clausulas import blocos_do_indice, classificar_clausulas
+from agents.pareceristas.motor_pontuacao import CAMINHO_REGRAS, carregar_regras
+
+EXTENSOES = (".pdf", ".docx")
+
+
+def clausulas_do_corpus(pasta: Path) -> List[Tuple[str, Dict]]:
+    """(nome do arquivo, cláusula classificada) de todos os contratos da pasta.
+
+    A ingestão passa pelo cache, então só a primeira simulação sobre um corpus
+    paga a extração de texto.
+    """
+    clausulas = []
+    for arquivo in sorted(p for p in pasta.iterdir() if p.suffix.lower() in EXTENSOES):
+        try:
+            texto = processar_documento(arquivo.as_posix())["texto"]
+        except Exception as e:
+            print(f"❌ {arquivo.name}: {e}")
+            continue
+        for clausula in classificar_clausulas(blocos_do_indice(indexar_clausulas(texto))):
+            clausulas.append((arquivo.name, clausula))
+    return clausulas
+
+
+def simular(base: Path, candidatas: Path, clausulas: List[Tuple[str, Dict]]) -> Dict:
+    """Pontua o corpus com as duas versões das regras e resume as diferenças."""
+    itens = [(c["conteudo"], c["tipo_clausula"]) for _, c in clausulas]
+    tempos = {}
+    pontuacoes = {}
+    for nome, caminho in (("base", base), ("candidatas", candidatas)):
+        motor = carregar_regras(caminho)
+        inicio = time.perf_counter()
+        pontuacoes[nome] = motor.pontuar_lote(itens)
+        tempos[nome] = round(time.perf_counter() - inicio, 4)
+
+    por_tipo: Dict[str, Dict[str, float]] = defaultdict(
+        lambda: {"clausulas": 0, "alteradas": 0, "risco_base": 0, "risco_candidatas": 0}
+    )
+    alteradas = []
+    for (arquivo, clausula), antes, depois in zip(clausulas, pontuacoes["base"], pontuacoes["candidatas"]):
+        resumo = por_tipo[clausula["tipo_clausula"]]
+        resumo["clausulas"] += 1
+        resumo["risco_base"] += antes["risco"]
+        resumo["risco_candidatas"] += depois["risco"]
+        if antes != depois:
+            resumo["alteradas"] += 1
+            alteradas.append(
+                {"arquivo": arquivo, "titulo": clausula["titulo_original"], "antes": antes, "depois": depois}
+            )
+    for resumo in por_tipo.values():
+        resumo["risco_base"] = round(resumo["risco_base"] / resumo["clausulas"], 2)
+        resumo["risco_candidatas"] = round(resumo["risco_candidatas"] / resumo["clausulas"], 2)
+    return {"clausulas": len(itens), "tempos_s": tempos, "por_tipo": dict(por_tipo), "alteradas": alteradas}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compara a pontuação de um corpus com as regras atuais e com regras candidatas."
+    )
+    parser.add_argument("regras", help="arquivo JSON com as regras candidatas")
+    parser.add_argument("--entrada", default="contratos_teste")
+    parser.add_argument("--base", default=str(CAMINHO_REGRAS), help="regras de referência (padrão: as atuais)")
+    parser.add_argument("--saida", default=None, help="grava o relatório completo em JSON")
+    args = parser.parse_args()
+
+    clausulas = clausulas_do_corpus(Path(args.entrada))
+    relatorio = simular(Path(args.base), Path(args.regras), clausulas)
+
+    print(f"📄 {relatorio['clausulas']} cláusulas; pontuação em {relatorio['tempos_s']}")
+    for tipo, resumo in sorted(relatorio["por_tipo"].items()):
+        print(
+            f"  {tipo}: {resumo['alteradas']}/{resumo['clausulas']} alteradas, "
+            f"risco médio {resumo['risco_base']} → {resumo['risco_candidatas']}"
+        )
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
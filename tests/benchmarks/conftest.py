@@ -0,0 +1,127 @@
+# coding: utf-8
+"""
+Infraestrutura da suíte de benchmarks.
+
+Os benchmarks só rodam com LUNGHIN_BENCH=1 (medições de tempo não fazem
+sentido misturadas aos testes comuns). Cada medição é comparada ao valor em
+`baselines.json`; a suíte falha se a mediana ficar mais de
+LUNGHIN_BENCH_TOLERANCIA (padrão 0.25 = 25%) acima da linha de base. Com
+LUNGHIN_BENCH_ATUALIZAR=1 as linhas de base são regravadas com os valores
+medidos em vez de comparadas.
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(RAIZ))
+
+ARQUIVO_BASELINES = Path(__file__).with_name("baselines.json")
+ATIVO = os.getenv("LUNGHIN_BENCH", "0") == "1"
+ATUALIZAR = os.getenv("LUNGHIN_BENCH_ATUALIZAR", "0") == "1"
+TOLERANCIA = float(os.getenv("LUNGHIN_BENCH_TOLERANCIA", "0.25"))
+REPETICOES = int(os.getenv("LUNGHIN_BENCH_REPETICOES", "5"))
+# Diferenças absolutas abaixo disso são ruído de medição, não regressão
+FOLGA_ABSOLUTA_S = 0.002
+
+
+def pytest_collection_modifyitems(config, items):
+    if ATIVO:
+        return
+    pular = pytest.mark.skip(reason="benchmarks desativados (use LUNGHIN_BENCH=1)")
+    for item in items:
+        if Path(str(item.fspath)).parent == Path(__file__).parent:
+            item.add_marker(pular)
+
+
+def _carregar_baselines() -> Dict[str, Any]:
+    if ARQUIVO_BASELINES.exists():
+        return json.loads(ARQUIVO_BASELINES.read_text(encoding="utf-8"))
+    return {"resultados": {}}
+
+
+class Medidor:
+    """Mede funções, compara com as linhas de base e acumula os resultados."""
+
+    def __init__(self) -> None:
+        self.baselines = _carregar_baselines()
+        self.resultados: Dict[str, Dict[str, float]] = {}
+
+    def medir(self, nome: str, funcao: Callable[[], Any], repeticoes: int = REPETICOES) -> float:
+        funcao()  # aquecimento: imports preguiçosos, caches de regex, fontes
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+        mediana = statistics.median(tempos)
+        self.resultados[nome] = {"mediana_s": round(mediana, 6), "minimo_s": round(min(tempos), 6)}
+
+        base = self.baselines["resultados"].get(nome)
+        if ATUALIZAR or base is None:
+            return mediana
+        limite = base["mediana_s"] * (1 + TOLERANCIA)
+        if mediana > limite and mediana - base["mediana_s"] > FOLGA_ABSOLUTA_S:
+            pytest.fail(
+                f"Regressão em {nome}: mediana {mediana:.4f}s > {limite:.4f}s "
+                f"(linha de base {base['mediana_s']:.4f}s + {TOLERANCIA:.0%})"
+            )
+        return mediana
+
+    def salvar(self) -> None:
+        dados = _carregar_baselines()
+        dados["resultados"].update(self.resultados)
+        dados["ambiente"] = {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "processador": platform.processor() or platform.machine(),
+            "repeticoes": REPETICOES,
+        }
+        dados["resultados"] = dict(sorted(dados["resultados"].items()))
+        ARQUIVO_BASELINES.write_text(json.dumps(dados, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+@pytest.fixture(scope="session")
+def medidor():
+    medidor = Medidor()
+    yield medidor
+    if medidor.resultados:
+        print("\n📊 Benchmarks (mediana / mínimo)")
+        for nome, r in sorted(medidor.resultados.items()):
+            base = medidor.baselines["resultados"].get(nome, {}).get("mediana_s")
+            comparacao = f" | base {base:.4f}s" if base else " | sem linha de base"
+            print(f"   {nome}: {r['mediana_s']:.4f}s / {r['minimo_s']:.4f}s{comparacao}")
+    if ATUALIZAR and medidor.resultados:
+        medidor.salvar()
+
+
+@pytest.fixture
+def llm_stub(monkeypatch):
+    """Substitui a avaliação LLM do pipeline por uma resposta fixa (sem rede)."""
+    from agents.interpretadores.avaliador_llm import _clausulas_criticas
+    from crew import juriscrew
+
+    def avaliar_clausulas_stub(entidades, modo=None, indice=None):
+        return [
+            {
+                "presente": True,
+                "completude": 80,
+                "juridicamente_aceitavel": True,
+                "comentario": "Cláusula adequada (stub de benchmark).",
+                "risco": "baixo",
+                "tipo": e.get("label"),
+                "clausula": e.get("texto"),
+            }
+            for e in _clausulas_criticas(entidades)
+        ]
+
+    monkeypatch.setattr(juriscrew, "avaliar_clausulas", avaliar_clausulas_stub)
+    return avaliar_clausulas_stub
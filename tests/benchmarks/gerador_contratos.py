@@ -0,0 +1,156 @@
+# coding: utf-8
+"""Gerador de contratos sintéticos de prestação de serviços para benchmarks.
+
+Produz o texto do contrato com número de cláusulas e tamanho de parágrafo
+configuráveis e o grava como PDF editável, PDF rasterizado (só imagem, para
+exercitar o OCR) ou DOCX. A geração é determinística para uma dada semente.
+"""
+
+from __future__ import annotations
+
+import random
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+ORDINAIS = [
+    "PRIMEIRA", "SEGUNDA", "TERCEIRA", "QUARTA", "QUINTA", "SEXTA", "SÉTIMA",
+    "OITAVA", "NONA", "DÉCIMA",
+]
+
+CLAUSULAS_MODELO = [
+    ("DO OBJETO", "O presente contrato tem por objeto a prestação de serviços de {servico} pela CONTRATADA."),
+    ("DO PRAZO", "O prazo de vigência é de {meses} meses, com início em {data} e término ao fim do período."),
+    ("DO PAGAMENTO", "Pela prestação dos serviços a CONTRATANTE pagará o preço de R$ {valor},00 mensais."),
+    ("DA MULTA", "O descumprimento sujeitará a parte infratora a multa de {pct}% do valor total do contrato."),
+    ("DA RESCISÃO", "A rescisão poderá ocorrer por qualquer das partes mediante aviso prévio de {dias} dias."),
+    ("DA CONFIDENCIALIDADE", "As partes manterão sigilo sobre as informações confidenciais a que tiverem acesso."),
+    ("DO FORO", "Fica eleito o foro da comarca de {cidade} para dirimir quaisquer controvérsias."),
+    ("DAS OBRIGAÇÕES DO CONTRATADO", "São obrigações do contratado executar os serviços com diligência."),
+    ("DAS DISPOSIÇÕES GERAIS", "As disposições gerais aplicam-se a todo o instrumento e seus aditivos."),
+]
+
+SERVICOS = ["consultoria tributária", "manutenção de sistemas", "limpeza predial", "assessoria jurídica"]
+CIDADES = ["São Paulo", "Belo Horizonte", "Curitiba", "Recife", "Porto Alegre"]
+EMPRESAS = ["Alfa Serviços Ltda.", "Beta Tecnologia S.A.", "Gama Consultoria Ltda.", "Delta Engenharia S.A."]
+PALAVRAS = (
+    "as partes acordam que a execução observará as normas aplicáveis e os termos "
+    "estabelecidos neste instrumento sem prejuízo das demais obrigações legais e "
+    "contratuais assumidas pela contratante e pela contratada durante a execução"
+).split()
+
+
+def _ordinal(indice: int) -> str:
+    return ORDINAIS[indice] if indice < len(ORDINAIS) else f"{indice + 1}ª"
+
+
+def gerar_texto_contrato(
+    n_clausulas: int = 10,
+    palavras_por_paragrafo: int = 60,
+    semente: int = 0,
+    campos_em_branco: bool = True,
+) -> str:
+    """Gera o texto de um contrato com `n_clausulas` cláusulas."""
+    rng = random.Random(semente)
+    contratante, contratado = rng.sample(EMPRESAS, 2)
+    linhas = [
+        "CONTRATO DE PRESTAÇÃO DE SERVIÇOS",
+        "",
+        f"CONTRATANTE: {contratante}, CNPJ {rng.randint(10, 99)}.{rng.randint(100, 999)}."
+        f"{rng.randint(100, 999)}/0001-{rng.randint(10, 99)}.",
+        f"CONTRATADO: {contratado}, CNPJ {rng.randint(10, 99)}.{rng.randint(100, 999)}."
+        f"{rng.randint(100, 999)}/0001-{rng.randint(10, 99)}.",
+        "",
+    ]
+    for indice in range(n_clausulas):
+        titulo, modelo = CLAUSULAS_MODELO[indice % len(CLAUSULAS_MODELO)]
+        corpo = modelo.format(
+            servico=rng.choice(SERVICOS),
+            meses=rng.randint(6, 36),
+            data=f"{rng.randint(1, 28)}/{rng.randint(1, 12)}/20{rng.randint(24, 27)}",
+            valor=f"{rng.randint(1, 99)}.{rng.randint(100, 999)}",
+            pct=rng.randint(2, 20),
+            dias=rng.choice([15, 30, 60]),
+            cidade=rng.choice(CIDADES),
+        )
+        complemento = " ".join(rng.choice(PALAVRAS) for _ in range(palavras_por_paragrafo))
+        linhas.append(f"CLÁUSULA {_ordinal(indice)} - {titulo}")
+        linhas.append(f"{corpo} {complemento.capitalize()}.")
+        linhas.append("")
+    if campos_em_branco:
+        linhas.append("TESTEMUNHA: ________")
+        linhas.append("Valor adicional: R$ ______")
+    linhas.append(f"{rng.choice(CIDADES)}, {rng.randint(1, 28)}/{rng.randint(1, 12)}/2025.")
+    return "\n".join(linhas)
+
+
+def gerar_pdf_editavel(texto: str, caminho: Path) -> Path:
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "", 11)
+    for linha in texto.split("\n"):
+        pdf.multi_cell(0, 6, linha.encode("latin-1", "replace").decode("latin-1") or " ")
+    pdf.output(name=str(caminho), dest="F")
+    return Path(caminho)
+
+
+def gerar_pdf_rasterizado(texto: str, caminho: Path, zoom: float = 1.5) -> Path:
+    """Gera um PDF cujas páginas são apenas imagens (sem camada de texto)."""
+    import fitz  # PyMuPDF
+
+    editavel = Path(caminho).with_suffix(".editavel.pdf")
+    gerar_pdf_editavel(texto, editavel)
+    with fitz.open(editavel) as origem, fitz.open() as destino:
+        for pagina in origem:
+            pix = pagina.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            nova = destino.new_page(width=pagina.rect.width, height=pagina.rect.height)
+            nova.insert_image(nova.rect, pixmap=pix)
+        destino.save(str(caminho))
+    editavel.unlink()
+    return Path(caminho)
+
+
+def gerar_docx(texto: str, caminho: Path) -> Path:
+    """Gera um DOCX mínimo (um parágrafo por linha) sem depender de python-docx."""
+    paragrafos = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(linha)}</w:t></w:r></w:p>'
+        for linha in texto.split("\n")
+    )
+    documento = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{paragrafos}</w:body></w:document>"
+    )
+    tipos = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        "</Types>"
+    )
+    relacoes = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="word/document.xml"/>'
+        "</Relationships>"
+    )
+    with zipfile.ZipFile(caminho, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", tipos)
+        docx.writestr("_rels/.rels", relacoes)
+        docx.writestr("word/document.xml", documento)
+    return Path(caminho)
+
+
+__all__ = [
+    "gerar_texto_contrato",
+    "gerar_pdf_editavel",
+    "gerar_pdf_rasterizado",
+    "gerar_docx",
+]
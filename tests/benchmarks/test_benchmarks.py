@@ -0,0 +1,184 @@
+# coding: utf-8
+"""
+Benchmarks por etapa do pipeline sobre contratos sintéticos.
+
+Rodar:      LUNGHIN_BENCH=1 python -m pytest tests/benchmarks -q -s
+Regravar:   LUNGHIN_BENCH=1 LUNGHIN_BENCH_ATUALIZAR=1 python -m pytest tests/benchmarks -q -s
+"""
+
+from pathlib import Path
+
+import pytest
+
+from gerador_contratos import gerar_docx, gerar_pdf_editavel, gerar_pdf_rasterizado, gerar_texto_contrato
+
+# nome -> (cláusulas, palavras por parágrafo)
+CENARIOS = {
+    "pequeno": (8, 40),
+    "grande": (60, 120),
+}
+
+
+@pytest.fixture(scope="module", params=list(CENARIOS))
+def contrato(request, tmp_path_factory):
+    n_clausulas, palavras = CENARIOS[request.param]
+    texto = gerar_texto_contrato(n_clausulas, palavras, semente=n_clausulas)
+    pasta = tmp_path_factory.mktemp(f"contrato_{request.param}")
+    return {"cenario": request.param, "texto": texto, "pasta": pasta}
+
+
+@pytest.fixture(scope="module")
+def modelo_spacy():
+    from agents.extratores.modelos_nlp import obter_modelo
+
+    try:
+        return obter_modelo()
+    except OSError as exc:
+        pytest.skip(f"modelo spaCy indisponível: {exc}")
+
+
+def _grafo_sem_nlp(texto: str) -> dict:
+    """Grafo só com as cláusulas segmentadas, para etapas que não medem o NER."""
+    from agents.extratores.graph_builder import segmentar_clausulas
+
+    entidades = [{"texto": s["texto"][:300], "label": s["label"]} for s in segmentar_clausulas(texto)]
+    return {"entidades": entidades, "relacoes": [], "graph_id": "benchmark"}
+
+
+@pytest.mark.parametrize("formato", ["pdf_editavel", "docx"])
+def test_processar_documento(medidor, contrato, formato):
+    from agents.ingestores.ingestor import processar_documento
+
+    if formato == "docx":
+        caminho = gerar_docx(contrato["texto"], contrato["pasta"] / "contrato.docx")
+    else:
+        caminho = gerar_pdf_editavel(contrato["texto"], contrato["pasta"] / "contrato.pdf")
+    medidor.medir(
+        f"processar_documento[{formato}-{contrato['cenario']}]",
+        lambda: processar_documento(str(caminho), usar_cache=False),
+    )
+
+
+def test_processar_documento_rasterizado(medidor, contrato):
+    pytest.importorskip("paddleocr")
+    from agents.ingestores.ingestor import processar_documento
+    from agents.ingestores.ocr_pool import iniciar_pool_ocr
+
+    iniciar_pool_ocr(aguardar=True)
+    caminho = gerar_pdf_rasterizado(contrato["texto"], contrato["pasta"] / "rasterizado.pdf")
+    medidor.medir(
+        f"processar_documento[pdf_rasterizado-{contrato['cenario']}]",
+        lambda: processar_documento(str(caminho), usar_cache=False),
+        repeticoes=2,
+    )
+
+
+def test_construir_grafo(medidor, contrato, modelo_spacy, armazenamento_isolado):
+    from agents.extratores.graph_builder import construir_grafo
+
+    medidor.medir(f"construir_grafo[{contrato['cenario']}]", lambda: construir_grafo(contrato["texto"]))
+
+
+def test_revisar_contrato(medidor, contrato):
+    from agents.revisores.revisor_contratos import revisar_contrato
+
+    medidor.medir(f"revisar_contrato[{contrato['cenario']}]", lambda: revisar_contrato(contrato["texto"]))
+
+
+def test_detectar_campos_em_branco(medidor, contrato):
+    from agents.validadores.detector_campos import detectar_campos_em_branco
+
+    campos = detectar_campos_em_branco(contrato["texto"])
+    assert campos, "o gerador insere campos em branco no fim do contrato"
+    medidor.medir(
+        f"detectar_campos_em_branco[{contrato['cenario']}]",
+        lambda: detectar_campos_em_branco(contrato["texto"]),
+    )
+
+
+@pytest.fixture(scope="module")
+def texto_300_paginas():
+    # ~3.000 caracteres por página
+    texto = "\n".join(gerar_texto_contrato(60, 120, semente=semente) for semente in range(18))
+    assert len(texto) > 300 * 3000
+    return texto
+
+
+def test_varrer_padroes_300_paginas(medidor, texto_300_paginas):
+    from agents.extratores.varredor_padroes import varrer_padroes
+
+    medidor.medir("varrer_padroes[300_paginas]", lambda: varrer_padroes(texto_300_paginas))
+
+
+def test_indexar_clausulas_300_paginas(medidor, texto_300_paginas):
+    from agents.extratores.segmentador_clausulas import indexar_clausulas
+
+    medidor.medir("indexar_clausulas[300_paginas]", lambda: indexar_clausulas(texto_300_paginas))
+
+
+def test_gerar_relatorio_pdf(medidor, contrato, llm_stub):
+    from agents.exportadores.relatorio_pdf import gerar_relatorio_pdf
+    from agents.pareceristas.parecerista import produzir_parecer
+    from agents.revisores.revisor_contratos import revisar_contrato
+
+    grafo = _grafo_sem_nlp(contrato["texto"])
+    parecer_tecnico = revisar_contrato(contrato["texto"])
+    parecer_final = produzir_parecer(grafo["entidades"], grafo["relacoes"], parecer_tecnico)
+    avaliacoes = llm_stub(grafo["entidades"])
+    dados = {"texto": contrato["texto"], "tipo_entrada": "pdf_editavel"}
+
+    caminho = gerar_relatorio_pdf(dados, grafo, parecer_tecnico, parecer_final, avaliacoes)
+    try:
+        medidor.medir(
+            f"gerar_relatorio_pdf[{contrato['cenario']}]",
+            lambda: gerar_relatorio_pdf(dados, grafo, parecer_tecnico, parecer_final, avaliacoes),
+        )
+    finally:
+        Path(caminho).unlink(missing_ok=True)
+
+
+def test_gerar_relatorios_pdf_em_lote(medidor, contrato, llm_stub):
+    from agents.exportadores.relatorio_pdf import gerar_relatorios_pdf_em_lote
+    from agents.pareceristas.parecerista import produzir_parecer
+    from agents.revisores.revisor_contratos import revisar_contrato
+
+    grafo = _grafo_sem_nlp(contrato["texto"])
+    parecer_tecnico = revisar_contrato(contrato["texto"])
+    relatorios = [
+        {
+            "dados_ingestao": {"texto": contrato["texto"], "tipo_entrada": "pdf_editavel"},
+            "grafo": {**grafo, "graph_id": f"benchmark_lote_{i}"},
+            "parecer_tecnico": parecer_tecnico,
+            "parecer_final": produzir_parecer(grafo["entidades"], grafo["relacoes"], parecer_tecnico),
+            "avaliacoes_llm": llm_stub(grafo["entidades"]),
+        }
+        for i in range(10)
+    ]
+    caminhos = gerar_relatorios_pdf_em_lote(relatorios)
+    try:
+        medidor.medir(
+            f"gerar_relatorios_pdf_em_lote[{contrato['cenario']}x10]",
+            lambda: gerar_relatorios_pdf_em_lote(relatorios),
+            repeticoes=3,
+        )
+    finally:
+        for caminho in caminhos:
+            Path(caminho).unlink(missing_ok=True)
+
+
+def test_pipeline_completo(medidor, contrato, modelo_spacy, llm_stub, armazenamento_isolado, monkeypatch):
+    from agents.ingestores.ingestor import processar_documento
+    from crew import juriscrew
+
+    # Cada repetição precisa refazer a extração, não acertar o cache de ingestão
+    monkeypatch.setattr(
+        juriscrew,
+        "executar_ingestao",
+        lambda caminho, hash_conteudo=None: processar_documento(caminho, usar_cache=False),
+    )
+    caminho = gerar_pdf_editavel(contrato["texto"], contrato["pasta"] / "pipeline.pdf")
+    medidor.medir(
+        f"run_pipeline[{contrato['cenario']}]",
+        lambda: juriscrew.run_pipeline(str(caminho)),
+        repeticoes=3,
+    )
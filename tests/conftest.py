@@ -0,0 +1,45 @@
+# coding: utf-8
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+
+@pytest.fixture
+def armazenamento_isolado(tmp_path, monkeypatch):
+    """Troca os repositórios e caches do processo por instâncias em `tmp_path`.
+
+    Sem isso, testes que rodam o pipeline gravam nos bancos de `cache/` e na
+    pasta `reports/` do repositório (os mesmos da API).
+    """
+    from agents.exportadores import relatorio_pdf, relatorios_sob_demanda
+    from agents.extratores import indice_invertido, repositorio_grafos
+    from agents.ingestores import cache_ingestao
+    from agents.interpretadores import cache_llm, quase_duplicatas
+    from crew import reanalise
+
+    relatorios = relatorios_sob_demanda.GerenciadorRelatorios(
+        tmp_path / "relatorios.sqlite3", pasta=tmp_path / "reports"
+    )
+    substitutos = [
+        (relatorio_pdf, "PASTA_RELATORIOS", tmp_path / "reports"),
+        (repositorio_grafos, "_REPOSITORIO", repositorio_grafos.RepositorioGrafos(tmp_path / "grafos.sqlite3")),
+        (indice_invertido, "_INDICE", indice_invertido.IndiceInvertido(tmp_path / "indice_contratos.sqlite3")),
+        (cache_ingestao, "_CACHE", cache_ingestao.CacheIngestao(tmp_path / "ingestao")),
+        (cache_llm, "_CACHE", cache_llm.CacheDiagnosticos(tmp_path / "cache_llm.sqlite3")),
+        (
+            quase_duplicatas,
+            "_INDICE",
+            quase_duplicatas.IndiceQuaseDuplicatas(tmp_path / "quase_duplicatas.sqlite3"),
+        ),
+        (reanalise, "_REPOSITORIO", reanalise.RepositorioAnalises(tmp_path / "analises.sqlite3")),
+        (relatorios_sob_demanda, "_GERENCIADOR", relatorios),
+    ]
+    for modulo, nome, instancia in substitutos:
+        monkeypatch.setattr(modulo, nome, instancia)
+    yield tmp_path
+    relatorios.encerrar()
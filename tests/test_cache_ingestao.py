@@ -0,0 +1,30 @@
+# coding: utf-8
+import os
+import time
+
+from agents.ingestores.cache_ingestao import CacheIngestao
+
+
+def test_cache_ingestao_grava_e_le(tmp_path):
+    cache = CacheIngestao(tmp_path)
+    assert cache.obter("ab" * 32) is None
+    cache.gravar("ab" * 32, {"texto": "olá", "tipo_entrada": "docx"})
+    assert cache.obter("ab" * 32) == {"texto": "olá", "tipo_entrada": "docx"}
+    assert cache.estatisticas()["acertos"] == 1
+    assert cache.estatisticas()["falhas"] == 1
+
+
+def test_cache_ingestao_remove_os_menos_usados_acima_do_limite(tmp_path):
+    dados = {"texto": "x" * 1000}
+    cache = CacheIngestao(tmp_path, tamanho_maximo=2500)
+    cache.gravar("aa" * 32, dados)
+    cache.gravar("bb" * 32, dados)
+    # "aa" foi lido por último: "bb" é o menos recente
+    antigo = time.time() - 60
+    os.utime(tmp_path / "bb" / f"{'bb' * 32}.json", (antigo, antigo))
+    cache.obter("aa" * 32)
+    cache.gravar("cc" * 32, dados)
+    assert cache.obter("bb" * 32) is None
+    assert cache.obter("aa" * 32) == dados
+    assert cache.obter("cc" * 32) == dados
+    assert cache.estatisticas()["remocoes"] == 1
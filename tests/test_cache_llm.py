@@ -0,0 +1,32 @@
+# coding: utf-8
+import time
+
+from agents.interpretadores.cache_llm import CacheDiagnosticos
+
+
+def test_cache_llm_chave_normaliza_a_clausula():
+    cache = CacheDiagnosticos(":memory:")
+    resposta = {"comentario": "ok", "risco": "baixo"}
+    cache.gravar("gpt-4", "1", "MULTA", "Multa  de 2%\nao mês", resposta, latencia_s=1.5, tokens=100)
+    assert cache.obter("gpt-4", "1", "MULTA", "multa de 2% ao MÊS") == resposta
+    assert cache.obter("gpt-4", "2", "MULTA", "Multa de 2% ao mês") is None
+    assert cache.obter("gpt-4", "1", "PRAZO", "Multa de 2% ao mês") is None
+    estatisticas = cache.estatisticas()
+    assert estatisticas["acertos"] == 1
+    assert estatisticas["tokens_economizados"] == 100
+
+
+def test_cache_llm_nao_grava_erro_e_respeita_ttl():
+    cache = CacheDiagnosticos(":memory:", ttl=0)
+    cache.gravar("gpt-4", "1", "MULTA", "a", {"erro": "timeout"})
+    assert cache.estatisticas()["entradas"] == 0
+    cache.gravar("gpt-4", "1", "MULTA", "a", {"comentario": "ok"})
+    time.sleep(0.01)
+    assert cache.obter("gpt-4", "1", "MULTA", "a") is None
+
+
+def test_cache_llm_remove_excedente_em_lote():
+    cache = CacheDiagnosticos(":memory:", max_entradas=10)
+    for i in range(11):
+        cache.gravar("gpt-4", "1", "MULTA", f"cláusula {i}", {"comentario": str(i)})
+    assert cache.estatisticas()["entradas"] == 10 - 1
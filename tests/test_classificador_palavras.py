@@ -0,0 +1,63 @@
+# coding: utf-8
+import pytest
+
+from agents.extratores import classificador_palavras
+from agents.extratores.classificador_palavras import ClassificadorPalavras, recarregar_palavras_chave
+from agents.extratores.graph_builder import mapeamento_tipos
+
+
+@pytest.fixture
+def tabela_trocada(monkeypatch):
+    tabela = {"grafo": {"ARBITRAGEM": ["arbitragem"]}, "clausulas": {}}
+    monkeypatch.setattr(classificador_palavras, "carregar_tabela", lambda: tabela)
+    recarregar_palavras_chave()
+    yield tabela
+    monkeypatch.undo()
+    recarregar_palavras_chave()
+
+
+def test_classifica_pela_prioridade_da_tabela():
+    classificador = ClassificadorPalavras({"MULTA": ["multa"], "FORO": ["foro", "comarca"]})
+    assert classificador.classificar("multa e foro da comarca") == "MULTA"
+    tipo, evidencias = classificador.classificar_com_evidencias("foro da comarca; comarca")
+    assert tipo == "FORO"
+    assert [(o.palavra, o.inicio) for o in evidencias] == [("foro", 0), ("comarca", 8), ("comarca", 17)]
+
+
+def test_localiza_palavras_de_todos_os_tipos_em_uma_passagem():
+    classificador = ClassificadorPalavras({"RESCISAO": ["rescisão", "rescisão antecipada"], "MULTA": ["multa"]})
+    ocorrencias = classificador.localizar("multa por rescisão antecipada")
+    assert [(o.palavra, o.tipo, o.inicio, o.fim) for o in ocorrencias] == [
+        ("multa", "MULTA", 0, 5),
+        ("rescisão antecipada", "RESCISAO", 10, 29),
+        ("rescisão", "RESCISAO", 10, 18),
+    ]
+    tipo, evidencias = classificador.classificar_com_evidencias("multa por rescisão antecipada")
+    assert tipo == "RESCISAO"
+    assert [o.palavra for o in evidencias] == ["rescisão antecipada", "rescisão"]
+
+
+def test_recarregar_vale_para_o_grafo(tabela_trocada):
+    assert mapeamento_tipos() == {"ARBITRAGEM": ["arbitragem"]}
+    assert classificador_palavras.obter_classificador("grafo").classificar("cláusula de arbitragem") == "ARBITRAGEM"
+
+
+def test_classificador_e_construido_com_a_tabela_lida_sob_o_lock(monkeypatch):
+    tabelas = iter([{"grafo": {"ANTIGA": ["antiga"]}}, {"grafo": {"NOVA": ["nova"]}}])
+
+    def carregar():
+        tabela = next(tabelas)
+        if "ANTIGA" in tabela["grafo"]:
+            # Um recarregamento concorrente espera o lock e só então descarta a tabela
+            assert classificador_palavras._lock.locked()
+        return tabela
+
+    monkeypatch.setattr(classificador_palavras, "carregar_tabela", carregar)
+    recarregar_palavras_chave()
+    try:
+        assert classificador_palavras.obter_classificador("grafo").prioridade == ("ANTIGA",)
+        recarregar_palavras_chave()
+        assert classificador_palavras.obter_classificador("grafo").prioridade == ("NOVA",)
+    finally:
+        monkeypatch.undo()
+        recarregar_palavras_chave()
@@ -0,0 +1,29 @@
+# coding: utf-8
+from agents.extratores.segmentador_clausulas import indexar_clausulas
+from agents.validadores.detector_campos import campos_em_branco_por_clausula
+from crew.juriscrew import executar_detector_campos
+
+TEXTO = (
+    "CONTRATO de ____________\n"
+    "CLÁUSULA PRIMEIRA - DO OBJETO\nServiços de ______.\n"
+    "CLÁUSULA SEGUNDA - DO PREÇO\nValor de R$ ________.\n"
+    "CLÁUSULA PRIMEIRA - DO OBJETO\nPrazo de XXX dias.\n"
+)
+
+
+def test_clausulas_com_o_mesmo_titulo_nao_se_misturam():
+    indice = indexar_clausulas(TEXTO)
+    grupos = campos_em_branco_por_clausula(indice)
+    assert [(g["clausula"], g["posicao"]) for g in grupos] == [
+        ("PREÂMBULO", None),
+        ("CLÁUSULA PRIMEIRA - DO OBJETO", 0),
+        ("CLÁUSULA SEGUNDA - DO PREÇO", 1),
+        ("CLÁUSULA PRIMEIRA - DO OBJETO", 2),
+    ]
+
+
+def test_lista_achatada_na_ordem_do_texto():
+    campos, grupos = executar_detector_campos(indexar_clausulas(TEXTO))
+    assert campos == [campo for grupo in grupos for campo in grupo["campos"]]
+    assert len(campos) == 4
+    assert [TEXTO.index(c) for c in campos] == sorted(TEXTO.index(c) for c in campos)
@@ -0,0 +1,74 @@
+# coding: utf-8
+import json
+from types import SimpleNamespace
+
+from agents.interpretadores import diagnostico_llm
+from agents.interpretadores.cache_llm import CacheDiagnosticos
+from agents.interpretadores.limitador_taxa import LimitadorTaxa
+
+
+class _ClienteFalso:
+    """Responde o lote sem o id "1"; chamadas individuais recebem um JSON fixo."""
+
+    def __init__(self):
+        self.chamadas = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._criar))
+
+    def _criar(self, model, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        self.chamadas.append(prompt)
+        if "[id: 0]" in prompt:
+            conteudo = json.dumps([{"id": "0", "risco": "baixo", "modo": "lote"}])
+        else:
+            conteudo = json.dumps({"risco": "alto", "modo": "individual"})
+        return SimpleNamespace(
+            usage=SimpleNamespace(total_tokens=10, prompt_tokens=5, completion_tokens=5),
+            choices=[SimpleNamespace(message=SimpleNamespace(content=conteudo))],
+        )
+
+
+class _LimitadorContador(LimitadorTaxa):
+    def __init__(self):
+        super().__init__(1000)
+        self.fichas = 0
+
+    def aguardar(self, fichas=1.0):
+        self.fichas += fichas
+
+
+def _preparar(monkeypatch):
+    cache = CacheDiagnosticos(":memory:")
+    cliente = _ClienteFalso()
+    monkeypatch.setattr(diagnostico_llm, "client", cliente)
+    monkeypatch.setattr(diagnostico_llm, "obter_cache_diagnosticos", lambda: cache)
+    monkeypatch.setattr(diagnostico_llm, "registrar_uso_llm", lambda *a, **k: None)
+    return cache, cliente
+
+
+def test_lote_grava_em_versao_propria_e_repete_individualmente_pelo_limitador(monkeypatch):
+    cache, cliente = _preparar(monkeypatch)
+    limitador = _LimitadorContador()
+    pares = [("MULTA", "Multa de 2% ao mês."), ("FORO", "Fica eleito o foro de Curitiba.")]
+
+    resultados = diagnostico_llm.diagnosticar_clausulas_em_lote(pares, limitador=limitador)
+
+    assert [r["modo"] for r in resultados] == ["lote", "individual"]
+    assert len(cliente.chamadas) == 2
+    assert limitador.fichas == 2
+    modelo, versao, versao_lote = diagnostico_llm.MODELO, diagnostico_llm.VERSAO_PROMPT, diagnostico_llm.VERSAO_PROMPT_LOTE
+    assert cache.obter(modelo, versao, *pares[0]) is None
+    assert cache.obter(modelo, versao_lote, *pares[0])["modo"] == "lote"
+    assert cache.obter(modelo, versao, *pares[1])["modo"] == "individual"
+
+    # A chamada individual não reaproveita a resposta do lote
+    assert diagnostico_llm.diagnosticar_clausula(pares[0][1], pares[0][0])["modo"] == "individual"
+
+
+def test_lote_reaproveita_diagnostico_individual(monkeypatch):
+    cache, cliente = _preparar(monkeypatch)
+    cache.gravar(diagnostico_llm.MODELO, diagnostico_llm.VERSAO_PROMPT, "MULTA", "Multa de 2%.", {"modo": "cache"})
+
+    resultados = diagnostico_llm.diagnosticar_clausulas_em_lote([("MULTA", "Multa de 2%.")])
+
+    assert resultados == [{"modo": "cache"}]
+    assert cliente.chamadas == []
@@ -0,0 +1,48 @@
+# coding: utf-8
+import sqlite3
+
+from agents.extratores import indice_invertido
+from agents.extratores.indice_invertido import IndiceInvertido
+
+
+def _indexar(indice, chave, presentes):
+    indice.indexar(chave, [{"label": "CNPJ", "texto": "12.345.678/0001-90"}], presentes, nome=chave)
+
+
+def test_sem_clausula_usa_postagens_de_ausencia(tmp_path):
+    indice = IndiceInvertido(tmp_path / "indice.sqlite3")
+    _indexar(indice, "a", {"FORO", "MULTA"})
+    _indexar(indice, "b", {"MULTA"})
+    assert [c["nome"] for c in indice.buscar(sem_clausulas=["FORO"])] == ["b"]
+    assert [c["nome"] for c in indice.buscar([("CNPJ", "12345678000190")], com_clausulas=["FORO"])] == ["a"]
+    assert indice.desatualizados() == 0
+
+
+def test_tipo_novo_marca_contratos_antigos_como_desatualizados(tmp_path, monkeypatch):
+    indice = IndiceInvertido(tmp_path / "indice.sqlite3")
+    _indexar(indice, "a", {"MULTA"})
+    conhecidos = indice_invertido.tipos_conhecidos()
+    monkeypatch.setattr(indice_invertido, "tipos_conhecidos", lambda: conhecidos + ("ARBITRAGEM",))
+
+    assert indice.desatualizados() == 1
+    assert indice.buscar(sem_clausulas=["ARBITRAGEM"]) == []
+    _indexar(indice, "a", {"MULTA"})
+    assert indice.desatualizados() == 0
+    assert [c["nome"] for c in indice.buscar(sem_clausulas=["ARBITRAGEM"])] == ["a"]
+
+
+def test_migra_indice_sem_coluna_de_tipos(tmp_path):
+    caminho = tmp_path / "indice.sqlite3"
+    with sqlite3.connect(caminho) as conexao:
+        conexao.execute(
+            "CREATE TABLE contratos (id INTEGER PRIMARY KEY, chave TEXT NOT NULL UNIQUE, nome TEXT, "
+            "graph_id TEXT, indexado_em REAL NOT NULL)"
+        )
+        conexao.execute("INSERT INTO contratos (chave, nome, indexado_em) VALUES ('a', 'antigo', 0)")
+    conexao.close()
+
+    indice = IndiceInvertido(caminho)
+    assert indice.estatisticas()["contratos"] == 1
+    assert indice.desatualizados() == 1
+    _indexar(indice, "b", {"FORO"})
+    assert indice.desatualizados() == 1
@@ -0,0 +1,61 @@
+# coding: utf-8
+from concurrent.futures import Future
+
+import fitz
+import pytest
+
+from agents.ingestores.ingestor import _ocr_paginas
+
+
+class _PoolFalso:
+    """Responde as paginas cujo indice de envio esta em `responde`; as demais ficam presas."""
+
+    tamanho = 1
+
+    def __init__(self, responde, em_execucao=()):
+        self.responde = responde
+        self.em_execucao = em_execucao
+        self.futuros = []
+        self.interrompidos = []
+
+    def submeter(self, imagem):
+        futuro = Future()
+        if len(self.futuros) in self.responde:
+            futuro.set_result(f"pagina {len(self.futuros)}")
+        elif len(self.futuros) in self.em_execucao:
+            futuro.set_running_or_notify_cancel()
+        self.futuros.append(futuro)
+        return futuro
+
+    def interromper(self, futuro):
+        self.interrompidos.append(self.futuros.index(futuro))
+        return True
+
+
+@pytest.fixture
+def documento():
+    doc = fitz.open()
+    for _ in range(3):
+        doc.new_page(width=50, height=50)
+    yield doc
+    doc.close()
+
+
+def test_ocr_retorna_texto_por_pagina(documento):
+    pool = _PoolFalso(responde={0, 1, 2})
+    assert _ocr_paginas(documento, [0, 2], pool=pool, timeout_pagina=1) == {0: "pagina 0", 2: "pagina 1"}
+
+
+def test_pagina_travada_levanta_timeout_interrompe_o_motor_e_cancela_as_pendentes(documento):
+    pool = _PoolFalso(responde={0}, em_execucao={1})
+    with pytest.raises(TimeoutError, match="pagina 2"):
+        _ocr_paginas(documento, [0, 1, 2], pool=pool, max_em_voo=3, timeout_pagina=0.1)
+    assert [f.cancelled() for f in pool.futuros] == [False, False, True]
+    assert pool.interrompidos == [1]
+
+
+def test_sem_vaga_para_renderizar_levanta_timeout(documento):
+    pool = _PoolFalso(responde=set())
+    with pytest.raises(TimeoutError, match="sem vaga"):
+        _ocr_paginas(documento, [0, 1], pool=pool, max_em_voo=1, timeout_pagina=0.1)
+    assert pool.futuros[0].cancelled()
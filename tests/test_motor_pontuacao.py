@@ -0,0 +1,98 @@
+# coding: utf-8
+import json
+import os
+import random
+
+import pytest
+
+from agents.pareceristas import motor_pontuacao
+from agents.pareceristas.motor_pontuacao import MotorPontuacao, carregar_regras
+
+TABELA = {
+    "padrao": {"risco": 3, "qualidade": 8, "justificativa": "Cláusula adequada."},
+    "regras": {
+        "PRAZO": [
+            {"alguma": ["vigência", "prazo de"], "todas": ["início", "término"], "qualidade": 9},
+            {"alguma": ["vigência", "prazo de"], "risco": 6, "justificativa": "Sem início e término."},
+            {"risco": 8, "justificativa": "Sem duração."},
+        ],
+        "FORO": [{"alguma": ["comarca"], "qualidade": 9}],
+    },
+}
+
+
+def test_primeira_regra_que_vale_sobrescreve_o_padrao():
+    motor = MotorPontuacao(TABELA)
+    assert motor.pontuar("Vigência com início e término definidos", "PRAZO") == {
+        "risco": 3, "qualidade": 9, "justificativa": "Cláusula adequada."
+    }
+    assert motor.pontuar("Prazo de 12 meses", "PRAZO")["risco"] == 6
+    assert motor.pontuar("Sem nada", "PRAZO")["justificativa"] == "Sem duração."
+    # Sem regra aplicável (e sem "senão") ou tipo sem regras: padrão
+    assert motor.pontuar("foro de Recife", "FORO") == TABELA["padrao"]
+    assert motor.pontuar("qualquer texto", "MULTA") == TABELA["padrao"]
+
+
+def test_lote_igual_a_pontuar_item_a_item():
+    motor = carregar_regras(motor_pontuacao.CAMINHO_REGRAS)
+    palavras = ["vigência", "início", "término", "comarca", "sigilo", "aviso prévio", "%", "serviços de", "x"]
+    tipos = ["OBJETO", "PRAZO", "MULTA", "CONFIDENCIALIDADE", "FORO", "RESCISAO", "OUTRA"]
+    sorteio = random.Random(7)
+    itens = [
+        (" ".join(sorteio.choices(palavras, k=sorteio.randint(0, 5))).upper(), sorteio.choice(tipos))
+        for _ in range(500)
+    ]
+    assert motor.pontuar_lote(itens) == [motor.pontuar(c, t) for c, t in itens]
+
+
+def test_versao_muda_com_as_regras():
+    outra = json.loads(json.dumps(TABELA))
+    outra["regras"]["FORO"][0]["qualidade"] = 7
+    assert MotorPontuacao(TABELA).versao == MotorPontuacao(json.loads(json.dumps(TABELA))).versao
+    assert MotorPontuacao(TABELA).versao != MotorPontuacao(outra).versao
+
+
+@pytest.mark.parametrize(
+    "tabela",
+    [
+        {"padrao": {"risco": 3, "qualidade": 8}},
+        {**TABELA, "regras": {"FORO": [{"alguma": ["comarca"], "nota": 9}]}},
+    ],
+)
+def test_tabela_invalida(tabela):
+    with pytest.raises(ValueError):
+        MotorPontuacao(tabela)
+
+
+@pytest.fixture
+def arquivo_regras(tmp_path, monkeypatch):
+    caminho = tmp_path / "regras.json"
+    caminho.write_text(json.dumps(TABELA), encoding="utf-8")
+    monkeypatch.setattr(motor_pontuacao, "CAMINHO_REGRAS", caminho)
+    monkeypatch.setattr(motor_pontuacao, "INTERVALO_VERIFICACAO_S", 0)
+    monkeypatch.setattr(motor_pontuacao, "_motor", None)
+    monkeypatch.setattr(motor_pontuacao, "_modificado_em", None)
+    return caminho
+
+
+def _regravar(caminho, conteudo):
+    caminho.write_text(conteudo, encoding="utf-8")
+    # Garante mtime diferente mesmo em sistemas de arquivos com resolução grossa
+    estado = caminho.stat()
+    os.utime(caminho, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+
+
+def test_recarrega_quando_o_arquivo_muda_e_mantem_as_anteriores_se_invalido(arquivo_regras):
+    primeiro = motor_pontuacao.obter_motor_pontuacao()
+    assert motor_pontuacao.obter_motor_pontuacao() is primeiro
+
+    alterada = json.loads(json.dumps(TABELA))
+    alterada["padrao"]["risco"] = 5
+    _regravar(arquivo_regras, json.dumps(alterada))
+    segundo = motor_pontuacao.obter_motor_pontuacao()
+    assert segundo.padrao["risco"] == 5
+
+    _regravar(arquivo_regras, "{ inválido")
+    assert motor_pontuacao.obter_motor_pontuacao() is segundo
+    with pytest.raises(ValueError):
+        motor_pontuacao.recarregar_regras_pontuacao()
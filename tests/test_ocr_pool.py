@@ -0,0 +1,126 @@
+# coding: utf-8
+import os
+import time
+
+import numpy as np
+import pytest
+
+from agents.ingestores import ocr_pool
+from agents.ingestores.ocr_pool import OCRIndisponivel, PoolOCR
+
+# As fábricas rodam no processo do motor (spawn): precisam ser de nível de módulo
+QUEBRA = 255
+TRAVA = 254
+
+
+class MotorFalso:
+    def ocr(self, imagem, cls=False):
+        valor = int(imagem[0, 0, 0])
+        if valor == QUEBRA:
+            os._exit(1)
+        if valor == TRAVA:
+            time.sleep(600)
+        return [[[None, (f"pagina {valor}", 1.0)]]]
+
+
+def fabrica_ok():
+    return MotorFalso()
+
+
+def fabrica_sem_modelo():
+    raise ImportError("No module named 'paddleocr'")
+
+
+def fabrica_que_morre():
+    os._exit(1)
+
+
+def fabrica_lenta():
+    time.sleep(30)
+
+
+def pagina(valor):
+    return np.full((2, 2, 3), valor, dtype=np.uint8)
+
+
+@pytest.fixture(autouse=True)
+def reinicio_rapido(monkeypatch):
+    monkeypatch.setattr(ocr_pool, "REINICIO_BASE_S", 0.05)
+    monkeypatch.setattr(ocr_pool, "INTERVALO_VERIFICACAO_S", 0.05)
+
+
+def test_reconhece_na_ordem():
+    pool = PoolOCR(2, fabrica_ok).iniciar(timeout=60)
+    try:
+        assert pool.reconhecer([pagina(i) for i in range(6)]) == [f"pagina {i}" for i in range(6)]
+    finally:
+        pool.encerrar()
+
+
+def test_falha_de_carga_deixa_o_pool_indisponivel_sem_travar():
+    pool = PoolOCR(2, fabrica_sem_modelo)
+    try:
+        with pytest.raises(OCRIndisponivel, match="paddleocr"):
+            pool.iniciar(timeout=60)
+        with pytest.raises(OCRIndisponivel):
+            pool.submeter(pagina(1)).result(timeout=5)
+    finally:
+        pool.encerrar()
+
+
+def test_timeout_de_inicio():
+    pool = PoolOCR(1, fabrica_lenta)
+    try:
+        with pytest.raises(TimeoutError):
+            pool.iniciar(timeout=0.2)
+    finally:
+        pool.encerrar(timeout=0.5)
+
+
+def test_morte_do_motor_falha_so_a_pagina_dele():
+    pool = PoolOCR(1, fabrica_ok).iniciar(timeout=60)
+    try:
+        futuros = [pool.submeter(pagina(v)) for v in (1, QUEBRA, 2, 3)]
+        assert futuros[0].result(timeout=30) == "pagina 1"
+        with pytest.raises(RuntimeError, match="encerrado inesperadamente"):
+            futuros[1].result(timeout=30)
+        # As páginas seguintes esperam o motor ser recriado
+        assert [f.result(timeout=60) for f in futuros[2:]] == ["pagina 2", "pagina 3"]
+    finally:
+        pool.encerrar()
+
+
+def test_motor_que_sempre_morre_e_descartado_apos_o_limite():
+    pool = PoolOCR(1, fabrica_que_morre, max_reinicios=2)
+    try:
+        with pytest.raises(OCRIndisponivel):
+            pool.iniciar(timeout=60)
+        assert pool.indisponivel
+    finally:
+        pool.encerrar()
+
+
+def test_motor_travado_e_encerrado_e_recriado():
+    pool = PoolOCR(1, fabrica_ok, timeout_tarefa=0.3).iniciar(timeout=60)
+    try:
+        futuros = [pool.submeter(pagina(v)) for v in (TRAVA, 2)]
+        with pytest.raises(RuntimeError, match="encerrado"):
+            futuros[0].result(timeout=30)
+        assert futuros[1].result(timeout=60) == "pagina 2"
+    finally:
+        pool.encerrar()
+
+
+def test_interromper_libera_o_motor_da_pagina_abandonada():
+    pool = PoolOCR(1, fabrica_ok).iniciar(timeout=60)
+    try:
+        travada = pool.submeter(pagina(TRAVA))
+        while not travada.running():
+            time.sleep(0.01)
+        assert pool.interromper(travada)
+        with pytest.raises(RuntimeError, match="encerrado"):
+            travada.result(timeout=30)
+        assert pool.submeter(pagina(3)).result(timeout=60) == "pagina 3"
+        assert not pool.interromper(travada)
+    finally:
+        pool.encerrar()
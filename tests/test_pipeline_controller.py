@@ -0,0 +1,111 @@
+# coding: utf-8
+import threading
+
+import pytest
+
+from backend.controllers.pipeline_controller import CONCLUIDO, ERRO, FilaCheia, GerenciadorJobs
+
+
+def test_job_conclui_com_resultado_e_etapas():
+    finalizados = []
+    concluido = threading.Event()
+
+    def ao_finalizar(job):
+        finalizados.append(job.id)
+        concluido.set()
+
+    def executar(caminho, progresso, **kwargs):
+        progresso("ingestao", "concluida")
+        return {"caminho": caminho, **kwargs}
+
+    jobs = GerenciadorJobs(executar, max_trabalhadores=1, max_fila=1)
+    try:
+        job = jobs.submeter("a.pdf", ao_finalizar=ao_finalizar, gerar_pdf=False)
+        assert concluido.wait(5)
+        assert job.status == CONCLUIDO
+        assert job.resultado == {"caminho": "a.pdf", "gerar_pdf": False}
+        assert job.etapas == {"ingestao": "concluida"}
+        assert finalizados == [job.id]
+        assert jobs.obter(job.id) is job
+    finally:
+        jobs.encerrar()
+
+
+def test_erro_do_pipeline_fica_no_job():
+    concluido = threading.Event()
+
+    def executar(caminho, progresso):
+        raise ValueError("PDF corrompido")
+
+    jobs = GerenciadorJobs(executar, max_trabalhadores=1, max_fila=1)
+    try:
+        job = jobs.submeter("a.pdf", ao_finalizar=lambda j: concluido.set())
+        assert concluido.wait(5)
+        assert job.status == ERRO
+        assert job.erro == "PDF corrompido"
+        assert job.resumo()["erro"] == "PDF corrompido"
+    finally:
+        jobs.encerrar()
+
+
+def test_fila_cheia_e_vaga_liberada_ao_terminar():
+    liberar = threading.Event()
+    concluidos = threading.Semaphore(0)
+
+    def executar(caminho, progresso):
+        liberar.wait(5)
+        return {}
+
+    jobs = GerenciadorJobs(executar, max_trabalhadores=1, max_fila=1)
+    try:
+        jobs.submeter("1.pdf", ao_finalizar=lambda j: concluidos.release())
+        jobs.submeter("2.pdf", ao_finalizar=lambda j: concluidos.release())
+        with pytest.raises(FilaCheia):
+            jobs.submeter("3.pdf")
+        liberar.set()
+        assert concluidos.acquire(timeout=5) and concluidos.acquire(timeout=5)
+        jobs.submeter("4.pdf")
+    finally:
+        liberar.set()
+        jobs.encerrar()
+
+
+def test_descarta_jobs_finalizados_acima_da_retencao():
+    concluidos = threading.Semaphore(0)
+    jobs = GerenciadorJobs(lambda caminho, progresso: {}, max_trabalhadores=1, max_fila=5, max_retidos=2)
+    try:
+        primeiro = jobs.submeter("1.pdf", ao_finalizar=lambda j: concluidos.release())
+        assert concluidos.acquire(timeout=5)
+        jobs.submeter("2.pdf", ao_finalizar=lambda j: concluidos.release())
+        assert concluidos.acquire(timeout=5)
+        jobs.submeter("3.pdf", ao_finalizar=lambda j: concluidos.release())
+        assert concluidos.acquire(timeout=5)
+        assert jobs.obter(primeiro.id) is None
+    finally:
+        jobs.encerrar()
+
+
+def test_encerrar_sem_aguardar_finaliza_jobs_da_fila():
+    liberar = threading.Event()
+    iniciou = threading.Event()
+    finalizados = []
+
+    def executar(caminho, progresso):
+        iniciou.set()
+        liberar.wait(5)
+        return {}
+
+    jobs = GerenciadorJobs(executar, max_trabalhadores=1, max_fila=2)
+    em_execucao = jobs.submeter("1.pdf", ao_finalizar=finalizados.append)
+    assert iniciou.wait(5)
+    na_fila = jobs.submeter("2.pdf", ao_finalizar=finalizados.append)
+
+    jobs.encerrar(aguardar=False)
+    assert finalizados == [na_fila]
+    assert na_fila.status == ERRO
+    assert jobs.profundidade_fila() == 0
+
+    liberar.set()
+    jobs.encerrar()
+    assert em_execucao.status == CONCLUIDO
+    assert finalizados == [na_fila, em_execucao]
@@ -0,0 +1,112 @@
+# coding: utf-8
+import pytest
+
+from agents.interpretadores.quase_duplicatas import (
+    IndiceQuaseDuplicatas,
+    normalizar_para_similaridade,
+    termos_mascarados,
+)
+
+VERSAO = "modelo:1"
+DIAGNOSTICO = {"comentario": "Cláusula equilibrada.", "risco": 3}
+
+CONFIDENCIALIDADE = (
+    "CLÁUSULA SEXTA - DA CONFIDENCIALIDADE. As partes obrigam-se a manter sigilo sobre todas as "
+    "informações confidenciais a que tiverem acesso em razão deste contrato, durante a sua vigência "
+    "e pelo prazo de 5 anos após o seu término, sob pena de responder por perdas e danos."
+)
+
+
+@pytest.fixture
+def indice():
+    indice = IndiceQuaseDuplicatas(":memory:", limiar=0.85)
+    indice.registrar(VERSAO, [("CONFIDENCIALIDADE", CONFIDENCIALIDADE, DIAGNOSTICO)])
+    return indice
+
+
+def buscar(indice, texto, tipo="CONFIDENCIALIDADE", termos=()):
+    return indice.buscar(VERSAO, [(tipo, texto)], termos)[0]
+
+
+def test_reaproveita_variacao_pequena(indice):
+    similar = buscar(indice, CONFIDENCIALIDADE.replace("a que tiverem", "às quais tiverem"))
+    assert similar is not None
+    assert similar.resultado == DIAGNOSTICO
+    assert similar.similaridade >= 0.85
+
+
+def test_tipo_e_versao_separam_os_registros(indice):
+    assert buscar(indice, CONFIDENCIALIDADE, tipo="MULTA") is None
+    assert indice.buscar("modelo:2", [("CONFIDENCIALIDADE", CONFIDENCIALIDADE)])[0] is None
+
+
+def test_numeros_diferentes_nao_reaproveitam(indice):
+    assert buscar(indice, CONFIDENCIALIDADE.replace("5 anos", "2 anos")) is None
+
+
+@pytest.mark.parametrize(
+    "original, alterado",
+    [
+        ("obrigam-se a manter", "não se obrigam a manter"),
+        ("sob pena de responder", "sem responder"),
+        ("todas as informações", "exceto as informações"),
+        ("perdas e danos", "perdas e danos, salvo caso fortuito"),
+    ],
+)
+def test_polaridade_diferente_nao_reaproveita(indice, original, alterado):
+    assert buscar(indice, CONFIDENCIALIDADE.replace(original, alterado)) is None
+
+
+def test_prazo_determinado_nao_reaproveita_indeterminado():
+    texto = (
+        "CLÁUSULA SEGUNDA - DO PRAZO. O presente contrato vigorará por prazo indeterminado a partir da "
+        "data de sua assinatura, podendo ser rescindido por qualquer das partes mediante aviso prévio."
+    )
+    indice = IndiceQuaseDuplicatas(":memory:")
+    indice.registrar(VERSAO, [("PRAZO", texto, DIAGNOSTICO)])
+    assert buscar(indice, texto, tipo="PRAZO") is not None
+    assert buscar(indice, texto.replace("indeterminado", "determinado"), tipo="PRAZO") is None
+
+
+def test_papeis_das_partes_invertidos_nao_reaproveitam():
+    texto = (
+        "CLÁUSULA TERCEIRA - DO PAGAMENTO. A CONTRATANTE pagará à CONTRATADA o valor mensal ajustado "
+        "até o quinto dia útil de cada mês, mediante apresentação da nota fiscal correspondente."
+    )
+    invertido = texto.replace("CONTRATANTE", "#").replace("CONTRATADA", "CONTRATANTE").replace("#", "CONTRATADA")
+    indice = IndiceQuaseDuplicatas(":memory:")
+    indice.registrar(VERSAO, [("OBJETO", texto, DIAGNOSTICO)])
+    assert buscar(indice, invertido, tipo="OBJETO") is None
+
+
+def test_mascara_so_as_entidades_encontradas():
+    entidades = [
+        {"texto": "ACME SERVIÇOS LTDA", "label": "EMPRESA"},
+        {"texto": "12.345.678/0001-90", "label": "CNPJ"},
+        {"texto": "CONFIDENCIALIDADE", "label": "CONFIDENCIALIDADE"},
+    ]
+    termos = termos_mascarados(entidades)
+    assert termos == ("12.345.678/0001-90", "ACME SERVIÇOS LTDA")
+    normalizado = normalizar_para_similaridade(
+        "A Contratada, Acme Serviços Ltda, CNPJ 12.345.678/0001-90, As Partes", termos
+    )
+    assert normalizado == "a contratada @ cnpj @ as partes"
+
+
+def test_entidades_diferentes_reaproveitam_com_mascara():
+    modelo = (
+        "CLÁUSULA SEXTA - DA CONFIDENCIALIDADE. A {} obriga-se a manter sigilo sobre todas as "
+        "informações confidenciais recebidas durante a vigência deste contrato, sob pena de multa."
+    )
+    indice = IndiceQuaseDuplicatas(":memory:")
+    indice.registrar(VERSAO, [("CONFIDENCIALIDADE", modelo.format("ACME LTDA"), DIAGNOSTICO)], ("ACME LTDA",))
+    similar = buscar(indice, modelo.format("ZETA CONSULTORIA S/A"), termos=("ZETA CONSULTORIA S/A",))
+    assert similar is not None and similar.similaridade == 1.0
+
+
+def test_remove_excedente_em_lote():
+    indice = IndiceQuaseDuplicatas(":memory:", max_registros=10)
+    indice.registrar(
+        VERSAO, [("MULTA", f"Multa de {i}% sobre o valor do contrato em caso de atraso.", {}) for i in range(12)]
+    )
+    assert indice.estatisticas()["registros"] == 10 - 1
@@ -0,0 +1,90 @@
+# coding: utf-8
+import pytest
+import spacy
+
+from agents.extratores.segmentador_clausulas import indexar_clausulas
+from crew import reanalise
+from crew.reanalise import RepositorioAnalises, reanalisar
+
+CLAUSULAS = [
+    "CLÁUSULA PRIMEIRA - DO OBJETO\nPrestação de serviços de consultoria jurídica.",
+    "CLÁUSULA SEGUNDA - DO PRAZO\nVigência de 12 meses, com início e término definidos.",
+    "CLÁUSULA TERCEIRA - DA MULTA\nMulta de 10% sobre o valor do contrato.",
+    "CLÁUSULA QUARTA - DO FORO\nFica eleito o foro da comarca de Recife.",
+]
+
+
+def contrato(clausulas):
+    return "CONTRATO DE PRESTAÇÃO DE SERVIÇOS\n" + "\n".join(clausulas)
+
+
+@pytest.fixture
+def avaliadas(monkeypatch):
+    """Textos enviados ao avaliador LLM; o NER usa um modelo em branco."""
+    nlp = spacy.blank("pt")
+    enviadas = []
+
+    def avaliar(entidades, indice=None):
+        enviadas.extend(e["texto"] for e in entidades)
+        return [{"tipo": e["label"], "clausula": e["texto"], "comentario": "ok", "risco": "baixo"} for e in entidades]
+
+    monkeypatch.setattr(reanalise, "processar_textos", lambda textos: nlp.pipe(textos))
+    monkeypatch.setattr(reanalise, "avaliar_clausulas", avaliar)
+    return enviadas
+
+
+def test_primeira_versao_analisa_tudo(avaliadas):
+    resultado = reanalisar(indexar_clausulas(contrato(CLAUSULAS)))
+    assert resultado.reaproveitados == 0
+    assert resultado.recalculados == 1 + len(CLAUSULAS)
+    # OBJETO, PRAZO e MULTA são críticas; FORO não
+    assert len(avaliadas) == 3
+    assert len(resultado.avaliacoes_llm) == 3
+    assert resultado.resumo == {}
+
+
+def test_so_a_clausula_alterada_e_recalculada(avaliadas):
+    primeira = reanalisar(indexar_clausulas(contrato(CLAUSULAS)))
+    avaliadas.clear()
+
+    revisadas = list(CLAUSULAS)
+    revisadas[2] = revisadas[2].replace("10%", "2%")
+    revisadas.append("CLÁUSULA QUINTA - DA RESCISÃO\nRescisão mediante aviso prévio de 30 dias.")
+    segunda = reanalisar(indexar_clausulas(contrato(revisadas)), {"trechos": primeira.trechos})
+
+    assert segunda.reaproveitados == 1 + 3
+    assert segunda.recalculados == 2
+    assert [t.split("\n")[0] for t in avaliadas] == [
+        "CLÁUSULA TERCEIRA - DA MULTA",
+        "CLÁUSULA QUINTA - DA RESCISÃO",
+    ]
+    assert segunda.resumo["inalteradas"] == 4
+    assert segunda.resumo["alteradas"] == [
+        {"anterior": "CLÁUSULA TERCEIRA - DA MULTA", "atual": "CLÁUSULA TERCEIRA - DA MULTA"}
+    ]
+    assert segunda.resumo["novas"] == ["CLÁUSULA QUINTA - DA RESCISÃO"]
+    # O resultado incremental é o mesmo de uma análise completa da versão nova
+    completa = reanalisar(indexar_clausulas(contrato(revisadas)))
+    assert segunda.parecer_tecnico == completa.parecer_tecnico
+    assert segunda.entidades == completa.entidades
+
+
+def test_diagnostico_com_erro_e_refeito(avaliadas):
+    primeira = reanalisar(indexar_clausulas(contrato(CLAUSULAS)))
+    for trecho in primeira.trechos:
+        if "avaliacao_llm" in trecho:
+            trecho["avaliacao_llm"] = {"erro": "timeout"}
+    avaliadas.clear()
+    reanalisar(indexar_clausulas(contrato(CLAUSULAS)), {"trechos": primeira.trechos})
+    assert len(avaliadas) == 3
+
+
+def test_repositorio_de_analises(tmp_path):
+    repositorio = RepositorioAnalises(tmp_path / "analises.sqlite3", max_analises=10)
+    repositorio.salvar("a", {"trechos": [{"hash": "x"}]})
+    assert repositorio.existe("a")
+    assert repositorio.obter("a") == {"trechos": [{"hash": "x"}]}
+    assert repositorio.obter("b") is None
+    for i in range(11):
+        repositorio.salvar(f"n{i}", {"trechos": []})
+    assert not repositorio.existe("a")
@@ -0,0 +1,34 @@
+# coding: utf-8
+import fpdf.fpdf
+from fpdf.ttfonts import TTFontFile
+
+from agents.exportadores import relatorio_pdf
+
+DADOS = {
+    "dados_ingestao": {"tipo_entrada": "pdf_editavel", "texto": "Cláusula de rescisão — aviso prévio “úteis”"},
+    "grafo": {"entidades": [{"label": "EMPRESA", "texto": "ACME"}], "relacoes": [], "graph_id": "g1"},
+    "parecer_tecnico": {"riscos": ["multa"]},
+    "parecer_final": {"parecer_estruturado": "ok", "recomendacao": "assinar", "status_final": "aprovado"},
+}
+
+
+def test_nao_altera_o_fpdf_global():
+    assert fpdf.fpdf.TTFontFile is TTFontFile
+
+
+def test_cada_documento_registra_a_fonte_e_o_titulo(tmp_path, monkeypatch):
+    monkeypatch.setattr(relatorio_pdf, "PASTA_RELATORIOS", tmp_path)
+    modelo = relatorio_pdf.ModeloRelatorio()
+    assert modelo.fonte == "DejaVu"
+    for _ in range(2):
+        pdf = modelo.novo_documento()
+        assert pdf.font_family == "dejavu"
+        assert "dejavu" in pdf.fonts
+    caminho = relatorio_pdf.gerar_relatorio_pdf(**DADOS, modelo=modelo)
+    assert open(caminho, "rb").read().startswith(b"%PDF")
+
+
+def test_sem_a_fonte_usa_helvetica(tmp_path):
+    modelo = relatorio_pdf.ModeloRelatorio(tmp_path / "inexistente.ttf")
+    assert modelo.fonte == "Helvetica"
+    assert modelo.novo_documento().font_family == "helvetica"
@@ -0,0 +1,104 @@
+# coding: utf-8
+import os
+import time
+
+from agents.exportadores import relatorio_pdf
+from agents.exportadores.relatorios_sob_demanda import GerenciadorRelatorios
+
+
+def _pdf_antigo(pasta, graph_id, idade_s):
+    caminho = pasta / f"relatorio_{graph_id}.pdf"
+    caminho.write_bytes(b"%PDF-1.4")
+    antigo = time.time() - idade_s
+    os.utime(caminho, (antigo, antigo))
+    return caminho
+
+
+def test_solicitar_limpa_pdfs_vencidos_sem_renderizar(tmp_path, monkeypatch):
+    pasta = tmp_path / "reports"
+    pasta.mkdir()
+    monkeypatch.setattr(relatorio_pdf, "PASTA_RELATORIOS", pasta)
+    vencido = _pdf_antigo(pasta, "a", 7200)
+    recente = _pdf_antigo(pasta, "b", 60)
+    gerenciador = GerenciadorRelatorios(":memory:", pasta=pasta, retencao_s=3600, intervalo_limpeza_s=3600)
+
+    assert gerenciador.solicitar("inexistente") is None
+    gerenciador.encerrar()
+
+    assert not vencido.exists()
+    assert recente.exists()
+
+
+def test_limpeza_por_solicitacao_respeita_o_intervalo(tmp_path):
+    gerenciador = GerenciadorRelatorios(":memory:", pasta=tmp_path, retencao_s=3600, intervalo_limpeza_s=3600)
+    chamadas = []
+    gerenciador.limpar = lambda: chamadas.append(1) or 0
+    for _ in range(5):
+        gerenciador.solicitar("inexistente")
+    gerenciador.encerrar()
+    assert chamadas == [1]
+
+
+class _PastaRenovada:
+    """Lista os PDFs e renova o acesso ao último depois de a limpeza ler o mtime."""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+
+    def glob(self, padrao):
+        caminhos = sorted(self.pasta.glob(padrao))
+        yield from caminhos
+        os.utime(caminhos[-1])
+
+
+def test_limpar_nao_apaga_pdf_renovado_depois_da_listagem(tmp_path):
+    vencido = _pdf_antigo(tmp_path, "a", 7200)
+    servido = _pdf_antigo(tmp_path, "b", 7200)
+    gerenciador = GerenciadorRelatorios(":memory:", pasta=tmp_path, retencao_s=3600)
+    gerenciador.pasta = _PastaRenovada(tmp_path)
+
+    assert gerenciador.limpar() == 1
+    gerenciador.encerrar()
+
+    assert not vencido.exists()
+    assert servido.exists()
+
+
+def test_pdf_apagado_antes_de_servir_agenda_nova_renderizacao(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api
+    from agents.exportadores.relatorios_sob_demanda import PRONTO, RENDERIZANDO, EstadoRelatorio
+
+    estados = [EstadoRelatorio(PRONTO, caminho=str(tmp_path / "apagado.pdf")), EstadoRelatorio(RENDERIZANDO)]
+
+    class _Gerenciador:
+        def solicitar(self, graph_id):
+            return estados.pop(0)
+
+    monkeypatch.setattr(api, "obter_gerenciador_relatorios", lambda: _Gerenciador())
+    resposta = TestClient(api.app).get("/relatorio/g1")
+
+    assert resposta.status_code == 202
+    assert resposta.json() == {"graph_id": "g1", "status": RENDERIZANDO}
+    assert estados == []
+
+
+def test_pdf_pronto_e_servido(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api
+    from agents.exportadores.relatorios_sob_demanda import PRONTO, EstadoRelatorio
+
+    caminho = _pdf_antigo(tmp_path, "g1", 0)
+
+    class _Gerenciador:
+        def solicitar(self, graph_id):
+            return EstadoRelatorio(PRONTO, caminho=str(caminho))
+
+    monkeypatch.setattr(api, "obter_gerenciador_relatorios", lambda: _Gerenciador())
+    resposta = TestClient(api.app).get("/relatorio/g1")
+
+    assert resposta.status_code == 200
+    assert resposta.content == b"%PDF-1.4"
+    assert resposta.headers["content-disposition"] == 'attachment; filename="relatorio_g1.pdf"'
@@ -0,0 +1,38 @@
+# coding: utf-8
+from agents.extratores.repositorio_grafos import RepositorioGrafos
+
+
+def test_grafo_mais_lido_na_memoria_nao_e_o_primeiro_removido_do_disco():
+    repositorio = RepositorioGrafos(":memory:", max_memoria=20, max_disco=10, intervalo_acesso_s=3600)
+    repositorio.salvar("lido", {"entidades": []})
+    for i in range(9):
+        repositorio.salvar(f"g{i}", {"entidades": []})
+    assert repositorio.obter("lido") is not None
+
+    # 11 grafos no disco: o lote de remoção leva os 2 acessados há mais tempo
+    repositorio.salvar("novo", {"entidades": []})
+
+    assert repositorio.obter("lido") is not None
+    assert repositorio.obter("g0") is None and repositorio.obter("g1") is None
+
+
+def test_acertos_na_memoria_gravam_ultimo_acesso_no_intervalo():
+    repositorio = RepositorioGrafos(":memory:", intervalo_acesso_s=0)
+    repositorio.salvar("g1", {"entidades": []})
+    antes = repositorio._conexao.execute("SELECT ultimo_acesso FROM grafos").fetchone()[0]
+
+    repositorio.obter("g1")
+
+    assert repositorio._conexao.execute("SELECT ultimo_acesso FROM grafos").fetchone()[0] > antes
+
+
+def test_obter_e_salvar_nao_compartilham_o_grafo_da_memoria():
+    repositorio = RepositorioGrafos(":memory:")
+    original = {"entidades": [{"texto": "ACME"}]}
+    repositorio.salvar("g1", original)
+    original["entidades"].clear()
+
+    lido = repositorio.obter("g1")
+    lido["entidades"].append({"texto": "intruso"})
+
+    assert repositorio.obter("g1") == {"entidades": [{"texto": "ACME"}]}
@@ -0,0 +1,18 @@
+# coding: utf-8
+import pytest
+
+from backend.controllers.resposta_controller import MODO_SEM_TEXTO, projetar_resultado
+
+RESULTADO = {"status": "ok", "texto": "contrato inteiro", "graph_id": "g1", "parecer_final": {}}
+
+
+def test_sem_modo_devolve_o_resultado_completo():
+    assert projetar_resultado(RESULTADO) == RESULTADO
+
+
+def test_modo_e_campos_projetam_o_resultado():
+    assert "texto" not in projetar_resultado(RESULTADO, MODO_SEM_TEXTO)
+    assert projetar_resultado(RESULTADO, "parecer") == {"status": "ok", "graph_id": "g1", "parecer_final": {}}
+    assert projetar_resultado(RESULTADO, campos=["graph_id", " status"]) == {"graph_id": "g1", "status": "ok"}
+    with pytest.raises(ValueError):
+        projetar_resultado(RESULTADO, campos=["inexistente"])
@@ -0,0 +1,44 @@
+# coding: utf-8
+from agents.extratores.segmentador_clausulas import indexar_clausulas
+
+CONTRATO = (
+    "CONTRATO DE PRESTAÇÃO DE SERVIÇOS\n"
+    "Entre as partes abaixo assinadas.\n"
+    "CLÁUSULA PRIMEIRA - DO OBJETO\n"
+    "Prestação de serviços de   consultoria, conforme a cláusula segunda.\n"
+    "Cláusula Segunda - Do Prazo\n"
+    "Vigência de 12 meses. CLÁUSULA TERCEIRA - DO FORO Fica eleito o foro da comarca de Recife."
+)
+
+
+def test_segmenta_cabecalhos_de_inicio_de_linha_e_maiusculos_no_meio():
+    indice = indexar_clausulas(CONTRATO)
+    assert [c.titulo for c in indice] == [
+        "CLÁUSULA PRIMEIRA - DO OBJETO",
+        "Cláusula Segunda - Do Prazo",
+        "CLÁUSULA TERCEIRA - DO FORO Fica eleito o foro da comarca de Recife.",
+    ]
+    assert indice.clausulas[1].corpo == "Vigência de 12 meses."
+
+
+def test_referencia_no_corpo_nao_abre_clausula():
+    indice = indexar_clausulas(CONTRATO)
+    assert len(indice) == 3
+    assert "conforme a cláusula segunda" in indice.clausulas[0].corpo
+
+
+def test_posicoes_e_texto_normalizado():
+    indice = indexar_clausulas(CONTRATO)
+    primeira = indice.clausulas[0]
+    assert CONTRATO[primeira.inicio:].startswith("CLÁUSULA PRIMEIRA")
+    assert primeira.minusculo.startswith("cláusula primeira - do objeto prestação de serviços de consultoria")
+    assert indice.clausula_em(0) is None
+    assert indice.clausula_em(primeira.inicio + 5) is primeira
+    assert indice.clausula_em(len(CONTRATO) - 1) is indice.clausulas[-1]
+    assert indice.trecho(primeira, limite=8) == "CLÁUSULA"
+
+
+def test_texto_sem_clausulas():
+    indice = indexar_clausulas("Apenas um preâmbulo.")
+    assert len(indice) == 0
+    assert indice.clausula_em(3) is None
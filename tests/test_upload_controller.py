@@ -0,0 +1,92 @@
+# coding: utf-8
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from backend.controllers.upload_controller import UploadMuitoGrande, salvar_upload_em_streaming
+
+
+def salvar(conteudo, pasta, **kwargs):
+    documento = UploadFile(file=io.BytesIO(conteudo), filename="Contrato.PDF")
+    return asyncio.run(salvar_upload_em_streaming(documento, diretorio=str(pasta), **kwargs))
+
+
+def test_grava_em_blocos_com_hash(tmp_path):
+    conteudo = b"%PDF-1.4 " + bytes(range(256)) * 40
+    upload = salvar(conteudo, tmp_path, tamanho_bloco=1000)
+    assert upload.caminho.endswith(".pdf")
+    assert upload.tamanho == len(conteudo)
+    assert upload.sha256 == hashlib.sha256(conteudo).hexdigest()
+    assert upload.nome_original == "Contrato"
+    with open(upload.caminho, "rb") as f:
+        assert f.read() == conteudo
+
+
+def test_nome_original_sem_diretorios(tmp_path):
+    documento = UploadFile(file=io.BytesIO(b"x"), filename="C:\\contratos\\Locação 2024.docx")
+    upload = asyncio.run(salvar_upload_em_streaming(documento, diretorio=str(tmp_path)))
+    assert upload.nome_original == "Locação 2024"
+
+
+def test_acima_do_limite_levanta_e_remove_o_parcial(tmp_path):
+    with pytest.raises(UploadMuitoGrande):
+        salvar(b"x" * 5000, tmp_path, tamanho_maximo=4096, tamanho_bloco=1024)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_no_limite_exato_e_aceito(tmp_path):
+    assert salvar(b"x" * 4096, tmp_path, tamanho_maximo=4096, tamanho_bloco=1024).tamanho == 4096
+
+
+@pytest.fixture
+def cliente_limitado(tmp_path):
+    from fastapi import FastAPI, File
+    from fastapi.testclient import TestClient
+
+    from backend.controllers.upload_controller import LimiteCorpoMiddleware
+
+    app = FastAPI()
+    app.add_middleware(LimiteCorpoMiddleware, limite=8192)
+
+    @app.post("/upload")
+    async def receber(documento: UploadFile = File(...)):
+        upload = await salvar_upload_em_streaming(documento, diretorio=str(tmp_path))
+        return {"tamanho": upload.tamanho}
+
+    return TestClient(app)
+
+
+def _multipart(conteudo):
+    fronteira = "limite"
+    return fronteira, (
+        f'--{fronteira}\r\nContent-Disposition: form-data; name="documento"; filename="a.pdf"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + conteudo + f"\r\n--{fronteira}--\r\n".encode()
+
+
+def test_middleware_aceita_corpo_dentro_do_limite(cliente_limitado):
+    resposta = cliente_limitado.post("/upload", files={"documento": ("a.pdf", b"x" * 4096)})
+    assert resposta.status_code == 200
+    assert resposta.json() == {"tamanho": 4096}
+
+
+def test_middleware_recusa_pelo_content_length(cliente_limitado):
+    resposta = cliente_limitado.post("/upload", files={"documento": ("a.pdf", b"x" * 20000)})
+    assert resposta.status_code == 413
+
+
+def test_middleware_recusa_upload_chunked_sem_content_length(cliente_limitado, tmp_path):
+    fronteira, corpo = _multipart(b"x" * 20000)
+
+    def em_pedacos():
+        for i in range(0, len(corpo), 1000):
+            yield corpo[i : i + 1000]
+
+    resposta = cliente_limitado.post(
+        "/upload", content=em_pedacos(), headers={"Content-Type": f"multipart/form-data; boundary={fronteira}"}
+    )
+    assert resposta.status_code == 413
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,43 @@
+# coding: utf-8
+from agents.extratores.varredor_padroes import campos_em_branco, entidades_regex, varrer_padroes
+
+
+def tipos(ocorrencias):
+    return [o.tipo for o in ocorrencias]
+
+
+def test_entidades_regex():
+    texto = "CNPJ 12.345.678/0001-90, em 01/02/2024, por R$ 1.500,00 em 30 dias."
+    assert [(o.tipo, o.texto) for o in entidades_regex(texto)] == [
+        ("CNPJ", "12.345.678/0001-90"),
+        ("DATA", "01/02/2024"),
+        ("VALOR", "R$ 1.500,00"),
+        ("PRAZO", "30 dias"),
+    ]
+
+
+def test_campos_em_branco():
+    texto = "NOME: ____ valor R$ ___ opção ( X ) XXX [MNg2] e ainda _____"
+    assert tipos(campos_em_branco(texto)) == [
+        "CAMPO_ROTULADO", "VALOR_EM_BRANCO", "CHECKBOX", "PLACEHOLDER", "COMENTARIO", "TRACEJADO",
+    ]
+    assert campos_em_branco(texto)[0].texto == "NOME: ____"
+
+
+def test_foro_em_branco_nao_engole_entidades_da_linha():
+    texto = (
+        "FORO da comarca de ______, assinado em 10/10/2024 pela CNPJ "
+        "12.345.678/0001-90 no valor de R$ 5.000,00, TESTEMUNHA: ____"
+    )
+    assert tipos(entidades_regex(texto)) == ["DATA", "CNPJ", "VALOR"]
+    brancos = campos_em_branco(texto)
+    assert tipos(brancos) == ["FORO_EM_BRANCO", "CAMPO_ROTULADO"]
+    assert brancos[0].texto == "FORO da comarca de ______"
+
+
+def test_foro_sem_tracinhos_na_linha_nao_e_campo_em_branco():
+    assert tipos(varrer_padroes("FORO da comarca de Recife.\n____")) == ["TRACEJADO"]
+
+
+def test_gatilho_no_meio_de_palavra_e_ignorado():
+    assert tipos(varrer_padroes("CONFORO ____ e A1/02/2024")) == ["TRACEJADO"]